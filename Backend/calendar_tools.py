@@ -11,7 +11,7 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
 from dotenv import load_dotenv
-from typing import List
+from typing import List, Optional
  
 # Load environment variables
 load_dotenv()
@@ -100,7 +100,9 @@ def create_calendar_event(
     duration_hours: int,
     attendee_emails: List[str],
     location: str = "Online",
-    description: str = "Meeting scheduled by AI Assistant"
+    description: str = "Meeting scheduled by AI Assistant",
+    timezone: str = "Asia/Kolkata",
+    recurrence: Optional[str] = None
 ) -> str:
     """
     Create a calendar event and send invitations
@@ -113,6 +115,8 @@ def create_calendar_event(
         attendee_emails: List of attendee email addresses
         location: Meeting location (default: "Online")
         description: Meeting description
+        timezone: IANA timezone the date and time are expressed in
+        recurrence: Optional RRULE (e.g. "FREQ=WEEKLY;BYDAY=MO") to make a recurring series
    
     Returns:
         JSON string with event creation status
@@ -142,11 +146,11 @@ def create_calendar_event(
             'description': description,
             'start': {
                 'dateTime': start_time.isoformat(),
-                'timeZone': 'Asia/Kolkata'
+                'timeZone': timezone
             },
             'end': {
                 'dateTime': end_time.isoformat(),
-                'timeZone': 'Asia/Kolkata'
+                'timeZone': timezone
             },
             'reminders': {
                 'useDefault': False,
@@ -156,6 +160,9 @@ def create_calendar_event(
                 ],
             },
         }
+        if recurrence:
+            rule = recurrence[len("RRULE:"):] if recurrence.upper().startswith("RRULE:") else recurrence
+            event['recurrence'] = [f"RRULE:{rule}"]
        
         # Create the event
         print("Creating calendar event...")
@@ -173,7 +180,7 @@ def create_calendar_event(
             print("Sending email notifications...")
             event_details = {
                 'summary': title,
-                'start_time': start_time.strftime('%B %d, %Y at %I:%M %p IST'),
+                'start_time': f"{start_time.strftime('%B %d, %Y at %I:%M %p')} ({timezone})",
                 'duration': f"{duration_hours} hour(s)",
                 'location': location,
                 'description': description,
@@ -191,7 +198,9 @@ def create_calendar_event(
             "attendees_notified": len(attendee_emails) if attendee_emails else 0,
             "emails_sent": email_sent,
             "start_time": start_time.isoformat(),
-            "end_time": end_time.isoformat()
+            "end_time": end_time.isoformat(),
+            "timezone": timezone,
+            "recurrence": event.get('recurrence')
         }
        
         return json.dumps(result, indent=2)
@@ -0,0 +1,159 @@
+"""Admission control for graph node executions and LLM calls"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Session whose node is currently running; lets the LLM gate notify the right client
+current_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_session", default=None)
+
+QueueListener = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when the waiting queue is full or the wait timed out"""
+
+
+class _Gate:
+    """A bounded number of in-flight holders plus a bounded, timed waiting queue"""
+
+    def __init__(self, name: str, limit: int, max_queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.queued = 0
+        self.stats = {
+            "admitted": 0,
+            "queued_total": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "peak_queued": 0,
+            "wait_ms": 0.0,
+        }
+
+    async def _wait(self, notify: Optional[QueueListener]):
+        if self.queued >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise AdmissionRejected(f"Server busy: {self.name} queue is full, please retry shortly")
+
+        self.queued += 1
+        self.stats["queued_total"] += 1
+        self.stats["peak_queued"] = max(self.stats["peak_queued"], self.queued)
+        started = time.perf_counter()
+        try:
+            if notify:
+                try:
+                    await notify({
+                        "type": "queued",
+                        "message": f"Server is busy, your request is queued (position {self.queued}).",
+                        "gate": self.name,
+                        "position": self.queued
+                    })
+                except Exception:
+                    logger.debug("Queue notification failed", exc_info=True)
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            raise AdmissionRejected(f"Server busy: timed out after {self.timeout:g}s waiting for {self.name} capacity")
+        finally:
+            self.queued -= 1
+            self.stats["wait_ms"] += (time.perf_counter() - started) * 1000
+
+    @asynccontextmanager
+    async def slot(self, notify: Optional[QueueListener] = None):
+        if self._semaphore.locked():
+            await self._wait(notify)
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        self.stats["admitted"] += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            **self.stats,
+            "wait_ms": round(self.stats["wait_ms"], 3),
+        }
+
+
+class AdmissionController:
+    """Per-process limits on concurrently running graph nodes and LLM calls.
+
+    Work over the limit waits in a FIFO queue for at most the configured
+    timeout; a full queue or an expired wait raises AdmissionRejected.
+    Clients registered with watch() get a "queued" message when their
+    session has to wait.
+    """
+
+    def __init__(self, max_nodes: int, max_llm_calls: int, max_queue: int, timeout: float):
+        self.nodes = _Gate("graph", max_nodes, max_queue, timeout)
+        self.llm_calls = _Gate("llm", max_llm_calls, max_queue, timeout)
+        self._listeners: Dict[str, QueueListener] = {}
+
+    def watch(self, session_id: str, listener: QueueListener):
+        """Send queue notifications for this session to `listener`"""
+        self._listeners[session_id] = listener
+
+    def unwatch(self, session_id: str):
+        self._listeners.pop(session_id, None)
+
+    def _listener(self) -> Optional[QueueListener]:
+        session_id = current_session.get()
+        return self._listeners.get(session_id) if session_id else None
+
+    @asynccontextmanager
+    async def node_slot(self, session_id: Optional[str]):
+        token = current_session.set(session_id)
+        try:
+            async with self.nodes.slot(self._listener()):
+                yield
+        finally:
+            current_session.reset(token)
+
+    @asynccontextmanager
+    async def llm_slot(self):
+        async with self.llm_calls.slot(self._listener()):
+            yield
+
+    def guard(self, node: Callable[[Any], Awaitable[Any]]):
+        """Wrap a graph node so it only runs once admitted"""
+        @functools.wraps(node)
+        async def admitted_node(state):
+            async with self.node_slot(state.get("session_id")):
+                return await node(state)
+        return admitted_node
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "graph": self.nodes.metrics(),
+            "llm": self.llm_calls.metrics(),
+            "watched_sessions": len(self._listeners),
+        }
+
+
+admission = AdmissionController(
+    max_nodes=settings.admission_max_nodes,
+    max_llm_calls=settings.admission_max_llm_calls,
+    max_queue=settings.admission_max_queue,
+    timeout=settings.admission_queue_timeout_seconds,
+)
@@ -1,31 +1,318 @@
 """LangGraph-based meeting scheduler agent"""
 
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from graph import create_graph
 from state import SchedulingState
-from knowledge import AvailabilityKnowledge
+from components import Components, get_components
 from prompts import get_system_prompt
+from config import settings
+from admission import admission
 import logging
 from langgraph.types import Command
 from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 logger = logging.getLogger(__name__)
 
+# State fields pushed to clients in "updates" stream mode, only when they change
+STREAMED_FIELDS = (
+    "current_step",
+    "attendees",
+    "pending_attendees",
+    "available_slots",
+    "unavailable_attendees",
+    "selected_slot",
+    "meeting_format",
+    "available_rooms",
+    "meeting_room",
+    "meeting_agenda",
+    "recurrence_report",
+    "confirmation_status",
+)
+
+
+def state_delta(update: Any, last_sent: Dict[str, Any]) -> Dict[str, Any]:
+    """Streamed fields of a node update that differ from what the client already has"""
+    if not isinstance(update, dict):
+        return {}
+    delta = {}
+    for field in STREAMED_FIELDS:
+        if field in update and update[field] != last_sent.get(field):
+            last_sent[field] = update[field]
+            delta[field] = update[field]
+    return jsonable_encoder(delta)
+
+
+def auto_answer(interrupt_info: Dict[str, Any], answers: Dict[str, Any]) -> str:
+    """Answer a graph interrupt from pre-supplied choices (stateless REST mode).
+
+    answers keys: slot_preference ("first", "earliest", "latest" or a 1-based
+    number), format ("virtual", "in-person" or a cabin ID), agenda and
+    auto_confirm. Without auto_confirm the run stops at confirmation as a dry run.
+    An ambiguous attendee name resolves to its best-ranked match.
+    """
+    context = interrupt_info.get("context")
+
+    if context == "attendee_selection":
+        return "1"
+
+    if context == "time_selection":
+        slots = interrupt_info.get("available_slots") or []
+        preference = str(answers.get("slot_preference") or "first").strip().lower()
+        if preference.isdigit():
+            return preference
+        if preference in ("earliest", "latest") and slots:
+            ordered = sorted(range(len(slots)), key=lambda i: (slots[i]["date"], slots[i]["start_time"]))
+            return str((ordered[0] if preference == "earliest" else ordered[-1]) + 1)
+        return "1"
+
+    if context == "format_selection":
+        return answers.get("format") or "virtual"
+
+    if context == "agenda_input":
+        return answers.get("agenda") or "Meeting"
+
+    if context == "confirmation":
+        return "confirm" if answers.get("auto_confirm") else "cancel"
+
+    raise ValueError(f"No pre-answered choice for interrupt {context!r}")
+
 class MeetingSchedulerAgent:
     """Main agent class for meeting scheduling"""
     
     def __init__(self):
         self.graph = None
-        self.knowledge = AvailabilityKnowledge()
+        self.components: Optional[Components] = None
         self.system_prompt = get_system_prompt()  # Use your exact prompt
     
-    async def initialize(self):
-        """Initialize the agent"""
-        # Initialize knowledge base
-        await self.knowledge.initialize()
+    async def initialize(self, components: Optional[Components] = None):
+        """Initialize the agent with the shared components (the process-wide ones by default)"""
+        self.components = components or get_components()
+        await self.components.initialize()
+        self.system_prompt = get_system_prompt(self.components.catalog)
         
         # Create graph
         self.graph = await create_graph()
+
+    def build_initial_state(
+        self, message: str, session_id: str, user_id: str, user_name: str, attendees: Optional[List[str]] = None
+    ) -> dict:
+        """Initial graph state for a new scheduling conversation.
+
+        `attendees` are emails the client already resolved (autocomplete);
+        parse_request adds them to whoever the LLM extracts from the message.
+        """
+        return {
+            "messages": [
+                SystemMessage(content=self.system_prompt),
+                HumanMessage(content=message)
+            ],
+            "session_id": session_id,
+            "user_id": user_id,
+            "user_name": user_name,
+            "current_step": "parse_request",
+            "meeting_request": {"attendee_emails": list(attendees or [])},
+            "attendees": [],
+            "pending_attendees": None,
+            "available_slots": [],
+            "selected_slot": None,
+            "meeting_title": None,
+            "meeting_description": None,
+            "meeting_agenda": None,
+            "meeting_format": None,
+            "meeting_room": None,
+            "room_booking": None,
+            "available_rooms": None,
+            "attendee_locations": None,
+            "same_location": None,
+            "confirmation_status": None,
+            "error": None,
+            "created_at": datetime.now(),
+            "updated_at": datetime.now()
+        }
+
+    async def run_stateless(
+        self,
+        message: str,
+        session_id: str,
+        user_id: str,
+        user_name: str,
+        answers: Optional[Dict[str, Any]] = None,
+        attendees: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Run the graph to completion, resolving every interrupt from `answers`"""
+        answers = answers or {}
+        await self.components.llm.record_turn(session_id, message)
+        try:
+            return await self._run_to_completion(message, session_id, user_id, user_name, answers, attendees)
+        finally:
+            # A stateless run is never resumed, so its checkpoint thread can go right away
+            await self.components.session_reaper.evict(session_id)
+
+    async def _run_to_completion(
+        self,
+        message: str,
+        session_id: str,
+        user_id: str,
+        user_name: str,
+        answers: Dict[str, Any],
+        attendees: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        config_thread = {"configurable": {"thread_id": session_id}}
+        payload: Any = self.build_initial_state(message, session_id, user_id, user_name, attendees)
+        resolved = []
+        confirmation_preview = None
+
+        while True:
+            interrupt_info = None
+            async for chunk in self.graph.astream(payload, config=config_thread, context=self.components):
+                if "__interrupt__" in chunk:
+                    interrupt_info = chunk["__interrupt__"][0].value
+            if interrupt_info is None:
+                break
+
+            if len(resolved) >= settings.stateless_max_interrupts:
+                raise RuntimeError("Scheduling did not converge with the supplied choices")
+
+            answer = auto_answer(interrupt_info, answers)
+            context = interrupt_info.get("context")
+            if context == "confirmation":
+                confirmation_preview = interrupt_info.get("message")
+            resolved.append({"context": context, "answer": answer})
+            await self.components.llm.record_turn(session_id, answer)
+            payload = Command(resume=answer)
+
+        values = (await self.graph.aget_state(config_thread)).values
+        ai_messages = [msg for msg in values.get("messages", []) if isinstance(msg, AIMessage)]
+
+        if values.get("confirmation_status"):
+            status = "scheduled"
+        elif confirmation_preview:
+            status = "dry_run"
+        else:
+            status = "incomplete"
+
+        return {
+            "status": status,
+            "response": ai_messages[-1].content if ai_messages else "",
+            "selected_slot": values.get("selected_slot"),
+            "meeting_format": values.get("meeting_format"),
+            "meeting_room": values.get("meeting_room"),
+            "meeting_details": values.get("meeting_details"),
+            "recurrence_report": values.get("recurrence_report"),
+            "confirmation": confirmation_preview,
+            "interrupts": resolved
+        }
+
+    async def stream_conversation(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        initial_state: dict,
+        stream_mode: str = "progress"
+    ) -> str:
+        """Stream the graph to the client, resuming each interrupt in the same pass.
+
+        Every run is a single astream() call, started with the initial state
+        and then with Command(resume=...), so resumed nodes report progress
+        like any other node and no extra invoke/get_state round trips happen.
+
+        stream_mode "progress" sends node names; "updates" sends each node's
+        changed STREAMED_FIELDS as a JSON delta.
+        """
+        config_thread = {"configurable": {"thread_id": session_id}}
+        payload: Any = initial_state
+        last_sent: Dict[str, Any] = {}
+
+        while True:
+            self.components.session_reaper.touch(session_id)
+            interrupt_info = None
+            async for chunk in self.graph.astream(payload, config=config_thread, stream_mode="updates", context=self.components):
+                for node_id, value in chunk.items():
+                    if node_id == "__interrupt__":
+                        interrupt_info = value[0].value
+
+                    elif node_id == "calendar_event":
+                        await websocket.send_json({
+                            "type": "complete",
+                            "message": "Meeting scheduled successfully!",
+                            "meeting_details": value
+                        })
+                        return "Meeting scheduled successfully!"
+
+                    elif stream_mode == "updates":
+                        delta = state_delta(value, last_sent)
+                        if delta:
+                            await websocket.send_json({
+                                "type": "update",
+                                "node": node_id,
+                                "delta": delta
+                            })
+
+                    else:
+                        await websocket.send_json({
+                            "type": "progress",
+                            "message": f"Processing node: {node_id}"
+                        })
+
+            if interrupt_info is None:
+                break
+
+            # Ask client for more input
+            await websocket.send_json({
+                "type": "question",
+                "message": interrupt_info.get('message', 'Please provide input: '),
+                "context": interrupt_info.get("context")
+            })
+
+            user_response = await self.receive_message(websocket)
+            user_input = user_response.get("message", "")
+            await self.components.llm.record_turn(session_id, user_input)
+            payload = Command(resume=user_input)
+
+        # Final message from AI if available
+        final_state = await self.graph.aget_state(config_thread)
+        if final_state and final_state.values:
+            ai_messages = [
+                msg for msg in final_state.values.get("messages", [])
+                if isinstance(msg, AIMessage)
+            ]
+            if ai_messages:
+                await websocket.send_json({
+                    "type": "final_message",
+                    "message": ai_messages[-1].content
+                })
+                return ai_messages[-1].content
+            await websocket.send_json({
+                "type": "complete",
+                "message": "Workflow completed successfully."
+            })
+            return "Workflow completed successfully."
+
+        await websocket.send_json({
+            "type": "complete",
+            "message": "Workflow completed, but no final message found."
+        })
+        return "No final message found."
+
+    async def receive_message(self, websocket: WebSocket) -> Dict[str, Any]:
+        """Next client message, answering attendee autocomplete lookups in between.
+
+        {"type": "autocomplete", "q": "shu"} gets back
+        {"type": "autocomplete", "q": "shu", "results": [{"name", "email"}, ...]}.
+        """
+        while True:
+            data = await websocket.receive_json()
+            if data.get("type") != "autocomplete":
+                return data
+            query = str(data.get("q") or "")
+            await websocket.send_json({
+                "type": "autocomplete",
+                "q": query,
+                "results": await self.components.knowledge.autocomplete(query, settings.autocomplete_max_results)
+            })
+
     active_connections = {}
     async def process_message(self,websocket: WebSocket,
         message: str,
@@ -35,6 +322,7 @@ class MeetingSchedulerAgent:
     ) -> str:
         await websocket.accept()
         self.active_connections[session_id] = websocket
+        admission.watch(session_id, websocket.send_json)
 
         try:
             await websocket.send_json({
@@ -47,108 +335,11 @@ class MeetingSchedulerAgent:
             message = data.get("message", "")
             user_id = data.get("user_id", "unknown_user")
             user_name = data.get("user_name", "Anonymous")
+            await self.components.llm.record_turn(session_id, message)
 
-            # Construct initial state
-            initial_state = {
-                "messages": [
-                    SystemMessage(content=self.system_prompt),
-                    HumanMessage(content=message)
-                ],
-                "session_id": session_id,
-                "user_id": user_id,
-                "user_name": user_name,
-                "current_step": "parse_request",
-                "meeting_request": {},
-                "attendees": [],
-                "available_slots": [],
-                "selected_slot": None,
-                "meeting_title": None,
-                "meeting_description": None,
-                "meeting_agenda": None,
-                "meeting_format": None,
-                "meeting_room": None,
-                "available_rooms": None,
-                "attendee_locations": None,
-                "same_location": None,
-                "confirmation_status": None,
-                "error": None,
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
-            }
-
-            config_thread = {"configurable": {"thread_id": session_id}}
-            stream = self.graph.astream(initial_state, config=config_thread)
-
-            while True:
-                try:
-                    async for chunk in stream:
-                        for node_id, value in chunk.items():
-                            if node_id == "__interrupt__":
-                                interrupt_info = value[0].value
-                                message_text = interrupt_info.get('message', 'Please provide input: ')
-
-                                # Ask client for more input
-                                await websocket.send_json({
-                                    "type": "question",
-                                    "message": message_text
-                                })
-
-                                user_response = await websocket.receive_json()
-                                user_input = user_response.get("message", "")
-
-                                # Resume with user input
-                                await self.graph.ainvoke(
-                                    Command(resume=user_input),
-                                    config=config_thread
-                                )
-
-                                stream = self.graph.astream(None, config=config_thread)
-                                break  # Break inner loop to restart stream
-
-                            elif node_id == "calendar_event":
-                                await websocket.send_json({
-                                    "type": "complete",
-                                    "message": "Meeting scheduled successfully!",
-                                    "meeting_details": value
-                                })
-                                return  # End the WebSocket session
-
-                            else:
-                                await websocket.send_json({
-                                    "type": "progress",
-                                    "message": f"Processing node: {node_id}"
-                                })
-
-                    current_state = self.graph.get_state(config_thread)
-                    if current_state.next == ():
-                        break
-                    else:
-                        stream = self.graph.astream(None, config=config_thread)
+            initial_state = self.build_initial_state(message, session_id, user_id, user_name)
 
-                except StopAsyncIteration:
-                    current_state = self.graph.get_state(config_thread)
-                    if current_state.next == ():
-                        break
-                    else:
-                        stream = self.graph.astream(None, config=config_thread)
-
-            # Final message from AI if available
-            final_state = self.graph.get_state(config_thread)
-            if final_state and final_state.values:
-                ai_messages = [
-                    msg for msg in final_state.values.get("messages", [])
-                    if isinstance(msg, AIMessage)
-                ]
-                if ai_messages:
-                    await websocket.send_json({
-                        "type": "final_message",
-                        "message": ai_messages[-1].content
-                    })
-                else:
-                    await websocket.send_json({
-                        "type": "complete",
-                        "message": "Workflow completed successfully."
-                    })
+            await self.stream_conversation(websocket, session_id, initial_state, data.get("stream_mode", "progress"))
 
         except WebSocketDisconnect:
             print(f"Client {session_id} disconnected")
@@ -161,6 +352,7 @@ class MeetingSchedulerAgent:
         finally:
             if session_id in self.active_connections:
                 del self.active_connections[session_id]
+            admission.unwatch(session_id)
 
 # Global agent instance
 scheduler_agent = MeetingSchedulerAgent()
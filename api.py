@@ -4,7 +4,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
@@ -12,8 +12,15 @@ import logging
 import os
 import uuid
 import jwt
+from admission import admission, AdmissionRejected
 from agents import scheduler_agent
+from session_reaper import is_disconnected
+from batch_scheduler import BatchScheduler
+from calendar_sync import create_calendar_sync
+from components import get_components
 from config import settings
+from db import close_pool
+from llm_client import close_shared_llm
 from contextlib import asynccontextmanager
 from langgraph.types import Command
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
@@ -25,12 +32,38 @@ from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 # Models
 class ChatRequest(BaseModel):
     question: str
+    user_id: str = "api_user"
+    user_name: str = "API"
+    # Pre-answered choices; the graph's interrupts are resolved from these
+    slot_preference: str = "first"  # "first", "earliest", "latest" or a 1-based slot number
+    format: Optional[str] = None  # "virtual", "in-person" or a cabin ID; defaults to virtual
+    agenda: Optional[str] = None
+    auto_confirm: bool = False  # False = dry run: stop at confirmation without sending invites
+    attendees: List[str] = []  # emails already resolved through /api/people/autocomplete
 
 class ChatResponse(BaseModel):
     response: str
     metadata: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+class BatchMeeting(BaseModel):
+    id: Optional[str] = None
+    title: Optional[str] = None
+    attendees: List[str]  # names or emails
+    duration_minutes: int = 60
+    window_start: Optional[str] = None  # YYYY-MM-DD, defaults to today
+    window_end: Optional[str] = None
+    format: str = "virtual"  # "virtual" or "in-person"
+
+class BatchScheduleRequest(BaseModel):
+    meetings: List[BatchMeeting]
+    book_rooms: bool = False
+
+class BatchScheduleResponse(BaseModel):
+    scheduled: int
+    unscheduled: int
+    assignments: List[Dict[str, Any]]
+
 # FastAPI app
 app = FastAPI(title="Executive Meeting Scheduler API", version="2.0.0")
 
@@ -68,6 +101,7 @@ class SessionManager:
             "created_at": datetime.now(),
             "last_activity": datetime.now()
         }
+        get_components().session_reaper.touch(session_id)
         return session_id
     
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
@@ -78,10 +112,11 @@ class SessionManager:
         """Update last activity time"""
         if session_id in self.sessions:
             self.sessions[session_id]["last_activity"] = datetime.now()
+            get_components().session_reaper.touch(session_id)
     
     def cleanup_sessions(self):
         """Remove expired sessions"""
-        expired_time = datetime.now() - timedelta(hours=2)
+        expired_time = datetime.now() - timedelta(seconds=settings.session_idle_ttl_seconds)
         expired_sessions = [
             sid for sid, data in self.sessions.items()
             if data["last_activity"] < expired_time
@@ -90,9 +125,7 @@ class SessionManager:
             del self.sessions[sid]
 
 session_manager = SessionManager()
-
-# In-memory session tracking for backward compatibility
-user_session_id = {}
+calendar_sync = create_calendar_sync() if settings.calendar_sync_enabled else None
 
 # Authentication (optional)
 def verify_token_optional(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Optional[Dict[str, Any]]:
@@ -113,9 +146,24 @@ def verify_token_optional(credentials: Optional[HTTPAuthorizationCredentials] =
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await scheduler_agent.initialize()
+    # One set of LLM transport, knowledge base, rooms and background services for the whole process
+    components = get_components()
+    await scheduler_agent.initialize(components)
     logger.info("Meeting Scheduler Agent initialized")
+    components.session_reaper.on_evict(evict_session)
+    components.session_reaper.track_connections(active_connections)
+    components.session_reaper.track_connections(scheduler_agent.active_connections)
+    components.session_reaper.start(scheduler_agent.graph.checkpointer)
+    components.slot_snapshots.start(components.knowledge)
+    if calendar_sync:
+        calendar_sync.start()
     yield
+    if calendar_sync:
+        await calendar_sync.stop()
+    await components.slot_snapshots.stop()
+    await components.session_reaper.stop()
+    await close_pool()
+    await close_shared_llm()
 
 # Re-create app with lifespan handler
 app = FastAPI(title="Executive Meeting Scheduler API", version="2.0.0", lifespan=lifespan)
@@ -135,51 +183,59 @@ async def home():
 
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(req: ChatRequest):
-    """REST endpoint for chat (backward compatibility)"""
-    global user_session_id
+    """Stateless scheduling: run the whole graph in one request with pre-answered choices"""
+    session_id = str(uuid.uuid4())
     
     try:
         logger.info(f"User question: {req.question}")
         
-        # Simple session management
-        user_name = "john@gmail.com"  # Default user
-        
-        if req.question.strip().lower() == "hi":
-            session_id = str(uuid.uuid4())
-            user_session_id[user_name] = session_id
-            logger.info(f"New session_id generated: {session_id}")
-        else:
-            session_id = user_session_id.get(user_name)
-            if not session_id:
-                session_id = str(uuid.uuid4())
-                user_session_id[user_name] = session_id
-                logger.info(f"New session_id generated: {session_id}")
-            else:
-                logger.info(f"Using existing session_id: {session_id}")
-        
-        # Process message
-        response = await scheduler_agent.process_message(
+        result = await scheduler_agent.run_stateless(
             message=req.question,
             session_id=session_id,
-            user_id="johnDeo123",
-            user_name=user_name
+            user_id=req.user_id,
+            user_name=req.user_name,
+            answers=req.dict(include={"slot_preference", "format", "agenda", "auto_confirm"}),
+            attendees=req.attendees
         )
         
-        logger.info(f"Agent Response: {response}")
+        logger.info(f"Stateless run {session_id} finished: {result['status']}")
         
-        return ChatResponse(response=response)
+        return ChatResponse(
+            response=result.pop("response"),
+            metadata={"session_id": session_id, **result}
+        )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RuntimeError as e:
+        return ChatResponse(response="", metadata={"session_id": session_id}, error=str(e))
     except Exception as e:
         logger.exception("Chat processing failed")
         raise HTTPException(status_code=500, detail=str(e))
 active_connections = {}
 
 
+async def evict_session(session_id: str):
+    """Drop a reaped session's connection, queue listener and session entry"""
+    admission.unwatch(session_id)
+    session_manager.sessions.pop(session_id, None)
+    for connections in (active_connections, scheduler_agent.active_connections):
+        websocket = connections.pop(session_id, None)
+        if websocket is not None and not is_disconnected(websocket):
+            try:
+                await websocket.close(code=1001, reason="Session expired")
+            except Exception:
+                pass
+
+
 
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     await websocket.accept()
     active_connections[session_id] = websocket
+    admission.watch(session_id, websocket.send_json)
 
     try:
         await websocket.send_json({
@@ -188,119 +244,19 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
         })
 
         # Receive initial message
-        data = await websocket.receive_json()
+        data = await scheduler_agent.receive_message(websocket)
         message = data.get("message", "")
         user_id = data.get("user_id", "unknown_user")
         user_name = data.get("user_name", "Anonymous")
+        await scheduler_agent.components.llm.record_turn(session_id, message)
 
-        # Construct initial state
-        initial_state = {
-            "messages": [
-                SystemMessage(content=scheduler_agent.system_prompt),
-                HumanMessage(content=message)
-            ],
-            "session_id": session_id,
-            "user_id": user_id,
-            "user_name": user_name,
-            "current_step": "parse_request",
-            "meeting_request": {},
-            "attendees": [],
-            "available_slots": [],
-            "selected_slot": None,
-            "meeting_title": None,
-            "meeting_description": None,
-            "meeting_agenda": None,
-            "meeting_format": None,
-            "meeting_room": None,
-            "available_rooms": None,
-            "attendee_locations": None,
-            "same_location": None,
-            "confirmation_status": None,
-            "error": None,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        }
-
-        config_thread = {"configurable": {"thread_id": session_id}}
-        stream = scheduler_agent.graph.astream(initial_state, config=config_thread)
+        initial_state = scheduler_agent.build_initial_state(
+            message, session_id, user_id, user_name, data.get("attendees")
+        )
 
-        while True:
-            try:
-                async for chunk in stream:
-                    for node_id, value in chunk.items():
-                        if node_id == "__interrupt__":
-                            interrupt_info = value[0].value
-                            message_text = interrupt_info.get('message', 'Please provide input: ')
-
-                            await websocket.send_json({
-                                "type": "question",
-                                "message": message_text
-                            })
-
-                            user_response = await websocket.receive_json()
-                            user_input = user_response.get("message", "")
-
-                            await scheduler_agent.graph.ainvoke(
-                                Command(resume=user_input),
-                                config=config_thread
-                            )
-
-                            stream = scheduler_agent.graph.astream(None, config=config_thread)
-                            break
-
-                        elif node_id == "calendar_event":
-                            await websocket.send_json({
-                                "type": "complete",
-                                "message": "Meeting scheduled successfully!",
-                                "meeting_details": value
-                            })
-                            return "Meeting scheduled successfully!"
-
-                        else:
-                            await websocket.send_json({
-                                "type": "progress",
-                                "message": f"Processing node: {node_id}"
-                            })
-
-                current_state = scheduler_agent.graph.get_state(config_thread)
-                if current_state.next == ():
-                    break
-                else:
-                    stream = scheduler_agent.graph.astream(None, config=config_thread)
-
-            except StopAsyncIteration:
-                current_state = scheduler_agent.graph.get_state(config_thread)
-                if current_state.next == ():
-                    break
-                else:
-                    stream = scheduler_agent.graph.astream(None, config=config_thread)
-
-        # Final message from AI if available
-        final_state = scheduler_agent.graph.get_state(config_thread)
-        if final_state and final_state.values:
-            ai_messages = [
-                msg for msg in final_state.values.get("messages", [])
-                if isinstance(msg, AIMessage)
-            ]
-            if ai_messages:
-                last_message = ai_messages[-1].content
-                await websocket.send_json({
-                    "type": "final_message",
-                    "message": last_message
-                })
-                return last_message
-            else:
-                await websocket.send_json({
-                    "type": "complete",
-                    "message": "Workflow completed successfully."
-                })
-                return "Workflow completed successfully."
-        else:
-            await websocket.send_json({
-                "type": "complete",
-                "message": "Workflow completed, but no final message found."
-            })
-            return "No final message found."
+        return await scheduler_agent.stream_conversation(
+            websocket, session_id, initial_state, data.get("stream_mode", "progress")
+        )
 
     except WebSocketDisconnect:
         print(f"Client {session_id} disconnected")
@@ -314,6 +270,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     finally:
         if session_id in active_connections:
             del active_connections[session_id]
+        admission.unwatch(session_id)
 
 @app.websocket("/ws/chat/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
@@ -359,6 +316,24 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for session {session_id}")
 
+@app.post("/api/schedule/batch", response_model=BatchScheduleResponse)
+async def schedule_batch(req: BatchScheduleRequest):
+    """Assign non-conflicting slots and rooms to many meetings at once"""
+    if len(req.meetings) > settings.batch_max_meetings:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_meetings} meetings per batch")
+    
+    components = scheduler_agent.components
+    scheduler = BatchScheduler(components.knowledge, components.room_manager)
+    result = await scheduler.schedule([meeting.dict() for meeting in req.meetings], book_rooms=req.book_rooms)
+    logger.info(f"Batch scheduled {result['scheduled']}/{len(req.meetings)} meetings")
+    return BatchScheduleResponse(**result)
+
+@app.get("/api/people/autocomplete")
+async def autocomplete_people(q: str, limit: int = 10):
+    """Directory people whose name, email or alias starts with `q`"""
+    limit = max(1, min(limit, settings.autocomplete_max_results))
+    return {"query": q, "results": await scheduler_agent.components.knowledge.autocomplete(q, limit)}
+
 @app.get("/api/health")
 async def health():
     """Health check endpoint"""
@@ -368,6 +343,23 @@ async def health():
         "version": "2.0.0"
     }
 
+@app.get("/api/metrics")
+async def metrics():
+    """Admission, LLM rate limiter, availability cache, knowledge search, slot snapshots, calendar sync and session/memory gauges"""
+    components = scheduler_agent.components or get_components()
+    # Only report on the model the components already hold; never build a client here
+    llm_metrics = getattr(components.llm, "metrics", None)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "admission": admission.metrics(),
+        "sessions": components.session_reaper.metrics(),
+        "availability_flight": components.availability_flight.metrics(),
+        "calendar_sync": calendar_sync.metrics() if calendar_sync else None,
+        "slot_snapshots": components.slot_snapshots.metrics(),
+        "knowledge_search": components.knowledge.search_metrics(),
+        "llm_rate_limiter": llm_metrics() if callable(llm_metrics) else None
+    }
+
 # Main
 if __name__ == "__main__":
     import uvicorn
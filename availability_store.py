@@ -0,0 +1,244 @@
+"""Postgres-backed directory and calendar store"""
+
+from collections import defaultdict
+from datetime import date, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from asyncpg import Range
+
+from config import settings
+from db import get_pool
+from room_catalog import RoomCatalog
+from slot_search import MINUTES_PER_DAY, calendar_days, datetime_to_utc_minutes, utc_minutes_to_datetime
+
+# Busy time of every attendee inside a window, merged into disjoint ranges by
+# the database (range_agg needs PostgreSQL 14+). Calendar events come from the
+# (user_id, during) GiST index; OOO/travel days block the attendee's whole local day.
+MERGED_BUSY_SQL = """
+WITH attendees AS (
+    SELECT id, coalesce(timezone, $3) AS tz
+    FROM directory_users
+    WHERE lower(email) = ANY($1::text[])
+),
+busy AS (
+    SELECT b.during * $2::tstzrange AS during
+    FROM attendees a
+    JOIN busy_intervals b ON b.user_id = a.id AND b.during && $2::tstzrange
+    UNION ALL
+    SELECT tstzrange(ab.day::timestamp AT TIME ZONE a.tz, (ab.day + 1)::timestamp AT TIME ZONE a.tz) * $2::tstzrange
+    FROM attendees a
+    JOIN user_absences ab ON ab.user_id = a.id
+        AND ab.day BETWEEN (lower($2::tstzrange) AT TIME ZONE 'UTC')::date - 1
+                       AND (upper($2::tstzrange) AT TIME ZONE 'UTC')::date + 1
+)
+SELECT lower(merged) AS starts_at, upper(merged) AS ends_at
+FROM unnest((SELECT range_agg(during) FROM busy)) AS merged
+ORDER BY starts_at
+"""
+
+
+def _slot(starts_at, ends_at) -> str:
+    return f"{starts_at.strftime('%H:%M')}-{ends_at.strftime('%H:%M')}"
+
+
+def _clock(minute: int) -> time:
+    """Local minute of day as TIME; the end of the day (1440) is stored as 23:59:59.999999"""
+    return time.max if minute >= MINUTES_PER_DAY else time(minute // 60, minute % 60)
+
+
+async def fetch_merged_busy(conn, emails: Iterable[str], span: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Merged busy (start, end) UTC minutes of the attendees inside a UTC-minute span, in one round trip"""
+    rows = await conn.fetch(
+        MERGED_BUSY_SQL,
+        [email.lower() for email in emails],
+        Range(utc_minutes_to_datetime(span[0]), utc_minutes_to_datetime(span[1])),
+        settings.default_timezone,
+    )
+    return [(datetime_to_utc_minutes(row["starts_at"]), datetime_to_utc_minutes(row["ends_at"])) for row in rows]
+
+
+class PostgresAvailabilityStore:
+    """Users, busy intervals, OOO/travel days and cabins in normalized tables.
+
+    Lookups return users in the same shape as an entry of
+    users_availability.json, so slot search and prompts do not change.
+    The schema lives in init_db.sql; import_availability.py loads it.
+    """
+
+    async def _assemble(self, conn, rows, days: Optional[Tuple[date, date]] = None) -> List[Dict[str, Any]]:
+        """Attach calendar events and OOO/travel days between `days` (inclusive local dates) to directory rows.
+
+        Without `days`, the default slot search horizon from today is used;
+        the bound keeps both queries on the (user_id, day) indexes.
+        """
+        if not rows:
+            return []
+        user_ids = [row["id"] for row in rows]
+        first_day, last_day = days or calendar_days(date.today())
+
+        events: Dict[int, Dict[str, List[Dict[str, str]]]] = defaultdict(lambda: defaultdict(list))
+        for event in await conn.fetch(
+            """
+            SELECT user_id, day, starts_at, ends_at, title, event_id
+            FROM busy_intervals
+            WHERE user_id = ANY($1::bigint[]) AND day BETWEEN $2 AND $3
+            ORDER BY user_id, day, starts_at
+            """,
+            user_ids, first_day, last_day,
+        ):
+            events[event["user_id"]][event["day"].isoformat()].append({
+                "slot": _slot(event["starts_at"], event["ends_at"]),
+                "title": event["title"],
+                "event_id": event["event_id"],
+            })
+
+        absences: Dict[int, Dict[str, List[str]]] = defaultdict(lambda: {"ooo": [], "travel": []})
+        for absence in await conn.fetch(
+            """
+            SELECT user_id, day, kind FROM user_absences
+            WHERE user_id = ANY($1::bigint[]) AND day BETWEEN $2 AND $3
+            ORDER BY day
+            """,
+            user_ids, first_day, last_day,
+        ):
+            absences[absence["user_id"]][absence["kind"]].append(absence["day"].isoformat())
+
+        return [
+            {
+                "name": row["name"],
+                "email": row["email"],
+                "base_location": row["base_location"],
+                "timezone": row["timezone"],
+                "ooo_dates": absences[row["id"]]["ooo"],
+                "travel_dates": absences[row["id"]]["travel"],
+                "calendar_events": {day: slots for day, slots in events[row["id"]].items()},
+            }
+            for row in rows
+        ]
+
+    async def users_by_identifiers(
+        self, identifiers: Iterable[str], days: Optional[Tuple[date, date]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Map each lower-cased email or name to its user, with calendar data between `days`; unknown identifiers are absent"""
+        keys = list({identifier.strip().lower() for identifier in identifiers})
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT id, name, email, base_location, timezone
+                FROM directory_users
+                WHERE lower(email) = ANY($1::text[]) OR lower(name) = ANY($1::text[])
+                ORDER BY id
+                """,
+                keys,
+            )
+            users = await self._assemble(conn, rows, days)
+
+        found: Dict[str, Dict[str, Any]] = {}
+        for user in users:
+            for key in (user["email"].lower(), user["name"].lower()):
+                if key in keys:
+                    found.setdefault(key, user)
+        return found
+
+    async def merged_busy(self, emails: Iterable[str], span: Tuple[int, int]) -> List[Tuple[int, int]]:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            return await fetch_merged_busy(conn, emails, span)
+
+    async def calendar_users(self) -> List[Dict[str, Any]]:
+        """Email and timezone of every directory user (calendar sync targets)"""
+        pool = await get_pool()
+        rows = await pool.fetch("SELECT email, base_location, timezone FROM directory_users ORDER BY id")
+        return [dict(row) for row in rows]
+
+    async def sync_state(self, email: str) -> Tuple[Optional[str], Optional[date]]:
+        """Stored sync token and the horizon day it was synced up to"""
+        pool = await get_pool()
+        row = await pool.fetchrow(
+            """
+            SELECT s.sync_token, s.horizon FROM calendar_sync_state s
+            JOIN directory_users u ON u.id = s.user_id
+            WHERE lower(u.email) = lower($1)
+            """,
+            email,
+        )
+        return (row["sync_token"], row["horizon"]) if row else (None, None)
+
+    async def apply_calendar_changes(
+        self, email: str, pieces: List[Dict[str, Any]], touched_ids: List[str],
+        sync_token: Optional[str], horizon: date, full: bool,
+    ):
+        """Replace a user's synced events and store the next sync token and horizon, in one transaction.
+
+        A full sync replaces all of the user's busy intervals; an incremental
+        one only those of the changed or cancelled events in `touched_ids`.
+        """
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                user_id = await conn.fetchval("SELECT id FROM directory_users WHERE lower(email) = lower($1)", email)
+                if user_id is None:
+                    return
+                if full:
+                    await conn.execute("DELETE FROM busy_intervals WHERE user_id = $1", user_id)
+                elif touched_ids:
+                    await conn.execute(
+                        "DELETE FROM busy_intervals WHERE user_id = $1 AND event_id = ANY($2::text[])",
+                        user_id, touched_ids,
+                    )
+                if pieces:
+                    await conn.copy_records_to_table(
+                        "busy_intervals",
+                        records=[
+                            (
+                                user_id, piece["day"], _clock(piece["start"]), _clock(piece["end"]),
+                                Range(utc_minutes_to_datetime(piece["start_utc"]), utc_minutes_to_datetime(piece["end_utc"])),
+                                piece["title"], piece["event_id"],
+                            )
+                            for piece in pieces
+                        ],
+                        columns=["user_id", "day", "starts_at", "ends_at", "during", "title", "event_id"],
+                    )
+                await conn.execute(
+                    """
+                    INSERT INTO calendar_sync_state (user_id, sync_token, horizon) VALUES ($1, $2, $3)
+                    ON CONFLICT (user_id) DO UPDATE
+                    SET sync_token = EXCLUDED.sync_token, horizon = EXCLUDED.horizon, synced_at = now()
+                    """,
+                    user_id, sync_token, horizon,
+                )
+
+    async def data_version(self) -> int:
+        """Bumped by a statement trigger whenever directory or calendar rows change"""
+        pool = await get_pool()
+        return await pool.fetchval("SELECT version FROM availability_version WHERE id = 1") or 0
+
+    async def directory_version(self) -> int:
+        """Bumped only when directory rows change"""
+        pool = await get_pool()
+        return await pool.fetchval("SELECT directory_version FROM availability_version WHERE id = 1") or 0
+
+    async def directory_entries(self) -> List[Dict[str, Any]]:
+        """Name, email and aliases of every directory user, for the fuzzy name index"""
+        pool = await get_pool()
+        rows = await pool.fetch("SELECT name, email, aliases FROM directory_users ORDER BY id")
+        return [{"name": row["name"], "email": row["email"], "aliases": list(row["aliases"])} for row in rows]
+
+    async def load_room_catalog(self) -> RoomCatalog:
+        """Room catalog built from the locations/cabins tables"""
+        pool = await get_pool()
+        rows = await pool.fetch(
+            """
+            SELECT l.name AS location, c.floor, c.cabin_id, c.capacity
+            FROM cabins c JOIN office_locations l ON l.id = c.location_id
+            ORDER BY l.id, c.floor, c.cabin_id
+            """
+        )
+        locations: Dict[str, Any] = {}
+        for row in rows:
+            floors = locations.setdefault(row["location"], {"floors": {}})["floors"]
+            floors.setdefault(f"floor_{row['floor']}", {"cabins": []})["cabins"].append(
+                {"cabin_id": row["cabin_id"], "capacity": row["capacity"]}
+            )
+        return RoomCatalog(locations)
@@ -0,0 +1,207 @@
+"""Non-conversational scheduling of many meetings at once"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from meeting_rooms import MeetingRoomManager
+from room_catalog import normalize_location
+from slot_search import MINUTES_PER_DAY, business_days, calendar_days, find_common_slots, horizon_span, resolve_date, slot_to_utc
+
+# (start, end, room or None, rendered slot)
+Candidate = Tuple[int, int, Optional[Dict[str, Any]], Dict[str, Any]]
+
+
+def _overlaps(intervals: List[Tuple[int, int]], start: int, end: int) -> bool:
+    return any(s < end and start < e for s, e in intervals)
+
+
+class BatchScheduler:
+    """Assigns non-conflicting slots (and cabins) to a batch of meeting requests.
+
+    Candidate (slot, room) options for each meeting come from the availability
+    data and the room catalog/ledger. Meetings are then placed most-constrained
+    first with depth-first backtracking under a step budget; if the budget runs
+    out, a greedy pass places whatever still fits and reports the rest.
+    """
+
+    def __init__(self, knowledge, room_manager: MeetingRoomManager):
+        self.knowledge = knowledge
+        self.room_manager = room_manager
+
+    @staticmethod
+    def _resolve_users(identifiers: List[str], directory: Dict[str, Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Look attendees up by email or name; returns (users, unknown identifiers)"""
+        users, unknown = [], []
+        for identifier in identifiers:
+            user = directory.get(identifier.strip().lower())
+            if user:
+                users.append(user)
+            else:
+                unknown.append(identifier)
+        return users, unknown
+
+    @staticmethod
+    def _window(meeting: Dict[str, Any]) -> Tuple[date, Optional[date], int]:
+        """(window start, window end or None, business days to search) of a meeting"""
+        window_start = resolve_date(meeting.get("window_start"))
+        window_end = resolve_date(meeting.get("window_end")) if meeting.get("window_end") else None
+        horizon = settings.slot_search_horizon_days
+        if window_end:
+            horizon = sum(1 for day in business_days(window_start, (window_end - window_start).days + 1) if day <= window_end)
+        return window_start, window_end, horizon
+
+    async def _candidates(self, meeting: Dict[str, Any], users: List[Dict[str, Any]]) -> Tuple[List[Candidate], Optional[str]]:
+        """Candidate options for one meeting, or a reason why there are none"""
+        window_start, window_end, horizon = self._window(meeting)
+        if horizon <= 0:
+            return [], "window contains no business days"
+
+        duration = meeting.get("duration_minutes") or settings.default_meeting_duration
+        busy = await self.knowledge.merged_busy(users, horizon_span(window_start, horizon))
+        # Room for every slot start in the window, so the search never stops after the first
+        # day(s) and the solver can pick from the whole window
+        k = horizon * MINUTES_PER_DAY // settings.slot_step_minutes
+
+        if meeting.get("format") == "in-person":
+            offices = {normalize_location(user.get("base_location") or user.get("location")) for user in users}
+            if len(offices) != 1 or not self.room_manager.catalog.has_location(offices.copy().pop()):
+                return [], "in-person meetings need all attendees in one office with meeting rooms"
+            slots = await self.room_manager.find_slots_with_rooms(
+                users, offices.pop(), window_start, duration, k=k, horizon_days=horizon, busy=busy
+            )
+            candidates = []
+            for slot in slots:
+                start, end = slot_to_utc(slot)
+                for room in slot.pop("rooms"):
+                    candidates.append((start, end, room, slot))
+        else:
+            slots = find_common_slots(users, window_start, duration, k=k, horizon_days=horizon, busy=busy)
+            candidates = [(*slot_to_utc(slot), None, slot) for slot in slots]
+
+        if window_end:
+            candidates = [c for c in candidates if date.fromisoformat(c[3]["date"]) <= window_end]
+        if not candidates:
+            return [], "no common availability in the requested window"
+        return candidates, None
+
+    def _solve(
+        self,
+        meetings: List[Dict[str, Any]],
+        attendee_emails: List[List[str]],
+        candidates: List[List[Candidate]],
+    ) -> Dict[int, Candidate]:
+        """Place meetings without attendee or room double-booking"""
+        order = sorted((i for i in range(len(meetings)) if candidates[i]), key=lambda i: len(candidates[i]))
+        busy: Dict[str, List[Tuple[int, int]]] = {}
+        rooms: Dict[str, List[Tuple[int, int]]] = {}
+        assignment: Dict[int, Candidate] = {}
+
+        def fits(i: int, candidate: Candidate) -> bool:
+            start, end, room, _ = candidate
+            if room and _overlaps(rooms.get(room["cabin_id"], []), start, end):
+                return False
+            return not any(_overlaps(busy.get(email, []), start, end) for email in attendee_emails[i])
+
+        def assign(i: int, candidate: Candidate):
+            start, end, room, _ = candidate
+            assignment[i] = candidate
+            for email in attendee_emails[i]:
+                busy.setdefault(email, []).append((start, end))
+            if room:
+                rooms.setdefault(room["cabin_id"], []).append((start, end))
+
+        def unassign(i: int):
+            start, end, room, _ = assignment.pop(i)
+            for email in attendee_emails[i]:
+                busy[email].remove((start, end))
+            if room:
+                rooms[room["cabin_id"]].remove((start, end))
+
+        budget = [settings.batch_max_backtracks]
+
+        def place(position: int) -> bool:
+            if position == len(order):
+                return True
+            i = order[position]
+            for candidate in candidates[i]:
+                if not fits(i, candidate):
+                    continue
+                assign(i, candidate)
+                if place(position + 1):
+                    return True
+                unassign(i)
+                budget[0] -= 1
+                if budget[0] <= 0:
+                    return False
+            return False
+
+        if place(0):
+            return assignment
+
+        # Budget exhausted or over-constrained: place greedily, leave the rest unscheduled
+        for i in order:
+            for candidate in candidates[i]:
+                if fits(i, candidate):
+                    assign(i, candidate)
+                    break
+        return assignment
+
+    async def schedule(self, meetings: List[Dict[str, Any]], book_rooms: bool = False) -> Dict[str, Any]:
+        """Assign slots and rooms to every meeting that can be fitted"""
+        attendee_emails: List[List[str]] = []
+        candidates: List[List[Candidate]] = []
+        reasons: Dict[int, str] = {}
+
+        # One directory lookup for the whole batch, with calendars covering every meeting's window
+        spans = [calendar_days(start, horizon) for start, _, horizon in map(self._window, meetings) if horizon > 0]
+        days = (min(first for first, _ in spans), max(last for _, last in spans)) if spans else None
+        directory = await self.knowledge.find_users(
+            [identifier for meeting in meetings for identifier in meeting.get("attendees", [])], days
+        )
+
+        for i, meeting in enumerate(meetings):
+            users, unknown = self._resolve_users(meeting.get("attendees", []), directory)
+            attendee_emails.append([user["email"].lower() for user in users])
+            if unknown:
+                candidates.append([])
+                reasons[i] = f"unknown attendees: {', '.join(unknown)}"
+                continue
+            options, reason = await self._candidates(meeting, users)
+            candidates.append(options)
+            if reason:
+                reasons[i] = reason
+
+        assignment = self._solve(meetings, attendee_emails, candidates)
+
+        results = []
+        for i, meeting in enumerate(meetings):
+            meeting_id = meeting.get("id") or str(i)
+            if i not in assignment:
+                results.append({
+                    "id": meeting_id,
+                    "status": "unscheduled",
+                    "reason": reasons.get(i, "conflicts with other meetings in the batch"),
+                })
+                continue
+
+            _, _, room, slot = assignment[i]
+            if room and book_rooms:
+                booked = await self.room_manager.book_room(room, slot, f"batch-{meeting_id}")
+                if not booked:
+                    results.append({"id": meeting_id, "status": "unscheduled", "reason": f"cabin {room['cabin_id']} was booked concurrently"})
+                    continue
+            results.append({
+                "id": meeting_id,
+                "status": "scheduled",
+                "title": meeting.get("title"),
+                "slot": {key: value for key, value in slot.items() if key != "rooms"},
+                "room": room,
+                "attendees": attendee_emails[i],
+            })
+
+        return {
+            "scheduled": sum(1 for r in results if r["status"] == "scheduled"),
+            "unscheduled": sum(1 for r in results if r["status"] == "unscheduled"),
+            "assignments": results,
+        }
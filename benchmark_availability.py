@@ -0,0 +1,172 @@
+"""Compare free-slot search over Postgres busy ranges with the in-process path.
+
+    python benchmark_availability.py [1000 10000 100000]
+
+For each directory size, synthetic users and calendars are loaded into a
+scratch schema (created from init_db.sql and dropped afterwards) of
+DATABASE_URL. Random attendee groups are then searched two ways:
+
+- sql: one query returns the group's merged busy ranges (MERGED_BUSY_SQL) and
+  only business hours are intersected in Python
+- in_process: every event of the group is fetched and merged in Python
+
+Latency percentiles, rows transferred per search and slot mismatches
+between the two paths are printed as one JSON line per size.
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import date, time as clock, timedelta
+
+import asyncpg
+from asyncpg import Range
+
+from availability_store import PostgresAvailabilityStore, fetch_merged_busy
+from config import settings
+from slot_search import (
+    OFFICE_TIMEZONES, business_days, calendar_days, find_common_slots, horizon_span, local_to_utc, utc_minutes_to_datetime,
+)
+
+SCHEMA = "availability_bench"
+DAYS = 10
+EVENTS_PER_DAY = 3
+OOO_PROBABILITY = 0.02
+ATTENDEES = 5
+QUERIES = 100
+CHUNK = 5000
+
+
+def _users(count: int, rng: random.Random):
+    zones = sorted(set(OFFICE_TIMEZONES.values()))
+    return [
+        {"id": i + 1, "name": f"User {i + 1}", "email": f"user{i + 1}@bench.example", "timezone": rng.choice(zones)}
+        for i in range(count)
+    ]
+
+
+def _calendar(users, days, rng: random.Random):
+    """(busy_intervals rows, user_absences rows) for a chunk of users"""
+    events, absences = [], []
+    for user in users:
+        for day in days:
+            if rng.random() < OOO_PROBABILITY:
+                absences.append((user["id"], day, "ooo"))
+                continue
+            for _ in range(EVENTS_PER_DAY):
+                start = rng.randrange(8 * 60, 18 * 60, 30)
+                end = start + rng.choice((30, 60))
+                during = Range(
+                    utc_minutes_to_datetime(local_to_utc(user["timezone"], day, start)),
+                    utc_minutes_to_datetime(local_to_utc(user["timezone"], day, end)),
+                )
+                events.append((user["id"], day, clock(start // 60, start % 60), clock(end // 60, end % 60), during))
+    return events, absences
+
+
+async def _load(conn, users, days, rng: random.Random) -> int:
+    loaded = 0
+    await conn.copy_records_to_table(
+        "directory_users",
+        records=[(u["id"], u["email"], u["name"], u["timezone"]) for u in users],
+        columns=["id", "email", "name", "timezone"],
+    )
+    for offset in range(0, len(users), CHUNK):
+        events, absences = _calendar(users[offset:offset + CHUNK], days, rng)
+        loaded += len(events)
+        await conn.copy_records_to_table(
+            "busy_intervals", records=events, columns=["user_id", "day", "starts_at", "ends_at", "during"]
+        )
+        await conn.copy_records_to_table("user_absences", records=absences, columns=["user_id", "day", "kind"])
+    await conn.execute("ANALYZE")
+    return loaded
+
+
+async def _in_process(conn, store, group, start_date):
+    rows = await conn.fetch(
+        "SELECT id, name, email, base_location, timezone FROM directory_users WHERE id = ANY($1::bigint[])",
+        [user["id"] for user in group],
+    )
+    users = await store._assemble(conn, rows, calendar_days(start_date, DAYS))
+    events = sum(len(slots) for user in users for slots in user["calendar_events"].values())
+    return find_common_slots(users, start_date, 30, k=5, horizon_days=DAYS, now=_now(start_date)), events
+
+
+async def _sql(conn, group, start_date):
+    busy = await fetch_merged_busy(conn, [user["email"] for user in group], horizon_span(start_date, DAYS))
+    return find_common_slots(group, start_date, 30, k=5, horizon_days=DAYS, now=_now(start_date), busy=busy), len(busy)
+
+
+def _now(start_date: date):
+    return utc_minutes_to_datetime(start_date.toordinal() * 24 * 60 - 24 * 60)
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+    }
+
+
+async def bench(conn, size: int) -> dict:
+    rng = random.Random(size)
+    start_date = date.today() + timedelta(days=7 - date.today().weekday())
+    days = list(business_days(start_date, DAYS))
+    users = _users(size, rng)
+
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    await conn.execute(f"SET search_path TO {SCHEMA}, public")
+    with open("init_db.sql", "r") as file:
+        await conn.execute(file.read())
+
+    started = time.perf_counter()
+    events = await _load(conn, users, days, rng)
+    load_seconds = time.perf_counter() - started
+
+    store = PostgresAvailabilityStore()
+    timings = {"sql": [], "in_process": []}
+    rows = {"sql": 0, "in_process": 0}
+    mismatches = 0
+    for _ in range(QUERIES):
+        group = rng.sample(users, ATTENDEES)
+
+        started = time.perf_counter()
+        sql_slots, busy_rows = await _sql(conn, group, start_date)
+        timings["sql"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        local_slots, event_rows = await _in_process(conn, store, group, start_date)
+        timings["in_process"].append(time.perf_counter() - started)
+
+        rows["sql"] += busy_rows
+        rows["in_process"] += event_rows
+        if [s["start_utc"] for s in sql_slots] != [s["start_utc"] for s in local_slots]:
+            mismatches += 1
+
+    await conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    await conn.execute("RESET search_path")
+
+    return {
+        "users": size,
+        "busy_intervals": events,
+        "load_seconds": round(load_seconds, 2),
+        **{path: {**_percentiles(samples), "rows_per_search": rows[path] / QUERIES} for path, samples in timings.items()},
+        "mismatches": mismatches,
+    }
+
+
+async def main(sizes):
+    conn = await asyncpg.connect(settings.database_url)
+    try:
+        for size in sizes:
+            print(json.dumps(await bench(conn, size)))
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]))
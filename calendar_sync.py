@@ -0,0 +1,333 @@
+"""Incremental free/busy sync from Google Calendar into the availability index"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from config import settings
+from slot_search import MINUTES_PER_DAY, datetime_to_utc_minutes, local_to_utc, to_hhmm, user_timezone, utc_to_local
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ["https://www.googleapis.com/auth/calendar.readonly"]
+
+
+class CalendarAPIError(RuntimeError):
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"Calendar API {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class SyncTokenExpired(CalendarAPIError):
+    """410 Gone: the sync token is no longer valid and a full sync is needed"""
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+class GoogleCalendarClient:
+    """Minimal async Calendar API v3 client for incremental event listing.
+
+    The base URL can point at a local fake server; requests are only
+    authenticated when the service account key file exists.
+    """
+
+    def __init__(self, base_url: str, service_account_file: Optional[str] = None, subject: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.http = httpx.AsyncClient(timeout=settings.calendar_request_timeout_seconds)
+        self.credentials = None
+        if service_account_file and os.path.exists(service_account_file):
+            from google.oauth2 import service_account
+
+            self.credentials = service_account.Credentials.from_service_account_file(service_account_file, scopes=SCOPES)
+            if subject:
+                self.credentials = self.credentials.with_subject(subject)
+
+    async def _headers(self) -> Dict[str, str]:
+        if self.credentials is None:
+            return {}
+        if not self.credentials.valid:
+            from google.auth.transport.requests import Request
+
+            await asyncio.to_thread(self.credentials.refresh, Request())
+        return {"Authorization": f"Bearer {self.credentials.token}"}
+
+    async def list_changes(self, calendar_id: str, sync_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Every event changed since `sync_token` (all upcoming events without one) and the next token"""
+        params: Dict[str, Any] = {"singleEvents": "true", "showDeleted": "true", "maxResults": 2500}
+        if sync_token:
+            params["syncToken"] = sync_token
+        else:
+            lookback = datetime.now(timezone.utc) - timedelta(days=settings.calendar_sync_lookback_days)
+            params["timeMin"] = lookback.isoformat()
+
+        events: List[Dict[str, Any]] = []
+        while True:
+            response = await self.http.get(
+                f"{self.base_url}/calendars/{calendar_id}/events", params=params, headers=await self._headers()
+            )
+            if response.status_code == 410:
+                raise SyncTokenExpired(410, "sync token expired")
+            if response.status_code >= 400:
+                raise CalendarAPIError(response.status_code, response.text[:200], _retry_after(response))
+
+            page = response.json()
+            events.extend(page.get("items", []))
+            if page.get("nextPageToken"):
+                params["pageToken"] = page["nextPageToken"]
+                continue
+            return events, page.get("nextSyncToken")
+
+    async def close(self):
+        await self.http.aclose()
+
+
+def _utc_minutes(moment: Dict[str, str], zone: str) -> int:
+    """Event start/end as UTC minutes; all-day dates are midnight in the user's zone"""
+    if moment.get("dateTime"):
+        return datetime_to_utc_minutes(datetime.fromisoformat(moment["dateTime"]))
+    return local_to_utc(zone, date.fromisoformat(moment["date"]), 0)
+
+
+def busy_pieces(event: Dict[str, Any], zone: str) -> List[Dict[str, Any]]:
+    """Split an opaque event into per-local-day busy pieces in the user's zone"""
+    if event.get("status") == "cancelled" or event.get("transparency") == "transparent":
+        return []
+    if not event.get("start") or not event.get("end"):
+        return []
+
+    start = _utc_minutes(event["start"], zone)
+    end = _utc_minutes(event["end"], zone)
+    pieces = []
+    while start < end:
+        day, local_start = utc_to_local(zone, start)
+        day_end = local_to_utc(zone, day + timedelta(days=1), 0)
+        piece_end = min(end, day_end)
+        pieces.append({
+            "event_id": event["id"],
+            "title": event.get("summary") or "Busy",
+            "day": day,
+            "start": local_start,
+            "end": min(local_start + (piece_end - start), MINUTES_PER_DAY),
+            "start_utc": start,
+            "end_utc": piece_end,
+        })
+        start = piece_end
+    return pieces
+
+
+class FileCalendarIndex:
+    """Writes synced events into the availability JSON file; sync state lives next to it in <file>.sync.json"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state_path = f"{path}.sync.json"
+        self._state: Optional[Dict[str, Dict[str, Optional[str]]]] = None
+        self._lock = asyncio.Lock()
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"users": [], "locations": {}}
+
+    def _write(self, data: Dict[str, Any], path: Optional[str] = None):
+        """Atomic replace, so readers never see a half-written file"""
+        path = path or self.path
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(data, file, indent=2)
+        os.replace(temporary, path)
+
+    def _load_state(self) -> Dict[str, Dict[str, Optional[str]]]:
+        if self._state is None:
+            try:
+                with open(self.state_path, "r") as file:
+                    self._state = json.load(file)
+            except (FileNotFoundError, ValueError):
+                self._state = {}
+        return self._state
+
+    async def calendar_users(self) -> List[Dict[str, Any]]:
+        return (await asyncio.to_thread(self._read)).get("users", [])
+
+    async def sync_state(self, email: str) -> Tuple[Optional[str], Optional[date]]:
+        """Stored sync token and the horizon day it was synced up to"""
+        state = self._load_state().get(email.lower()) or {}
+        horizon = state.get("horizon")
+        return state.get("sync_token"), date.fromisoformat(horizon) if horizon else None
+
+    def _apply(self, email: str, pieces: List[Dict[str, Any]], touched_ids: List[str], full: bool) -> bool:
+        data = self._read()
+        user = next((u for u in data.get("users", []) if u["email"].lower() == email.lower()), None)
+        if user is None:
+            return False
+
+        touched = set(touched_ids)
+        calendar = {}
+        if not full:
+            for day, events in (user.get("calendar_events") or {}).items():
+                kept = [event for event in events if event.get("event_id") not in touched]
+                if kept:
+                    calendar[day] = kept
+        for piece in pieces:
+            calendar.setdefault(piece["day"].isoformat(), []).append({
+                "slot": f"{to_hhmm(piece['start'])}-{to_hhmm(piece['end'])}",
+                "title": piece["title"],
+                "event_id": piece["event_id"],
+            })
+        for events in calendar.values():
+            events.sort(key=lambda event: event["slot"])
+        user["calendar_events"] = dict(sorted(calendar.items()))
+        self._write(data)
+        return True
+
+    async def apply_calendar_changes(
+        self, email: str, pieces: List[Dict[str, Any]], touched_ids: List[str],
+        sync_token: Optional[str], horizon: date, full: bool,
+    ):
+        async with self._lock:
+            if await asyncio.to_thread(self._apply, email, pieces, touched_ids, full):
+                state = self._load_state()
+                state[email.lower()] = {"sync_token": sync_token, "horizon": horizon.isoformat()}
+                await asyncio.to_thread(self._write, dict(state), self.state_path)
+
+
+class CalendarSync:
+    """Polls attendee calendars with incremental sync tokens and updates the availability index.
+
+    The first sync of a user lists their upcoming events; later polls only
+    fetch events changed since the stored token, and an expired token (410)
+    triggers a full resync. Only events starting before the horizon
+    (calendar_sync_horizon_days ahead) are stored, so the token is dropped
+    and the user fully resynced once the horizon has moved to a later day;
+    otherwise events that entered the horizon would never be fetched. Cancelled events are removed. Transparent ("free")
+    events are ignored. A user whose sync fails is retried with exponential
+    backoff (or after Retry-After), without delaying the others.
+    """
+
+    def __init__(self, client: GoogleCalendarClient, index, interval_seconds: float, concurrency: int):
+        self.client = client
+        self.index = index
+        self.interval_seconds = interval_seconds
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._failures: Dict[str, int] = {}
+        self._next_attempt: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"polls": 0, "synced": 0, "full_syncs": 0, "horizon_resyncs": 0, "events_changed": 0, "failures": 0}
+
+    def _backoff(self, email: str, error: Exception):
+        failures = self._failures.get(email, 0) + 1
+        self._failures[email] = failures
+        delay = min(settings.calendar_sync_backoff_base_seconds * 2 ** (failures - 1), settings.calendar_sync_backoff_max_seconds)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self._next_attempt[email] = time.monotonic() + delay * random.uniform(1.0, 1.25)
+        self.stats["failures"] += 1
+        logger.warning(f"Calendar sync for {email} failed ({error}); retrying in {delay:.0f}s")
+
+    async def sync_user(self, user: Dict[str, Any]):
+        """Fetch one user's changed events and apply them to the index"""
+        email = user["email"]
+        zone = user_timezone(user)
+        horizon_day = (datetime.now(timezone.utc) + timedelta(days=settings.calendar_sync_horizon_days)).date()
+        token, synced_horizon = await self.index.sync_state(email)
+        if token is not None and synced_horizon != horizon_day:
+            token = None
+            self.stats["horizon_resyncs"] += 1
+        try:
+            events, next_token = await self.client.list_changes(email, token)
+        except SyncTokenExpired:
+            token = None
+            events, next_token = await self.client.list_changes(email)
+
+        horizon = datetime_to_utc_minutes(datetime.combine(horizon_day, datetime.min.time(), timezone.utc))
+        pieces = [piece for event in events for piece in busy_pieces(event, zone) if piece["start_utc"] < horizon]
+        await self.index.apply_calendar_changes(
+            email, pieces, [event["id"] for event in events], next_token, horizon_day, full=token is None
+        )
+
+        self.stats["synced"] += 1
+        self.stats["events_changed"] += len(events)
+        if token is None:
+            self.stats["full_syncs"] += 1
+
+    async def _sync_guarded(self, user: Dict[str, Any]):
+        email = user["email"]
+        async with self._semaphore:
+            try:
+                await self.sync_user(user)
+            except Exception as e:
+                self._backoff(email, e)
+                return
+        self._failures.pop(email, None)
+        self._next_attempt.pop(email, None)
+
+    async def poll_once(self):
+        """Sync every user that is not backing off"""
+        self.stats["polls"] += 1
+        now = time.monotonic()
+        users = [
+            user for user in await self.index.calendar_users()
+            if self._next_attempt.get(user["email"], 0) <= now
+        ]
+        await asyncio.gather(*(self._sync_guarded(user) for user in users))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception:
+                logger.exception("Calendar sync poll failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start polling in the background (called from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.client.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "backing_off": len(self._next_attempt)}
+
+
+def create_calendar_sync() -> CalendarSync:
+    """Sync writing to the configured availability backend"""
+    if settings.availability_backend == "postgres":
+        from availability_store import PostgresAvailabilityStore
+
+        index = PostgresAvailabilityStore()
+    else:
+        index = FileCalendarIndex(settings.availability_file)
+
+    client = GoogleCalendarClient(
+        settings.calendar_api_base_url, settings.service_account_file, settings.calendar_sync_subject or None
+    )
+    return CalendarSync(
+        client, index,
+        interval_seconds=settings.calendar_sync_interval_seconds,
+        concurrency=settings.calendar_sync_concurrency,
+    )
@@ -0,0 +1,91 @@
+"""Check that a recorded conversation still replays after the clock has moved.
+
+    python check_llm_replay.py [shift_seconds]
+
+A stateless scheduling run is recorded against a stub model into a scratch
+cassette. The prompt clock (datetime in nodes.py and prompts.py) is then
+shifted by `shift_seconds` (default 61) and the same conversation is
+replayed from the cassette. The check fails if replay cannot find a
+recording or produces a different response.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from langchain_core.messages import AIMessage
+
+import nodes
+import prompts
+from agents import scheduler_agent
+from components import build_components
+from llm_transport import LLMTransport
+
+MESSAGE = "Set up a 30 minute virtual sync with shubham and jasnain tomorrow"
+ANSWERS = {"slot_preference": "first", "format": "virtual", "agenda": "Weekly sync"}
+
+
+class StubLLM:
+    """Deterministic answers for each prompt the graph sends"""
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        text = prompt if isinstance(prompt, str) else " ".join(str(m.content) for m in prompt)
+        if "Extract meeting details" in text:
+            return AIMessage(content=json.dumps({
+                "attendee_names": ["shubham", "jasnain"], "requested_date": "tomorrow", "requested_time": None,
+                "duration_minutes": 30, "urgency": "normal", "meeting_format": "virtual", "recurrence": None,
+            }))
+        if "intelligent meeting scheduler" in text:
+            return AIMessage(content=json.dumps({
+                "status": "no_availability", "available_slots": [], "response_message": "none", "target_date": None,
+            }))
+        if "presented with the following time slots" in text:
+            return AIMessage(content=json.dumps({"action": "select_slot", "slot_number": 1, "confidence": 0.9}))
+        return AIMessage(content="Weekly Sync")
+
+
+def shift_clock(seconds: float):
+    """Make datetime.now()/today() in the prompt builders run `seconds` ahead"""
+    offset = timedelta(seconds=seconds)
+
+    class ShiftedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + offset
+
+        @classmethod
+        def today(cls):
+            return datetime.today() + offset
+
+    nodes.datetime = ShiftedDatetime
+    prompts.datetime = ShiftedDatetime
+
+
+async def run(transport: LLMTransport, session_id: str) -> dict:
+    await scheduler_agent.initialize(build_components(llm=transport))
+    return await scheduler_agent.run_stateless(MESSAGE, session_id, "check_user", "Check", ANSWERS)
+
+
+async def main(shift_seconds: float) -> int:
+    cassette = os.path.join(tempfile.mkdtemp(), "cassette.jsonl")
+
+    recorded = await run(LLMTransport(StubLLM(), mode="record", cassette_path=cassette), "record")
+    shift_clock(shift_seconds)
+    try:
+        replayed = await run(LLMTransport(mode="replay", cassette_path=cassette, replay_latency_ms=0), "replay")
+    except LookupError as e:
+        print(f"FAIL: replay after a {shift_seconds:g}s clock shift: {e}")
+        return 1
+
+    if replayed["response"] != recorded["response"]:
+        print(f"FAIL: replayed response differs after a {shift_seconds:g}s clock shift")
+        return 1
+    print(f"OK: conversation replayed after a {shift_seconds:g}s clock shift ({recorded['status']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 61)))
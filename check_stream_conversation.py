@@ -0,0 +1,68 @@
+"""Check graph steps and checkpoint operations per turn of the WebSocket streaming loop.
+
+    python check_stream_conversation.py
+
+A stub-model conversation is driven through
+MeetingSchedulerAgent.stream_conversation by the scripted client from
+replay_conversations.py, on a counting checkpointer. Each turn (the
+initial message, then one answer per question) must run exactly the
+expected graph steps with a single checkpoint read, and write one
+checkpoint per step (plus the input checkpoints of the first run). Extra
+invoke/get_state round trips between turns would show up here.
+"""
+
+import asyncio
+import sys
+
+from agents import scheduler_agent
+from check_llm_replay import MESSAGE, StubLLM
+from components import build_components
+from graph import create_graph
+from llm_transport import LLMTransport
+from replay_conversations import CountingSaver, ScriptedWebSocket
+
+ANSWERS = ["1", "Weekly sync", "virtual", "cancel"]
+# Nodes completed per turn: parse_request + check_availability, then one resumed
+# interrupt node each (agenda input is followed by determine_format)
+EXPECTED_STEPS = [2, 1, 2, 1, 1]
+EXPECTED_QUESTIONS = ["time_selection", "agenda_input", "format_selection", "confirmation"]
+
+
+async def main() -> int:
+    saver = CountingSaver()
+    await scheduler_agent.initialize(build_components(llm=LLMTransport(StubLLM())))
+    scheduler_agent.graph = await create_graph(checkpointer=saver)
+
+    websocket = ScriptedWebSocket(ANSWERS, saver)
+    state = scheduler_agent.build_initial_state(MESSAGE, "check-stream", "check_user", "Check")
+    await scheduler_agent.stream_conversation(websocket, "check-stream", state)
+    websocket.end_turn()
+
+    failures = []
+    questions = [message.get("context") for message in websocket.sent if message.get("type") == "question"]
+    if questions != EXPECTED_QUESTIONS:
+        failures.append(f"questions {questions} != {EXPECTED_QUESTIONS}")
+    steps = [turn["steps"] for turn in websocket.turns]
+    if steps != EXPECTED_STEPS:
+        failures.append(f"steps per turn {steps} != {EXPECTED_STEPS}")
+
+    last = len(websocket.turns) - 1
+    for number, turn in enumerate(websocket.turns):
+        # One read when astream starts; the final turn also reads the end state once
+        reads = 2 if number == last else 1
+        # The first run also checkpoints the input before its first step
+        puts = turn["steps"] + (2 if number == 0 else 0)
+        if turn["checkpoint_reads"] != reads:
+            failures.append(f"turn {number}: {turn['checkpoint_reads']} checkpoint reads, expected {reads}")
+        if turn["checkpoint_puts"] != puts:
+            failures.append(f"turn {number}: {turn['checkpoint_puts']} checkpoint puts, expected {puts}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: {len(websocket.turns)} turns, steps {steps}, puts {[t['checkpoint_puts'] for t in websocket.turns]}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
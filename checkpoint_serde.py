@@ -0,0 +1,130 @@
+"""Compact ormsgpack checkpoint serializer for the scheduling state"""
+
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Tuple
+
+import ormsgpack
+from langchain_core.messages import BaseMessage, messages_from_dict
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from config import settings
+from state import CompactSlot
+
+# msgpack extension codes
+EXT_SLOT = 1
+EXT_DATETIME = 2
+EXT_AWARE_DATETIME = 3
+EXT_DATE = 4
+EXT_MESSAGE = 5
+EXT_TUPLE = 6
+EXT_SET = 7
+
+_OPTIONS = ormsgpack.OPT_NON_STR_KEYS
+_EPOCH = datetime.min
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class _Unsupported(Exception):
+    """A value the compact format does not cover; the whole value goes to the fallback"""
+
+
+def _ext(code: int, payload: Any) -> ormsgpack.Ext:
+    return ormsgpack.Ext(code, ormsgpack.packb(payload, option=_OPTIONS))
+
+
+def _encode(obj: Any) -> Any:
+    if obj is None or isinstance(obj, (str, bool, int, float, bytes)):
+        return obj
+    if isinstance(obj, dict):
+        slot = CompactSlot.from_slot(obj)
+        if slot is not None:
+            rest = {k: _encode(v) for k, v in obj.items() if k not in ("date", "start_time", "end_time")}
+            return _ext(EXT_SLOT, [slot.day, slot.start, slot.end, rest])
+        return {k: _encode(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_encode(v) for v in obj]
+    if isinstance(obj, BaseMessage):
+        return _ext(EXT_MESSAGE, [obj.type, _encode(obj.model_dump(exclude_defaults=True))])
+    if isinstance(obj, datetime):
+        if obj.tzinfo is not None:
+            return _ext(EXT_AWARE_DATETIME, obj.isoformat())
+        return _ext(EXT_DATETIME, (obj - _EPOCH) // _MICROSECOND)
+    if isinstance(obj, date):
+        return _ext(EXT_DATE, obj.toordinal())
+    if isinstance(obj, tuple):
+        return _ext(EXT_TUPLE, [_encode(v) for v in obj])
+    if isinstance(obj, (set, frozenset)):
+        return _ext(EXT_SET, [_encode(v) for v in obj])
+    raise _Unsupported(type(obj).__name__)
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    payload = ormsgpack.unpackb(data, ext_hook=_ext_hook, option=_OPTIONS)
+    if code == EXT_SLOT:
+        day, start, end, rest = payload
+        slot_date, start_time, end_time = CompactSlot(day, start, end).fields()
+        return {"date": slot_date, "start_time": start_time, "end_time": end_time, **rest}
+    if code == EXT_MESSAGE:
+        message_type, data = payload
+        return messages_from_dict([{"type": message_type, "data": data}])[0]
+    if code == EXT_DATETIME:
+        return _EPOCH + payload * _MICROSECOND
+    if code == EXT_AWARE_DATETIME:
+        return datetime.fromisoformat(payload)
+    if code == EXT_DATE:
+        return date.fromordinal(payload)
+    if code == EXT_TUPLE:
+        return tuple(payload)
+    if code == EXT_SET:
+        return set(payload)
+    raise ValueError(f"Unknown checkpoint extension code {code}")
+
+
+class CompactSerializer:
+    """Checkpoint serializer that packs slots as integer minutes and messages as (type, fields).
+
+    TimeSlot dicts become (day ordinal, start minute, end minute, other fields),
+    naive datetimes become microsecond counts, and messages drop default-valued
+    fields. Values holding anything else (interrupts, commands, pydantic models)
+    are handed to LangGraph's JsonPlusSerializer unchanged.
+    """
+
+    type_name = "compact"
+
+    def __init__(self):
+        self.fallback = JsonPlusSerializer()
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if obj is None or isinstance(obj, (bytes, bytearray)):
+            return self.fallback.dumps_typed(obj)
+        try:
+            return self.type_name, ormsgpack.packb(_encode(obj), option=_OPTIONS)
+        except (_Unsupported, ormsgpack.MsgpackEncodeError):
+            return self.fallback.dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_name, payload = data
+        if type_name == self.type_name:
+            return ormsgpack.unpackb(payload, ext_hook=_ext_hook, option=_OPTIONS)
+        return self.fallback.loads_typed(data)
+
+
+def create_serializer():
+    """Serializer configured in settings ("compact" or "default")"""
+    return CompactSerializer() if settings.checkpoint_serializer == "compact" else JsonPlusSerializer()
+
+
+def measure(serializer, values: Dict[str, Any]) -> Dict[str, float]:
+    """Bytes and serialize/deserialize time of one state snapshot, channel by channel"""
+    started = time.perf_counter()
+    blobs = [serializer.dumps_typed(value) for value in values.values()]
+    serialized = time.perf_counter()
+    for blob in blobs:
+        serializer.loads_typed(blob)
+    finished = time.perf_counter()
+    return {
+        "bytes": sum(len(payload) for _, payload in blobs),
+        "serialize_ms": (serialized - started) * 1000,
+        "deserialize_ms": (finished - serialized) * 1000,
+    }
@@ -0,0 +1,77 @@
+"""Process-wide container for the shared resources: LLM transport, knowledge base, rooms and background services"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+from config import settings
+from knowledge import AvailabilityKnowledge
+from llm_client import get_shared_llm
+from llm_transport import LLMTransport, create_llm_transport
+from meeting_rooms import MeetingRoomManager
+from room_catalog import RoomCatalog, get_room_catalog
+from session_reaper import SessionReaper, create_session_reaper
+from singleflight import SingleFlight
+from slot_snapshots import SlotSnapshots, create_slot_snapshots
+
+
+@dataclass
+class Components:
+    """Resources built once per process and shared by the API, the agent and graph nodes.
+
+    The graph receives the container as its run context (context_schema), so
+    a test can run the graph with fakes by passing its own container.
+    """
+    llm: LLMTransport
+    knowledge: AvailabilityKnowledge
+    room_manager: MeetingRoomManager
+    # Identical slot searches (same attendees, window and data) share one computation
+    availability_flight: SingleFlight
+    slot_snapshots: SlotSnapshots
+    session_reaper: SessionReaper
+    # None follows the process-wide catalog (availability file, or Postgres once the knowledge base loaded it)
+    room_catalog: Optional[RoomCatalog] = None
+    _initialized: bool = field(default=False, repr=False)
+
+    @property
+    def catalog(self) -> RoomCatalog:
+        return self.room_catalog or get_room_catalog()
+
+    async def initialize(self):
+        """Load the knowledge base; later calls are no-ops"""
+        if not self._initialized:
+            await self.knowledge.initialize()
+            self._initialized = True
+
+
+def build_components(**overrides) -> Components:
+    """A new container; keyword arguments (llm=..., knowledge=..., room_catalog=...) replace individual components.
+
+    A replaced room_catalog is also used by the default room manager.
+    """
+    factories = {
+        "llm": lambda: create_llm_transport(get_shared_llm),
+        "knowledge": AvailabilityKnowledge,
+        "room_manager": lambda: MeetingRoomManager(overrides.get("room_catalog")),
+        "availability_flight": lambda: SingleFlight(ttl=settings.availability_cache_ttl_seconds),
+        "slot_snapshots": create_slot_snapshots,
+        "session_reaper": create_session_reaper,
+        "room_catalog": lambda: None,
+    }
+    return Components(**{name: overrides[name] if name in overrides else factory() for name, factory in factories.items()})
+
+
+_components: Optional[Components] = None
+
+
+def get_components() -> Components:
+    """Process-wide container; built on first use unless set_components() replaced it"""
+    global _components
+    if _components is None:
+        _components = build_components()
+    return _components
+
+
+def set_components(components: Components):
+    """Replace the process-wide container (e.g. with fakes in tests)"""
+    global _components
+    _components = components
@@ -13,14 +13,59 @@ class Settings(BaseSettings):
     # OpenAI
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4o")
-    
+    llm_requests_per_minute: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+    llm_tokens_per_minute: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "30000"))
+    llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    llm_backoff_base_seconds: float = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1.0"))
+    llm_backoff_max_seconds: float = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+    llm_max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    llm_request_timeout_seconds: float = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "60"))
+
+    # LLM record/replay ("live", "record" or "replay")
+    llm_transport_mode: str = os.getenv("LLM_TRANSPORT_MODE", "live")
+    llm_cassette_path: str = os.getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl")
+    llm_replay_latency_scale: float = float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "1.0"))
+    llm_replay_latency_ms: Optional[int] = int(os.getenv("LLM_REPLAY_LATENCY_MS")) if os.getenv("LLM_REPLAY_LATENCY_MS") else None
+
     # Google
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
     service_account_file: str = os.getenv("SERVICE_ACCOUNT_FILE", "Backend/service_account_key.json")
+    availability_file: str = os.getenv("AVAILABILITY_FILE", "Backend/users_availability.json")
+    calendar_sync_enabled: bool = os.getenv("CALENDAR_SYNC_ENABLED", "false").lower() == "true"
+    calendar_api_base_url: str = os.getenv("CALENDAR_API_BASE_URL", "https://www.googleapis.com/calendar/v3")
+    calendar_sync_subject: str = os.getenv("CALENDAR_SYNC_SUBJECT", "")  # user to impersonate (domain-wide delegation)
+    calendar_sync_interval_seconds: float = float(os.getenv("CALENDAR_SYNC_INTERVAL_SECONDS", "300"))
+    calendar_sync_concurrency: int = int(os.getenv("CALENDAR_SYNC_CONCURRENCY", "4"))
+    calendar_sync_backoff_base_seconds: float = float(os.getenv("CALENDAR_SYNC_BACKOFF_BASE_SECONDS", "60"))
+    calendar_sync_backoff_max_seconds: float = float(os.getenv("CALENDAR_SYNC_BACKOFF_MAX_SECONDS", "3600"))
+    calendar_sync_lookback_days: int = int(os.getenv("CALENDAR_SYNC_LOOKBACK_DAYS", "1"))
+    calendar_sync_horizon_days: int = int(os.getenv("CALENDAR_SYNC_HORIZON_DAYS", "90"))
+    calendar_request_timeout_seconds: float = float(os.getenv("CALENDAR_REQUEST_TIMEOUT_SECONDS", "30"))
     
     # Database
     database_url: str = os.getenv("DATABASE_URL", "postgresql://localhost/meeting_scheduler")
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    db_pool_min_size: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    db_pool_max_size: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    room_ledger_backend: str = os.getenv("ROOM_LEDGER_BACKEND", "memory")  # "memory" or "postgres"
+    availability_backend: str = os.getenv("AVAILABILITY_BACKEND", "file")  # "file" or "postgres"
+    knowledge_search_mode: str = os.getenv("KNOWLEDGE_SEARCH_MODE", "hybrid")  # "hybrid" or "vector"
+    knowledge_vector_search: bool = os.getenv("KNOWLEDGE_VECTOR_SEARCH", "false").lower() == "true"  # pgvector + Gemini embeddings
+    query_embedding_cache_size: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+    name_match_min_score: float = float(os.getenv("NAME_MATCH_MIN_SCORE", "0.45"))  # trigram Dice coefficient
+    autocomplete_max_results: int = int(os.getenv("AUTOCOMPLETE_MAX_RESULTS", "10"))
+    name_match_margin: float = float(os.getenv("NAME_MATCH_MARGIN", "0.08"))  # closer runner-up asks the user
+    checkpoint_serializer: str = os.getenv("CHECKPOINT_SERIALIZER", "compact")  # "compact" or "default"
+
+    # Admission control (per process)
+    admission_max_nodes: int = int(os.getenv("ADMISSION_MAX_NODES", "16"))
+    admission_max_llm_calls: int = int(os.getenv("ADMISSION_MAX_LLM_CALLS", "8"))
+    admission_max_queue: int = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+    admission_queue_timeout_seconds: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+
+    # Idle session eviction
+    session_idle_ttl_seconds: float = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "7200"))
+    session_reap_interval_seconds: float = float(os.getenv("SESSION_REAP_INTERVAL_SECONDS", "60"))
     
     # Email
     smtp_email: str = os.getenv("SMTP_EMAIL", "")
@@ -39,8 +84,25 @@ class Settings(BaseSettings):
     # Business Logic
     business_hours_start: int = 8
     business_hours_end: int = 17
+    default_timezone: str = os.getenv("DEFAULT_TIMEZONE", "UTC")
     default_meeting_duration: int = 60
     max_attendees: int = 20
+    preferred_hours_start: int = 9
+    preferred_hours_end: int = 17
+    slot_step_minutes: int = 30
+    slot_suggestions_k: int = int(os.getenv("SLOT_SUGGESTIONS_K", "3"))
+    availability_cache_ttl_seconds: float = float(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", "30"))
+    slot_snapshot_min_meetings: int = int(os.getenv("SLOT_SNAPSHOT_MIN_MEETINGS", "3"))
+    slot_snapshot_max_groups: int = int(os.getenv("SLOT_SNAPSHOT_MAX_GROUPS", "200"))
+    slot_snapshot_horizon_days: int = int(os.getenv("SLOT_SNAPSHOT_HORIZON_DAYS", "5"))  # business days
+    slot_snapshot_refresh_hour: int = int(os.getenv("SLOT_SNAPSHOT_REFRESH_HOUR", "6"))
+    slot_snapshot_check_interval_seconds: float = float(os.getenv("SLOT_SNAPSHOT_CHECK_INTERVAL_SECONDS", "60"))
+    slot_search_horizon_days: int = int(os.getenv("SLOT_SEARCH_HORIZON_DAYS", "10"))  # business days
+    recurrence_horizon_days: int = int(os.getenv("RECURRENCE_HORIZON_DAYS", "90"))
+    recurrence_max_occurrences: int = int(os.getenv("RECURRENCE_MAX_OCCURRENCES", "100"))
+    stateless_max_interrupts: int = int(os.getenv("STATELESS_MAX_INTERRUPTS", "12"))
+    batch_max_meetings: int = int(os.getenv("BATCH_MAX_MEETINGS", "200"))
+    batch_max_backtracks: int = int(os.getenv("BATCH_MAX_BACKTRACKS", "5000"))
     
     class Config:
         env_file = ".env"
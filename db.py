@@ -0,0 +1,36 @@
+"""Shared asyncpg connection pool"""
+
+import asyncio
+from typing import Optional
+
+import asyncpg
+
+from config import settings
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_pool() -> asyncpg.Pool:
+    """Return the process-wide pool, creating it on first use.
+
+    Concurrent first callers wait on a lock, so only one pool is ever created.
+    """
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await asyncpg.create_pool(
+                    dsn=settings.database_url,
+                    min_size=settings.db_pool_min_size,
+                    max_size=settings.db_pool_max_size,
+                )
+    return _pool
+
+
+async def close_pool():
+    """Close the pool (called on application shutdown)"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,135 @@
+"""Local stand-in for the Google Calendar events.list API, for exercising calendar_sync.py.
+
+    python fake_calendar_server.py [users_availability.json] [port]
+    CALENDAR_SYNC_ENABLED=true CALENDAR_API_BASE_URL=http://localhost:8090 python api.py
+
+Calendars are seeded from the availability file. events.list supports
+syncToken, pageToken, maxResults and showDeleted like the real API, and the
+control endpoints below change events or inject failures:
+
+    PUT    /calendars/{calendar_id}/events/{event_id}   create or update an event (JSON body)
+    DELETE /calendars/{calendar_id}/events/{event_id}   cancel an event
+    POST   /control/expire-tokens                       make every issued sync token return 410
+    POST   /control/fail/{calendar_id}?status=429&times=1&retry_after=5
+"""
+
+import json
+import sys
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import Body, FastAPI
+from fastapi.responses import JSONResponse
+
+from slot_search import local_to_utc, to_minutes, user_timezone, utc_minutes_to_iso
+
+app = FastAPI(title="Fake Google Calendar")
+
+# calendar_id -> event_id -> event; every change gets the next sequence number
+calendars: Dict[str, Dict[str, Dict[str, Any]]] = {}
+sequence = 0
+oldest_valid_token = 0
+failures: Dict[str, Dict[str, Any]] = {}
+
+
+def _change(calendar_id: str, event: Dict[str, Any]):
+    global sequence
+    sequence += 1
+    calendars.setdefault(calendar_id.lower(), {})[event["id"]] = {**event, "_seq": sequence}
+
+
+def seed(path: str):
+    with open(path, "r") as file:
+        users = json.load(file).get("users", [])
+    for user in users:
+        zone = user_timezone(user)
+        for day, events in (user.get("calendar_events") or {}).items():
+            for event in events:
+                start, end = (local_to_utc(zone, date.fromisoformat(day), to_minutes(part)) for part in event["slot"].split("-"))
+                _change(user["email"], {
+                    "id": event["event_id"],
+                    "status": "confirmed",
+                    "summary": event.get("title"),
+                    "start": {"dateTime": utc_minutes_to_iso(start)},
+                    "end": {"dateTime": utc_minutes_to_iso(end)},
+                })
+
+
+def _public(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in event.items() if not key.startswith("_")}
+
+
+@app.get("/calendars/{calendar_id}/events")
+async def list_events(
+    calendar_id: str,
+    syncToken: Optional[str] = None,
+    pageToken: Optional[str] = None,
+    maxResults: int = 250,
+    showDeleted: bool = False,
+    timeMin: Optional[str] = None,
+):
+    failure = failures.get(calendar_id.lower())
+    if failure and failure["times"] > 0:
+        failure["times"] -= 1
+        headers = {"Retry-After": str(failure["retry_after"])} if failure.get("retry_after") else {}
+        return JSONResponse({"error": {"code": failure["status"], "message": "injected failure"}}, failure["status"], headers)
+
+    if pageToken:
+        offset, since, snapshot = (int(part) for part in pageToken.split(":"))
+    else:
+        offset, snapshot = 0, sequence
+        since = int(syncToken) if syncToken else 0
+    if syncToken and since < oldest_valid_token:
+        return JSONResponse({"error": {"code": 410, "message": "Sync token is no longer valid"}}, 410)
+
+    events: List[Dict[str, Any]] = sorted(
+        (e for e in calendars.get(calendar_id.lower(), {}).values() if since < e["_seq"] <= snapshot),
+        key=lambda e: e["_seq"],
+    )
+    if since == 0 and timeMin:
+        cutoff = datetime.fromisoformat(timeMin)
+        events = [e for e in events if "dateTime" not in e.get("end", {}) or datetime.fromisoformat(e["end"]["dateTime"]) > cutoff]
+    if not (showDeleted or syncToken or since):
+        events = [e for e in events if e.get("status") != "cancelled"]
+
+    page = events[offset:offset + maxResults]
+    body: Dict[str, Any] = {"kind": "calendar#events", "items": [_public(e) for e in page]}
+    if offset + maxResults < len(events):
+        body["nextPageToken"] = f"{offset + maxResults}:{since}:{snapshot}"
+    else:
+        body["nextSyncToken"] = str(snapshot)
+    return body
+
+
+@app.put("/calendars/{calendar_id}/events/{event_id}")
+async def put_event(calendar_id: str, event_id: str, event: Dict[str, Any] = Body(...)):
+    _change(calendar_id, {"status": "confirmed", **event, "id": event_id})
+    return {"sequence": sequence}
+
+
+@app.delete("/calendars/{calendar_id}/events/{event_id}")
+async def delete_event(calendar_id: str, event_id: str):
+    existing = calendars.get(calendar_id.lower(), {}).get(event_id, {"id": event_id})
+    _change(calendar_id, {**_public(existing), "status": "cancelled"})
+    return {"sequence": sequence}
+
+
+@app.post("/control/expire-tokens")
+async def expire_tokens():
+    global oldest_valid_token
+    oldest_valid_token = sequence + 1
+    return {"oldest_valid_token": oldest_valid_token}
+
+
+@app.post("/control/fail/{calendar_id}")
+async def fail(calendar_id: str, status: int = 500, times: int = 1, retry_after: Optional[float] = None):
+    failures[calendar_id.lower()] = {"status": status, "times": times, "retry_after": retry_after}
+    return failures[calendar_id.lower()]
+
+
+if __name__ == "__main__":
+    from config import settings
+
+    seed(sys.argv[1] if len(sys.argv) > 1 else settings.availability_file)
+    uvicorn.run(app, host="127.0.0.1", port=int(sys.argv[2]) if len(sys.argv) > 2 else 8090)
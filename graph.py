@@ -7,42 +7,40 @@ from langgraph.checkpoint.postgres import PostgresSaver
 from typing import Dict, Any
 from state import SchedulingState
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
 
 import json
 from nodes import *
 
 from Backend.calendar_tools import create_calendar_event
 from config import settings
+from admission import admission
+from components import Components
+from checkpoint_serde import create_serializer
 import asyncpg
-llm = ChatOpenAI(
-    model=settings.openai_model,
-    temperature=0.1,
-    api_key=settings.openai_api_key
-)
 
 
-async def create_graph():
+async def create_graph(checkpointer=None):
     """Create the scheduling workflow graph with human interrupts"""
     
-    # Create workflow
-    workflow = StateGraph(SchedulingState)
+    # Create workflow; runs get their shared components (LLM, knowledge, rooms) as context
+    workflow = StateGraph(SchedulingState, context_schema=Components)
     
-    # Add original nodes
-    workflow.add_node("parse_request", parse_request_node)
-    workflow.add_node("check_availability", check_availability_node)
-    workflow.add_node("gather_details", gather_details_node)
-    workflow.add_node("determine_format", determine_format_node)
-    workflow.add_node("process_format_selection", process_format_selection_node)
-    workflow.add_node("confirm_meeting", confirm_meeting_node)
-    workflow.add_node("send_invites", send_invites_node)
+    # Add original nodes; each waits for an admission slot before running
+    workflow.add_node("parse_request", admission.guard(parse_request_node))
+    workflow.add_node("check_availability", admission.guard(check_availability_node))
+    workflow.add_node("gather_details", admission.guard(gather_details_node))
+    workflow.add_node("determine_format", admission.guard(determine_format_node))
+    workflow.add_node("process_format_selection", admission.guard(process_format_selection_node))
+    workflow.add_node("confirm_meeting", admission.guard(confirm_meeting_node))
+    workflow.add_node("send_invites", admission.guard(send_invites_node))
     workflow.add_node("calendar_event", create_calendar_event)
     
     # Add human interrupt nodes
-    workflow.add_node("human_time_selection", human_time_selection_node)
-    workflow.add_node("human_format_selection", human_format_selection_node)
-    workflow.add_node("human_agenda_input", human_agenda_input_node)
-    workflow.add_node("human_confirmation", human_confirmation_node)
+    workflow.add_node("human_attendee_selection", admission.guard(human_attendee_selection_node))
+    workflow.add_node("human_time_selection", admission.guard(human_time_selection_node))
+    workflow.add_node("human_format_selection", admission.guard(human_format_selection_node))
+    workflow.add_node("human_agenda_input", admission.guard(human_agenda_input_node))
+    workflow.add_node("human_confirmation", admission.guard(human_confirmation_node))
     
     # Add conditional routing with interrupts
     workflow.add_conditional_edges("parse_request", route_with_interrupts)
@@ -53,6 +51,7 @@ async def create_graph():
     workflow.add_conditional_edges("confirm_meeting", route_with_interrupts)
     
     # Human interrupt nodes continue based on their internal logic
+    workflow.add_conditional_edges("human_attendee_selection", route_with_interrupts)
     workflow.add_conditional_edges("human_time_selection", route_with_interrupts)
     workflow.add_conditional_edges("human_format_selection", route_with_interrupts)
     workflow.add_conditional_edges("human_agenda_input", route_with_interrupts)
@@ -66,7 +65,7 @@ async def create_graph():
     workflow.set_entry_point("parse_request")
     
     # Create checkpointer for persistence (required for interrupts)
-    checkpointer = MemorySaver()
+    checkpointer = checkpointer or MemorySaver(serde=create_serializer())
     
     # Compile with checkpointer and interrupt support
     graph = workflow.compile(checkpointer=checkpointer)
@@ -0,0 +1,119 @@
+"""One-shot import of users_availability.json into the Postgres availability tables.
+
+Apply init_db.sql first, then run:
+
+    python import_availability.py [users_availability.json]
+
+Users are upserted by email and stored with their resolved timezone, which
+also fixes each event's absolute `during` range. Each imported user's calendar events and
+OOO/travel days are replaced, and so are all locations and cabins. The
+whole import runs in one transaction; bulk rows go through COPY.
+"""
+
+import asyncio
+import json
+import sys
+from datetime import date, time
+
+from asyncpg import Range
+
+from config import settings
+from db import close_pool, get_pool
+from room_catalog import normalize_location
+from slot_search import local_to_utc, user_timezone, utc_minutes_to_datetime
+
+
+def _time(hhmm: str) -> time:
+    hours, minutes = hhmm.strip().split(":")
+    return time(int(hours), int(minutes))
+
+
+def _during(zone: str, day: date, starts_at: time, ends_at: time) -> Range:
+    """Absolute range of a local-time event"""
+    return Range(
+        utc_minutes_to_datetime(local_to_utc(zone, day, starts_at.hour * 60 + starts_at.minute)),
+        utc_minutes_to_datetime(local_to_utc(zone, day, ends_at.hour * 60 + ends_at.minute)),
+    )
+
+
+async def import_users(conn, users: list) -> int:
+    rows = await conn.fetch(
+        """
+        INSERT INTO directory_users (email, name, base_location, timezone, aliases)
+        SELECT email, name, base_location, timezone, ARRAY(SELECT jsonb_array_elements_text(aliases))
+        FROM unnest($1::text[], $2::text[], $3::text[], $4::text[], $5::jsonb[])
+            AS imported (email, name, base_location, timezone, aliases)
+        ON CONFLICT (email) DO UPDATE
+            SET name = EXCLUDED.name, base_location = EXCLUDED.base_location, timezone = EXCLUDED.timezone,
+                aliases = EXCLUDED.aliases
+        RETURNING id, email
+        """,
+        [user["email"] for user in users],
+        [user["name"] for user in users],
+        [user.get("base_location") or user.get("location") for user in users],
+        [user_timezone(user) for user in users],
+        [json.dumps(user.get("aliases") or []) for user in users],
+    )
+    ids = {row["email"]: row["id"] for row in rows}
+
+    await conn.execute("DELETE FROM busy_intervals WHERE user_id = ANY($1::bigint[])", list(ids.values()))
+    await conn.execute("DELETE FROM user_absences WHERE user_id = ANY($1::bigint[])", list(ids.values()))
+
+    events, absences = [], set()
+    for user in users:
+        user_id, zone = ids[user["email"]], user_timezone(user)
+        for day, day_events in (user.get("calendar_events") or {}).items():
+            for event in day_events:
+                event_day = date.fromisoformat(day)
+                start, end = (_time(part) for part in event["slot"].split("-"))
+                events.append((
+                    user_id, event_day, start, end, _during(zone, event_day, start, end),
+                    event.get("title"), event.get("event_id"),
+                ))
+        for kind, field in (("ooo", "ooo_dates"), ("travel", "travel_dates")):
+            for day in user.get(field) or []:
+                absences.add((user_id, date.fromisoformat(day), kind))
+
+    await conn.copy_records_to_table(
+        "busy_intervals", records=events,
+        columns=["user_id", "day", "starts_at", "ends_at", "during", "title", "event_id"],
+    )
+    await conn.copy_records_to_table("user_absences", records=sorted(absences), columns=["user_id", "day", "kind"])
+    return len(events)
+
+
+async def import_rooms(conn, locations: dict) -> int:
+    """Replace locations and cabins; 'New York' and 'new_york' become one location"""
+    await conn.execute("DELETE FROM office_locations")
+
+    cabins, location_ids = {}, {}
+    for location_name, location_data in locations.items():
+        name = normalize_location(location_name).title()
+        if name not in location_ids:
+            location_ids[name] = await conn.fetchval("INSERT INTO office_locations (name) VALUES ($1) RETURNING id", name)
+        for floor_name, floor_data in location_data.get("floors", {}).items():
+            for cabin in floor_data.get("cabins", []):
+                cabins.setdefault(cabin["cabin_id"], (
+                    cabin["cabin_id"], location_ids[name], floor_name.replace("floor_", ""), cabin["capacity"]
+                ))
+
+    await conn.copy_records_to_table("cabins", records=list(cabins.values()), columns=["cabin_id", "location_id", "floor", "capacity"])
+    return len(cabins)
+
+
+async def main(path: str):
+    with open(path, "r") as file:
+        data = json.load(file)
+
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            event_count = await import_users(conn, data.get("users", []))
+            cabin_count = await import_rooms(conn, data.get("locations", {}))
+    await close_pool()
+
+    print(json.dumps({"users": len(data.get("users", [])), "busy_intervals": event_count, "cabins": cabin_count}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else settings.availability_file))
@@ -22,4 +22,118 @@ CREATE TABLE IF NOT EXISTS writes (
 );
 
 -- Create index for better performance
-CREATE INDEX IF NOT EXISTS checkpoints_thread_id_idx ON checkpoints(thread_id);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS checkpoints_thread_id_idx ON checkpoints(thread_id);
+
+-- Room booking ledger: the exclusion constraint makes double-booking a cabin impossible
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+CREATE TABLE IF NOT EXISTS room_bookings (
+    id BIGSERIAL PRIMARY KEY,
+    cabin_id TEXT NOT NULL,
+    location TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    during TSTZRANGE NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    EXCLUDE USING gist (cabin_id WITH =, during WITH &&)
+);
+
+-- Directory and calendar data (AVAILABILITY_BACKEND=postgres; load with import_availability.py)
+CREATE TABLE IF NOT EXISTS directory_users (
+    id BIGSERIAL PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    base_location TEXT,
+    timezone TEXT,
+    aliases TEXT[] NOT NULL DEFAULT '{}'  -- nicknames and other names attendees are referred to by
+);
+
+CREATE INDEX IF NOT EXISTS directory_users_lower_name_idx ON directory_users (lower(name));
+CREATE INDEX IF NOT EXISTS directory_users_lower_email_idx ON directory_users (lower(email));
+
+-- Calendar events in the user's local time; `during` is the same interval as an
+-- absolute range, filled in by the writer from the user's timezone
+CREATE TABLE IF NOT EXISTS busy_intervals (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES directory_users (id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    starts_at TIME NOT NULL,
+    ends_at TIME NOT NULL,
+    during TSTZRANGE NOT NULL,
+    title TEXT,
+    event_id TEXT
+);
+
+CREATE INDEX IF NOT EXISTS busy_intervals_user_day_idx ON busy_intervals (user_id, day);
+-- Per-attendee overlap lookups (user_id = ? AND during && window)
+CREATE INDEX IF NOT EXISTS busy_intervals_user_during_idx ON busy_intervals USING gist (user_id, during);
+
+-- Whole-day unavailability: out of office or business travel
+CREATE TABLE IF NOT EXISTS user_absences (
+    user_id BIGINT NOT NULL REFERENCES directory_users (id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('ooo', 'travel')),
+    PRIMARY KEY (user_id, day, kind)
+);
+
+CREATE TABLE IF NOT EXISTS office_locations (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS cabins (
+    cabin_id TEXT PRIMARY KEY,
+    location_id INTEGER NOT NULL REFERENCES office_locations (id) ON DELETE CASCADE,
+    floor TEXT NOT NULL,
+    capacity INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS cabins_location_capacity_idx ON cabins (location_id, capacity);
+
+-- Single-row data version; any change to directory or calendar rows bumps it,
+-- which invalidates cached availability analyses. directory_version is bumped
+-- only by directory changes, so the in-memory name index is not rebuilt on
+-- every calendar sync
+CREATE TABLE IF NOT EXISTS availability_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL,
+    directory_version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO availability_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_availability_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE availability_version SET version = version + 1 WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_directory_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE availability_version SET version = version + 1, directory_version = directory_version + 1 WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS directory_users_version ON directory_users;
+CREATE TRIGGER directory_users_version AFTER INSERT OR UPDATE OR DELETE ON directory_users
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_directory_version();
+
+DROP TRIGGER IF EXISTS busy_intervals_version ON busy_intervals;
+CREATE TRIGGER busy_intervals_version AFTER INSERT OR UPDATE OR DELETE ON busy_intervals
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_availability_version();
+
+DROP TRIGGER IF EXISTS user_absences_version ON user_absences;
+CREATE TRIGGER user_absences_version AFTER INSERT OR UPDATE OR DELETE ON user_absences
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_availability_version();
+
+-- Google Calendar free/busy sync (calendar_sync.py): incremental sync token per user,
+-- valid only while the sync horizon (last day stored) has not moved
+CREATE TABLE IF NOT EXISTS calendar_sync_state (
+    user_id BIGINT PRIMARY KEY REFERENCES directory_users (id) ON DELETE CASCADE,
+    sync_token TEXT,
+    horizon DATE,
+    synced_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS busy_intervals_user_event_idx ON busy_intervals (user_id, event_id);
@@ -1,46 +1,184 @@
 """Knowledge base management for availability data"""
 
+import asyncio
+import hashlib
 import json
+import math
 import os
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import re
+from collections import Counter, OrderedDict, defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, datetime
 import asyncpg
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import PGVector
 from langchain.schema import Document
 from config import settings
+from room_catalog import get_room_catalog, set_room_catalog
+from availability_store import PostgresAvailabilityStore
+from name_index import NameIndex, PrefixIndex
+from singleflight import SingleFlight
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9@._-]*")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "at", "be", "for", "free", "from", "has", "have", "in", "is", "me", "meet",
+    "meeting", "of", "on", "or", "schedule", "show", "the", "to", "what", "when", "who", "with",
+}
+
+
+def normalize_query(text: str) -> str:
+    """Cache key for a query: lower-cased with whitespace collapsed"""
+    return " ".join(text.lower().split())
+
+
+def _fold(token: str) -> str:
+    """Crude plural folding so 'cabins' matches 'Cabin'"""
+    token = token.strip("._-")
+    return token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+
+
+def _tokens(text: str) -> List[str]:
+    return [_fold(token) for token in _TOKEN.findall(text.lower()) if token.strip("._-") not in _STOPWORDS]
+
+
+def _directory_fingerprint(users: List[Dict[str, Any]]) -> str:
+    """Version of the fields the name indexes read (names, emails, aliases), ignoring calendar data"""
+    entries = sorted((user.get("email", ""), user.get("name", ""), user.get("aliases") or []) for user in users)
+    return hashlib.sha256(json.dumps(entries).encode("utf-8")).hexdigest()
+
+
+class KeywordIndex:
+    """Inverted index over document text; a match must contain every query keyword"""
+
+    def __init__(self, documents: List[Document]):
+        self.documents = documents
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        for position, document in enumerate(documents):
+            for token, count in Counter(_tokens(document.page_content)).items():
+                self._postings[token][position] = count
+
+    def search(self, query: str, k: int) -> List[Document]:
+        terms = set(_tokens(query))
+        if not terms or any(term not in self._postings for term in terms):
+            return []
+        matches = set.intersection(*(set(self._postings[term]) for term in terms))
+        total = len(self.documents)
+
+        def score(position: int) -> float:
+            return sum(
+                self._postings[term][position] * math.log(1 + total / len(self._postings[term]))
+                for term in terms
+            )
+
+        return [self.documents[position] for position in sorted(matches, key=score, reverse=True)[:k]]
+
+
+class EmbeddingCache:
+    """LRU of query embeddings keyed by normalized query text; `embeddings` is a factory for the model.
+
+    Concurrent misses for the same text share one backend call.
+    """
+
+    def __init__(self, embeddings, max_size: int):
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._flight = SingleFlight(ttl=0)  # the LRU keeps the results
+        self.stats = {"hits": 0, "misses": 0}
+
+    async def embed(self, query: str) -> List[float]:
+        key = normalize_query(query)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._cache[key]
+
+        self.stats["misses"] += 1
+        return await self._flight.do(key, lambda: self._compute(key))
+
+    async def _compute(self, key: str) -> List[float]:
+        vector = await self.embeddings().aembed_query(key)
+        self._cache[key] = vector
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return vector
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "coalesced": self._flight.stats["coalesced"], "size": len(self._cache)}
+
 
 class AvailabilityKnowledge:
     """Manages user availability knowledge base"""
     
     def __init__(self):
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004",
-            google_api_key=settings.gemini_api_key
-        )
+        self._embeddings = None
         self.vector_store = None
+        self._vector_store_lock = asyncio.Lock()
         self.availability_data = None
+        self._availability_version = None
+        self._availability_lock = asyncio.Lock()
+        self._file_directory_version = None
+        self.store = PostgresAvailabilityStore() if settings.availability_backend == "postgres" else None
+        self.query_embeddings = EmbeddingCache(lambda: self.embeddings, settings.query_embedding_cache_size)
+        self.documents: List[Document] = []
+        self.keyword_index = KeywordIndex([])
+        self.search_stats = {"metadata": 0, "keyword": 0, "vector": 0}
+        self.name_index: Optional[NameIndex] = None
+        self.prefix_index: Optional[PrefixIndex] = None
+        self._directory_index_version = None
+        self._directory_index_lock = asyncio.Lock()
         
     async def initialize(self):
-        """Initialize the knowledge base"""
+        """Load availability data and build the in-memory search indexes.
+
+        The vector store is not touched here: it is created and filled on the
+        first vector search (see get_vector_store), so startup needs neither
+        pgvector nor Gemini.
+        """
         # Load availability data
-        self.availability_data = self._load_availability_data()
+        if self.store:
+            # Users stay in Postgres; only the room catalog is loaded into memory
+            self.availability_data = {"users": [], "locations": {}}
+            set_room_catalog(await self.store.load_room_catalog())
+        else:
+            await self._current_availability_data()
         
-        # Create vector store
-        self.vector_store = PGVector(
-            embedding_function=self.embeddings,
-            collection_name="availability_knowledge_langraph",
-            connection_string=settings.database_url,
-        )
-        
-        # Add documents
         documents = self._create_documents()
-        if documents:
-            await self.vector_store.aadd_documents(documents)
+        self.documents = documents
+        self.keyword_index = KeywordIndex(documents)
+    
+    @property
+    def embeddings(self):
+        """Gemini embedding model, created on first use"""
+        if self._embeddings is None:
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            
+            self._embeddings = GoogleGenerativeAIEmbeddings(
+                model="models/text-embedding-004",
+                google_api_key=settings.gemini_api_key
+            )
+        return self._embeddings
+    
+    async def get_vector_store(self):
+        """PGVector store holding the knowledge documents; connects and ingests on first call"""
+        if self.vector_store is None:
+            async with self._vector_store_lock:
+                if self.vector_store is None:
+                    from langchain_community.vectorstores import PGVector
+                    
+                    vector_store = await asyncio.to_thread(
+                        PGVector,
+                        embedding_function=self.embeddings,
+                        collection_name="availability_knowledge_langraph",
+                        connection_string=settings.database_url,
+                    )
+                    if self.documents:
+                        await vector_store.aadd_documents(self.documents)
+                    self.vector_store = vector_store
+        return self.vector_store
     
     def _load_availability_data(self) -> Dict[str, Any]:
         """Load availability data from JSON file"""
-        availability_file = "Backend/users_availability.json"
+        availability_file = settings.availability_file
         
         try:
             with open(availability_file, 'r') as file:
@@ -55,15 +193,7 @@ class AvailabilityKnowledge:
         
         # Process user availability
         for user in self.availability_data.get("users", []):
-            user_doc_content = self._create_user_document(user)
-            documents.append(Document(
-                page_content=user_doc_content,
-                metadata={
-                    "type": "user_availability",
-                    "user_email": user['email'],
-                    "user_name": user['name']
-                }
-            ))
+            documents.append(self._user_document(user))
         
         # Process locations
         locations_doc_content = self._create_locations_document()
@@ -81,6 +211,16 @@ class AvailabilityKnowledge:
         
         return documents
     
+    def _user_document(self, user: Dict[str, Any]) -> Document:
+        return Document(
+            page_content=self._create_user_document(user),
+            metadata={
+                "type": "user_availability",
+                "user_email": user['email'],
+                "user_name": user['name']
+            }
+        )
+    
     def _create_user_document(self, user: Dict[str, Any]) -> str:
         """Create a document for a single user's availability"""
         doc = f"""
@@ -108,19 +248,7 @@ Calendar Events:"""
     def _create_locations_document(self) -> str:
         """Create a document for office locations"""
         doc = "Office Locations and Meeting Rooms:\n\n"
-        
-        locations = self.availability_data.get("locations", {})
-        for location_name, location_data in locations.items():
-            doc += f"Location: {location_name.title()}\n"
-            floors = location_data.get("floors", {})
-            for floor_name, floor_data in floors.items():
-                doc += f"  {floor_name.replace('_', ' ').title()}:\n"
-                cabins = floor_data.get("cabins", [])
-                for cabin in cabins:
-                    doc += f"    - Cabin ID: {cabin['cabin_id']}\n"
-                    doc += f"      Capacity: {cabin['capacity']} people\n"
-            doc += "---\n"
-        
+        doc += get_room_catalog().describe()
         return doc
     
     def _create_availability_summary(self) -> str:
@@ -151,12 +279,68 @@ Calendar Events:"""
         
         return doc
     
-    async def search(self, query: str, k: int = 5) -> List[Document]:
-        """Search the knowledge base"""
-        if not self.vector_store:
+    async def search(self, query: str, k: int = 5, filter: Optional[Dict[str, str]] = None) -> List[Document]:
+        """Search the knowledge base.
+
+        In hybrid mode, exact metadata (`filter`, or emails and names mentioned
+        in the query) is tried first, then the keyword index; only queries
+        neither can answer are embedded for vector similarity, and only when
+        KNOWLEDGE_VECTOR_SEARCH is enabled.
+        """
+        if self.availability_data is None:
             await self.initialize()
         
-        return await self.vector_store.asimilarity_search(query, k=k)
+        if settings.knowledge_search_mode == "hybrid" or not settings.knowledge_vector_search:
+            documents = await self._metadata_search(query, filter)
+            if documents:
+                self.search_stats["metadata"] += 1
+                return documents[:k]
+            documents = [
+                document for document in self.keyword_index.search(query, len(self.documents))
+                if all(document.metadata.get(key) == value for key, value in (filter or {}).items())
+            ][:k]
+            if documents:
+                self.search_stats["keyword"] += 1
+                return documents
+        
+        if not settings.knowledge_vector_search:
+            return []
+        
+        self.search_stats["vector"] += 1
+        vector_store = await self.get_vector_store()
+        embedding = await self.query_embeddings.embed(query)
+        return await vector_store.asimilarity_search_by_vector(embedding, k=k, filter=filter)
+    
+    async def _metadata_search(self, query: str, filter: Optional[Dict[str, str]]) -> List[Document]:
+        """Documents selected by exact user email/name or document type"""
+        filter = filter or {}
+        if filter.get("user_email") or filter.get("user_name"):
+            identifiers = [filter.get("user_email") or filter["user_name"]]
+        elif filter.get("type") and filter["type"] != "user_availability":
+            return [document for document in self.documents if document.metadata.get("type") == filter["type"]]
+        else:
+            # People named in the query: emails, single words and adjacent word pairs
+            words = re.findall(r"[a-z]+", query.lower())
+            identifiers = _EMAIL.findall(query) + words + [" ".join(pair) for pair in zip(words, words[1:])]
+            identifiers = [identifier for identifier in identifiers if identifier not in _STOPWORDS]
+        if not identifiers:
+            return []
+        
+        users = await self.find_users(identifiers)
+        seen, documents = set(), []
+        for identifier in identifiers:
+            user = users.get(identifier.strip().lower())
+            if user and user['email'] not in seen:
+                seen.add(user['email'])
+                documents.append(self._user_document(user))
+        return documents
+    
+    def search_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.search_stats,
+            "vector_store_ready": self.vector_store is not None,
+            "query_embeddings": self.query_embeddings.metrics(),
+        }
     
     def get_user_availability(self, email: str) -> Optional[Dict[str, Any]]:
         """Get specific user's availability data"""
@@ -166,34 +350,120 @@ Calendar Events:"""
         return None
     
     def get_available_rooms(self, location: str, capacity: int) -> List[Dict[str, Any]]:
-        """Get available meeting rooms for a location"""
-        rooms = []
-        locations = self.availability_data.get("locations", {})
-        
-        location_data = locations.get(location.lower(), {})
-        for floor_name, floor_data in location_data.get("floors", {}).items():
-            for cabin in floor_data.get("cabins", []):
-                if cabin['capacity'] >= capacity:
-                    rooms.append({
-                        "location": location,
-                        "floor": floor_name,
-                        "cabin_id": cabin['cabin_id'],
-                        "capacity": cabin['capacity']
-                    })
-        
-        return sorted(rooms, key=lambda x: x['capacity'])
-    async def get_available_slots(self, attendees: List[str]) -> str:
+        """Get meeting rooms for a location that seat `capacity`, smallest first"""
+        return [dict(room) for room in get_room_catalog().rooms_for(location, capacity)]
+
+    async def data_version(self) -> str:
+        """Changes whenever the availability file (or the Postgres directory) is rewritten"""
+        if self.store:
+            return f"pg:{await self.store.data_version()}"
         try:
-            with open('Backend/users_availability.json', 'r') as f:
-                USER_DATA = json.load(f)["users"]
+            stat = os.stat(settings.availability_file)
         except FileNotFoundError:
-            print("WARNING: Backend/users_availability.json not found. The availability checker will not work.")
-            USER_DATA = []
+            return "missing"
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    async def _current_availability_data(self) -> Dict[str, Any]:
+        """File backend: the availability data, reloaded when the file changed since it was last read"""
+        version = await self.data_version()
+        if self.availability_data is None or version != self._availability_version:
+            async with self._availability_lock:
+                if self.availability_data is None or version != self._availability_version:
+                    self.availability_data = await asyncio.to_thread(self._load_availability_data)
+                    self._availability_version = version
+                    self._file_directory_version = _directory_fingerprint(self.availability_data.get("users", []))
+        return self.availability_data
+
+    async def find_users(self, identifiers: List[str], days: Optional[Tuple[date, date]] = None) -> Dict[str, Dict[str, Any]]:
+        """Map each lower-cased email or name to its user; unknown identifiers are absent.
+
+        `days` (first and last local date) bounds the calendar data fetched
+        from Postgres; the file backend always has every day in memory.
+        """
+        if self.store:
+            return await self.store.users_by_identifiers(identifiers, days)
+
+        directory = (await self._current_availability_data()).get("users", [])
+        keys = {identifier.strip().lower() for identifier in identifiers}
+        found: Dict[str, Dict[str, Any]] = {}
+        for user in directory:
+            for key in (user["email"].lower(), user["name"].lower()):
+                if key in keys:
+                    found.setdefault(key, user)
+        return found
+
+    async def merged_busy(self, users: List[Dict[str, Any]], span: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """Attendees' merged busy time from Postgres, or None when slot search should read their calendars"""
+        if not self.store or not users:
+            return None
+        return await self.store.merged_busy([user["email"] for user in users], span)
+
+    async def _refresh_directory_indexes(self):
+        """(Re)build the fuzzy name and autocomplete indexes when the directory changes.
+
+        Keyed on the directory alone (names, emails, aliases), so calendar
+        syncs that rewrite the availability file or busy rows do not rebuild them.
+        """
+        if self.store:
+            version = f"pg:{await self.store.directory_version()}"
+        else:
+            await self._current_availability_data()
+            version = self._file_directory_version
+        if self.name_index is not None and version == self._directory_index_version:
+            return
+        async with self._directory_index_lock:
+            if self.name_index is not None and version == self._directory_index_version:
+                return
+            if self.store:
+                entries = await self.store.directory_entries()
+            else:
+                entries = self.availability_data.get("users", [])
+            self.name_index, self.prefix_index = await asyncio.to_thread(
+                lambda: (NameIndex(entries), PrefixIndex(entries))
+            )
+            self._directory_index_version = version
+
+    async def get_name_index(self) -> NameIndex:
+        """Fuzzy name index over the directory"""
+        await self._refresh_directory_indexes()
+        return self.name_index
+
+    async def autocomplete(self, query: str, limit: int = 10) -> List[Dict[str, str]]:
+        """People whose name, name word, email or alias starts with `query`"""
+        await self._refresh_directory_indexes()
+        return [{"name": user["name"], "email": user["email"]} for user in self.prefix_index.complete(query, limit)]
+
+    async def resolve_attendees(self, attendees: List[str], days: Optional[Tuple[date, date]] = None) -> Dict[str, List[Any]]:
+        """Fuzzy-match names or emails to directory users.
+
+        Returns {"users": [...], "ambiguous": [{"name", "candidates"}], "unknown": [...]};
+        a name is ambiguous when its runner-up candidate scores close to the top one.
+        """
+        index = await self.get_name_index()
+        resolved: Dict[str, Dict[str, Any]] = {}
+        ambiguous, unknown = [], []
+        for attendee in attendees:
+            match = index.resolve(attendee)
+            if match["status"] == "resolved":
+                resolved.setdefault(match["user"]["email"].lower(), match["user"])
+            elif match["status"] == "ambiguous":
+                ambiguous.append({
+                    "name": attendee,
+                    "candidates": [
+                        {"name": user["name"], "email": user["email"], "score": score}
+                        for score, user in match["candidates"]
+                    ],
+                })
+            else:
+                unknown.append(attendee)
 
-        users_data = []
-        for attendee_name in attendees:
-            user = next((u for u in USER_DATA if u["name"].lower() == attendee_name.lower()), None)
-            if user:
-                users_data.append(user)
+        users = []
+        if resolved:
+            # The index is only rebuilt on directory changes; fetch current calendars
+            directory = await self.find_users(list(resolved), days)
+            users = [directory[email] for email in resolved if email in directory]
+        return {"users": users, "ambiguous": ambiguous, "unknown": unknown}
 
-        return users_data
\ No newline at end of file
+    async def get_available_slots(self, attendees: List[str], days: Optional[Tuple[date, date]] = None) -> List[Dict[str, Any]]:
+        """Directory records of the attendees (names or emails) that resolve unambiguously, in request order"""
+        return (await self.resolve_attendees(attendees, days))["users"]
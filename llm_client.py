@@ -0,0 +1,221 @@
+"""Shared, rate-limited chat model client used by every workflow node"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from langchain_core.messages import BaseMessage
+from langchain_openai import ChatOpenAI
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-message overhead OpenAI adds around each message's content
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or its encoding file cannot be fetched
+    _encoding = None
+
+
+def estimate_tokens(prompt: Any) -> int:
+    """Estimate prompt tokens for a string or message list"""
+    if isinstance(prompt, str):
+        texts = [prompt]
+    else:
+        texts = [
+            str(message.content) if isinstance(message, BaseMessage)
+            else str(message.get("content", "")) if isinstance(message, dict)
+            else str(message)
+            for message in prompt
+        ]
+
+    total = 0
+    for text in texts:
+        total += len(_encoding.encode(text)) if _encoding else len(text) // 4 + 1
+        total += _MESSAGE_OVERHEAD_TOKENS
+    return total
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` units per minute.
+
+    The level may go negative when actual usage turns out higher than
+    reserved; later callers then wait for the debt to refill.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """Take `amount` units, sleeping until they are available; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return waited
+                delay = (amount - self.level) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+    def adjust(self, amount: float):
+        """Charge (positive) or refund (negative) units after the fact"""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Seconds to wait from a Retry-After / retry-after-ms header, if present"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time()) if retry_at else None
+
+
+def _is_retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, (httpx.TimeoutException, httpx.TransportError))
+
+
+class RateLimitedLLM:
+    """A chat model behind request/min and token/min buckets with 429 backoff.
+
+    One instance is shared by the whole process so all nodes draw from the
+    same provider quota and reuse one pooled HTTP connection set.
+    """
+
+    def __init__(self, llm: Any, requests_per_minute: int, tokens_per_minute: int,
+                 max_retries: int, backoff_base: float, backoff_max: float):
+        self.llm = llm
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {"calls": 0, "retries": 0, "throttled_ms": 0.0, "backoff_ms": 0.0}
+
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        delay = _retry_after(exc)
+        if delay is None:
+            delay = self.backoff_base * (2 ** attempt) * (0.5 + random.random() / 2)
+        return min(delay, self.backoff_max)
+
+    async def ainvoke(self, prompt: Any, *args, **kwargs) -> Any:
+        """Drop-in replacement for ChatOpenAI.ainvoke"""
+        estimated = estimate_tokens(prompt)
+
+        for attempt in range(self.max_retries + 1):
+            waited = await self.requests.acquire(1)
+            waited += await self.tokens.acquire(estimated)
+            self.stats["throttled_ms"] += waited * 1000
+            self.stats["calls"] += 1
+
+            try:
+                response = await self.llm.ainvoke(prompt, *args, **kwargs)
+            except Exception as exc:
+                if attempt >= self.max_retries or not _is_retryable(exc):
+                    raise
+                delay = self._backoff(attempt, exc)
+                self.stats["retries"] += 1
+                self.stats["backoff_ms"] += delay * 1000
+                logger.warning(f"LLM call failed ({exc.__class__.__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            # Settle the token bucket with what the provider actually counted
+            usage = getattr(response, "usage_metadata", None)
+            if usage and usage.get("total_tokens"):
+                self.tokens.adjust(usage["total_tokens"] - estimated)
+            return response
+
+    def metrics(self) -> Dict[str, Any]:
+        self.requests._refill()
+        self.tokens._refill()
+        return {
+            **self.stats,
+            "throttled_ms": round(self.stats["throttled_ms"], 3),
+            "backoff_ms": round(self.stats["backoff_ms"], 3),
+            "requests_available": round(self.requests.level, 1),
+            "tokens_available": round(self.tokens.level, 1),
+        }
+
+
+_shared_llm: Optional[RateLimitedLLM] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_shared_llm() -> RateLimitedLLM:
+    """Return the process-wide rate-limited chat model, creating it on first use"""
+    global _shared_llm, _http_client
+    if _shared_llm is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_connections,
+            ),
+            timeout=settings.llm_request_timeout_seconds,
+        )
+        chat_model = ChatOpenAI(
+            model=settings.openai_model,
+            temperature=0.1,
+            api_key=settings.openai_api_key,
+            http_async_client=_http_client,
+            max_retries=0,  # retries are handled here so they respect the buckets
+        )
+        _shared_llm = RateLimitedLLM(
+            chat_model,
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
+            max_retries=settings.llm_max_retries,
+            backoff_base=settings.llm_backoff_base_seconds,
+            backoff_max=settings.llm_backoff_max_seconds,
+        )
+    return _shared_llm
+
+
+async def close_shared_llm():
+    """Close the pooled HTTP connections (called on application shutdown)"""
+    global _shared_llm, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        _shared_llm = None
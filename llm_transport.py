@@ -0,0 +1,231 @@
+"""Record/replay transport for the LLM calls made by the workflow nodes"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from admission import admission
+from config import settings
+
+
+# Prompt builders write the wall clock as these placeholders. Prompts are hashed with the
+# placeholders in place, so a recording still matches once the clock moves on, and the
+# transport fills in the current date and time just before calling the model
+TODAY = "<today>"
+NOW = "<now>"
+
+
+def _fill_clock_text(text: str, now: datetime) -> str:
+    return text.replace(TODAY, now.strftime("%Y-%m-%d")).replace(NOW, now.strftime("%H:%M"))
+
+
+def fill_clock(prompt: Any) -> Any:
+    """Replace the clock placeholders in a string or message list with the current date and time"""
+    now = datetime.now()
+    if isinstance(prompt, str):
+        return _fill_clock_text(prompt, now)
+
+    filled = []
+    for message in prompt:
+        if isinstance(message, BaseMessage) and isinstance(message.content, str):
+            message = message.model_copy(update={"content": _fill_clock_text(message.content, now)})
+        elif isinstance(message, dict):
+            message = {**message, "content": _fill_clock_text(str(message.get("content", "")), now)}
+        filled.append(message)
+    return filled
+
+
+def _normalize_prompt(prompt: Any) -> List[List[str]]:
+    """Turn a string or message list into a stable [role, content] list"""
+    if isinstance(prompt, str):
+        return [["human", prompt]]
+
+    normalized = []
+    for message in prompt:
+        if isinstance(message, BaseMessage):
+            normalized.append([message.type, str(message.content)])
+        elif isinstance(message, dict):
+            normalized.append([message.get("type", "human"), str(message.get("content", ""))])
+        else:
+            normalized.append(["human", str(message)])
+    return normalized
+
+
+def prompt_hash(prompt: Any) -> str:
+    """Hash a prompt so identical requests map to the same recorded response.
+
+    Hashed before the clock placeholders are filled in, so a conversation
+    recorded at one time still replays later; every other date and time in
+    the prompt (calendar data, requested slots) is part of the hash.
+    """
+    payload = json.dumps(_normalize_prompt(prompt), ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMTransport:
+    """Wraps a chat model and records or replays its responses.
+
+    Modes:
+        live   - call the model directly
+        record - call the model and append every request/response to the cassette
+        replay - serve responses from the cassette without touching the network
+    """
+
+    def __init__(
+        self,
+        llm: Any = None,
+        mode: str = "live",
+        cassette_path: str = "llm_cassette.jsonl",
+        replay_latency_scale: float = 1.0,
+        replay_latency_ms: Optional[int] = None,
+    ):
+        if mode not in ("live", "record", "replay"):
+            raise ValueError(f"Unknown LLM transport mode: {mode}")
+        if mode != "replay" and llm is None:
+            raise ValueError(f"An LLM client is required in '{mode}' mode")
+
+        self.llm = llm
+        self.mode = mode
+        self.cassette_path = cassette_path
+        self.replay_latency_scale = replay_latency_scale
+        self.replay_latency_ms = replay_latency_ms
+
+        self._recordings: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._write_lock = asyncio.Lock()
+        self.reset_stats()
+
+        if mode == "replay":
+            self._load_cassette()
+
+    def reset_stats(self):
+        """Reset call counters (e.g. between replayed conversations)"""
+        self.stats = {
+            "calls": 0,
+            "latency_ms": 0.0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "total_tokens": 0,
+        }
+
+    def metrics(self) -> Optional[Dict[str, Any]]:
+        """Rate limiter gauges of the wrapped model; None when it keeps none (e.g. replay mode)"""
+        model_metrics = getattr(self.llm, "metrics", None)
+        return model_metrics() if callable(model_metrics) else None
+
+    def _load_cassette(self):
+        """Index recorded responses by prompt hash, keeping call order"""
+        if not os.path.exists(self.cassette_path):
+            raise FileNotFoundError(f"LLM cassette {self.cassette_path} not found")
+
+        with open(self.cassette_path, "r") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("kind", "llm") == "llm":
+                    self._recordings[entry["prompt_hash"]].append(entry)
+
+    def _next_recording(self, key: str) -> Dict[str, Any]:
+        """Pop the next recording for a prompt; the last one is reused for repeats"""
+        recordings = self._recordings.get(key)
+        if not recordings:
+            raise LookupError(f"No recorded LLM response for prompt hash {key}")
+        if len(recordings) > 1:
+            return recordings.popleft()
+        return recordings[0]
+
+    def _track(self, latency_ms: float, usage: Optional[Dict[str, Any]]):
+        self.stats["calls"] += 1
+        self.stats["latency_ms"] += latency_ms
+        if usage:
+            for field in ("input_tokens", "output_tokens", "total_tokens"):
+                self.stats[field] += int(usage.get(field, 0) or 0)
+
+    async def _append(self, entry: Dict[str, Any]):
+        async with self._write_lock:
+            with open(self.cassette_path, "a") as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def record_turn(self, session_id: str, user_input: Any):
+        """Record a user turn so whole conversations can be replayed later"""
+        if self.mode != "record":
+            return
+        await self._append({
+            "kind": "turn",
+            "session_id": session_id,
+            "input": user_input,
+            "recorded_at": time.time(),
+        })
+
+    async def ainvoke(self, prompt: Any, *args, **kwargs) -> Any:
+        """Drop-in replacement for ChatOpenAI.ainvoke"""
+        async with admission.llm_slot():
+            return await self._ainvoke(prompt, *args, **kwargs)
+
+    async def _ainvoke(self, prompt: Any, *args, **kwargs) -> Any:
+        key = prompt_hash(prompt)
+
+        if self.mode == "replay":
+            recording = self._next_recording(key)
+            if self.replay_latency_ms is not None:
+                latency_ms = float(self.replay_latency_ms)
+            else:
+                latency_ms = recording.get("latency_ms", 0.0) * self.replay_latency_scale
+            if latency_ms > 0:
+                await asyncio.sleep(latency_ms / 1000)
+
+            usage = recording.get("usage")
+            self._track(latency_ms, usage)
+            return AIMessage(content=recording["response"], usage_metadata=usage)
+
+        started = time.perf_counter()
+        response = await self.llm.ainvoke(fill_clock(prompt), *args, **kwargs)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        usage = getattr(response, "usage_metadata", None)
+        usage = dict(usage) if usage else None
+        self._track(latency_ms, usage)
+
+        if self.mode == "record":
+            await self._append({
+                "kind": "llm",
+                "prompt_hash": key,
+                "response": response.content,
+                "latency_ms": round(latency_ms, 3),
+                "usage": usage,
+                "recorded_at": time.time(),
+            })
+
+        return response
+
+
+def load_recorded_conversations(cassette_path: str) -> Dict[str, List[Any]]:
+    """Group recorded user turns by session, in the order they were sent"""
+    conversations: Dict[str, List[Any]] = defaultdict(list)
+    with open(cassette_path, "r") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("kind") == "turn":
+                conversations[entry["session_id"]].append(entry["input"])
+    return dict(conversations)
+
+
+def create_llm_transport(llm_factory) -> LLMTransport:
+    """Build the transport configured in settings; the model is only created when needed"""
+    mode = settings.llm_transport_mode
+    return LLMTransport(
+        llm=None if mode == "replay" else llm_factory(),
+        mode=mode,
+        cassette_path=settings.llm_cassette_path,
+        replay_latency_scale=settings.llm_replay_latency_scale,
+        replay_latency_ms=settings.llm_replay_latency_ms,
+    )
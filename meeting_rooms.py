@@ -1,65 +1,206 @@
 """Meeting room management"""
 
-from typing import List, Dict, Optional
+from bisect import bisect_right, insort
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import asyncpg
+
+from config import settings
+from db import get_pool
+from room_catalog import RoomCatalog, get_room_catalog
+from slot_search import (
+    datetime_to_utc_minutes, find_slots_with_rooms, horizon_span, intervals_to_bitmap, slot_to_utc, utc_minutes_to_datetime,
+)
+
+class RoomBookingLedger:
+    """In-process booking ledger: per-cabin sorted, non-overlapping intervals.
+
+    Bookings are (start, end) UTC minutes. Because a cabin's bookings never
+    overlap, sorting them by start is enough for an O(log n) overlap check:
+    only the neighbours around the bisect point can collide.
+    """
+
+    def __init__(self):
+        self._bookings: Dict[str, List[Tuple[int, int, str]]] = defaultdict(list)
+
+    def is_free(self, cabin_id: str, start: int, end: int) -> bool:
+        """True if the cabin has no booking overlapping [start, end)"""
+        bookings = self._bookings.get(cabin_id)
+        if not bookings:
+            return True
+
+        i = bisect_right(bookings, (start, float("inf")))
+        if i > 0 and bookings[i - 1][1] > start:
+            return False
+        if i < len(bookings) and bookings[i][0] < end:
+            return False
+        return True
+
+    def book(self, cabin_id: str, start: int, end: int, owner: str) -> bool:
+        """Book a cabin; returns False if the slot is already taken"""
+        if not self.is_free(cabin_id, start, end):
+            return False
+        insort(self._bookings[cabin_id], (start, end, owner))
+        return True
+
+    def release(self, cabin_id: str, start: int, owner: str):
+        """Remove a booking made by `owner` starting at `start`"""
+        self._bookings[cabin_id] = [
+            booking for booking in self._bookings.get(cabin_id, [])
+            if not (booking[0] == start and booking[2] == owner)
+        ]
+
+    def replace_between(self, start: int, end: int, bookings: List[Tuple[str, int, int, str]]):
+        """Make [start, end) match `bookings` (cabin_id, start, end, owner), the authoritative rows for that window.
+
+        Local bookings overlapping the window are dropped first, so ones
+        released or cancelled elsewhere do not linger.
+        """
+        for cabin_id, cabin_bookings in self._bookings.items():
+            self._bookings[cabin_id] = [booking for booking in cabin_bookings if booking[1] <= start or booking[0] >= end]
+        for cabin_id, booking_start, booking_end, owner in bookings:
+            if self.is_free(cabin_id, booking_start, booking_end):
+                insort(self._bookings[cabin_id], (booking_start, booking_end, owner))
+
+    def occupancy_bitmap(self, cabin_id: str, origin: int, nbits: int, quantum: int) -> int:
+        """Bit i set when quantum i after `origin` is (partly) booked"""
+        bookings = self._bookings.get(cabin_id)
+        if not bookings:
+            return 0
+
+        horizon = origin + nbits * quantum
+        i = max(bisect_right(bookings, (origin, float("inf"))) - 1, 0)
+        overlapping = []
+        while i < len(bookings) and bookings[i][0] < horizon:
+            if bookings[i][1] > origin:
+                overlapping.append(bookings[i][:2])
+            i += 1
+        return intervals_to_bitmap(overlapping, origin, nbits, quantum, outward=True)
+
+    def booked_cabins(self, cabin_ids: List[str], start: int, end: int) -> Set[str]:
+        """Cabins among `cabin_ids` that are booked at any point in [start, end)"""
+        return {cabin_id for cabin_id in cabin_ids if not self.is_free(cabin_id, start, end)}
+
+
+class PostgresRoomLedger:
+    """Room bookings persisted in Postgres.
+
+    The room_bookings table carries an exclusion constraint on
+    (cabin_id WITH =, during WITH &&), so concurrent schedulers in different
+    processes can never double-book a cabin.
+    """
+
+    async def book(self, cabin_id: str, location: str, start: int, end: int, owner: str) -> bool:
+        pool = await get_pool()
+        try:
+            await pool.execute(
+                """
+                INSERT INTO room_bookings (cabin_id, location, session_id, during)
+                VALUES ($1, $2, $3, tstzrange($4, $5, '[)'))
+                """,
+                cabin_id, location, owner,
+                utc_minutes_to_datetime(start), utc_minutes_to_datetime(end),
+            )
+        except asyncpg.exceptions.ExclusionViolationError:
+            return False
+        return True
+
+    async def release(self, cabin_id: str, start: int, owner: str):
+        pool = await get_pool()
+        await pool.execute(
+            "DELETE FROM room_bookings WHERE cabin_id = $1 AND session_id = $2 AND lower(during) = $3",
+            cabin_id, owner, utc_minutes_to_datetime(start),
+        )
+
+    async def bookings_between(self, start: int, end: int) -> List[Tuple[str, int, int, str]]:
+        """All bookings overlapping [start, end) as (cabin_id, start, end, owner)"""
+        pool = await get_pool()
+        rows = await pool.fetch(
+            """
+            SELECT cabin_id, lower(during) AS starts_at, upper(during) AS ends_at, session_id
+            FROM room_bookings
+            WHERE during && tstzrange($1, $2, '[)')
+            """,
+            utc_minutes_to_datetime(start), utc_minutes_to_datetime(end),
+        )
+        return [
+            (row["cabin_id"], datetime_to_utc_minutes(row["starts_at"]),
+             datetime_to_utc_minutes(row["ends_at"]), row["session_id"])
+            for row in rows
+        ]
+
 
 class MeetingRoomManager:
     """Manages meeting room availability and selection"""
     
-    def __init__(self):
-        self.rooms = {
-            "new york": [
-                {"floor": "1", "cabin_id": "M1C5", "capacity": 5},
-                {"floor": "2", "cabin_id": "M2C3", "capacity": 3},
-                {"floor": "2", "cabin_id": "M2C2", "capacity": 2}
-            ],
-            "chicago": [
-                {"floor": "1", "cabin_id": "C1C5", "capacity": 5},
-                {"floor": "2", "cabin_id": "C2C3", "capacity": 3},
-                {"floor": "2", "cabin_id": "C2C2", "capacity": 2}
-            ],
-            "san francisco": [
-                {"floor": "1", "cabin_id": "S1C5", "capacity": 5},
-                {"floor": "2", "cabin_id": "S2C3", "capacity": 3},
-                {"floor": "2", "cabin_id": "S2C2", "capacity": 2}
-            ]
-        }
+    def __init__(self, catalog: Optional[RoomCatalog] = None):
+        self._catalog = catalog
+        self.ledger = RoomBookingLedger()
+        self.store = PostgresRoomLedger() if settings.room_ledger_backend == "postgres" else None
+
+    @property
+    def catalog(self) -> RoomCatalog:
+        """The catalog given at construction, else the process-wide one"""
+        return self._catalog or get_room_catalog()
     
-    def get_available_rooms(self, location: str, num_attendees: int) -> List[Dict]:
-        """Get available rooms for a location that can accommodate attendees"""
-        location_lower = location.lower()
+    def get_available_rooms(self, location: str, num_attendees: int, slot: Optional[Dict[str, Any]] = None, limit: int = 2) -> List[Dict]:
+        """Get available rooms for a location that can accommodate attendees.
         
-        if location_lower not in self.rooms:
-            return []
+        Rooms come from the catalog already sorted by capacity, so the first
+        unbooked ones are the best fit. When a slot is given, rooms already
+        booked for any part of it are excluded.
+        """
+        bounds = slot_to_utc(slot) if slot else None
         
-        # Filter rooms by capacity
-        suitable_rooms = [
-            {
-                "location": location,
-                "floor": room["floor"],
-                "cabin_id": room["cabin_id"],
-                "capacity": room["capacity"]
-            }
-            for room in self.rooms[location_lower]
-            if room["capacity"] >= num_attendees
-        ]
+        suitable_rooms = []
+        for room in self.catalog.rooms_for(location, num_attendees):
+            if bounds and not self.ledger.is_free(room["cabin_id"], *bounds):
+                continue
+            suitable_rooms.append(dict(room))
+            if len(suitable_rooms) >= limit:  # Return top 2 options by default
+                break
         
-        # Sort by capacity (prefer smaller rooms that fit)
-        return sorted(suitable_rooms, key=lambda x: x["capacity"])[:2]  # Return top 2 options
+        return suitable_rooms
     
-    def get_rooms_for_multiple_locations(self, location_attendees: Dict[str, List[str]]) -> Dict[str, List[Dict]]:
+    def get_rooms_for_multiple_locations(self, location_attendees: Dict[str, List[str]], slot: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict]]:
         """Get room options for multiple locations"""
         room_options = {}
         
         for location, attendees in location_attendees.items():
             num_attendees = len(attendees)
-            room_options[location] = self.get_available_rooms(location, num_attendees)
+            room_options[location] = self.get_available_rooms(location, num_attendees, slot)
         
         return room_options
-
-
-
-
-
-
-
-
+    
+    async def find_slots_with_rooms(self, users: List[Dict[str, Any]], location: str, start_date, duration_minutes: int, **kwargs) -> List[Dict[str, Any]]:
+        """Slots where all co-located attendees are free and a fitting cabin is unbooked"""
+        await self.refresh_between(*horizon_span(start_date, kwargs.get("horizon_days")))
+        rooms = self.catalog.rooms_for(location, len(users))
+        return find_slots_with_rooms(users, rooms, self.ledger, start_date, duration_minutes, **kwargs)
+    
+    async def refresh_between(self, start: int, end: int):
+        """Replace the local ledger's bookings in [start, end) with the shared store's"""
+        if not self.store:
+            return
+        self.ledger.replace_between(start, end, await self.store.bookings_between(start, end))
+    
+    async def refresh_bookings(self, slot: Dict[str, Any]):
+        """Sync the local ledger with bookings made or released by other processes for a slot"""
+        await self.refresh_between(*slot_to_utc(slot))
+    
+    async def book_room(self, room: Dict[str, Any], slot: Dict[str, Any], owner: str) -> bool:
+        """Book a room for a slot; False if someone else holds it"""
+        start, end = slot_to_utc(slot)
+        if not self.ledger.is_free(room["cabin_id"], start, end):
+            return False
+        if self.store and not await self.store.book(room["cabin_id"], room.get("location", ""), start, end, owner):
+            return False
+        return self.ledger.book(room["cabin_id"], start, end, owner)
+    
+    async def release_room(self, room: Dict[str, Any], slot: Dict[str, Any], owner: str):
+        """Cancel a booking made by `owner`"""
+        start, _ = slot_to_utc(slot)
+        if self.store:
+            await self.store.release(room["cabin_id"], start, owner)
+        self.ledger.release(room["cabin_id"], start, owner)
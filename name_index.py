@@ -0,0 +1,187 @@
+"""Fuzzy attendee resolution and autocomplete over directory names, emails and aliases"""
+
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Set, Tuple
+
+from config import settings
+
+_WORD = re.compile(r"[a-z0-9]+")
+_LETTERS = re.compile(r"[a-z]+")
+
+
+def normalize_name(text: str) -> str:
+    """'Shubham S.' -> 'shubham s'"""
+    return " ".join(_WORD.findall((text or "").lower()))
+
+
+def trigrams(word: str) -> frozenset:
+    """Character trigrams of a word, padded with '$' so short words still have some"""
+    padded = f"${word}$"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _words(user: Dict[str, Any]) -> Set[str]:
+    """Words a user can be referred to by: name, email local part ('a.sharma2' -> a, sharma) and aliases"""
+    local = _LETTERS.findall((user.get("email") or "").split("@")[0].lower())
+    texts = [user.get("name"), *(user.get("aliases") or [])]
+    return {word for text in texts for word in normalize_name(text).split()} | set(local)
+
+
+class NameIndex:
+    """Trigram index over the words of directory names, emails and aliases.
+
+    Each query word is matched against the (small) word vocabulary by Dice
+    coefficient over character trigrams, generating candidates only from its
+    rarest trigrams. A user's score is the mean over query words of their
+    best-matching word; single letters only have to match one of their
+    words' initials.
+    """
+
+    def __init__(self, users: List[Dict[str, Any]], min_score: float = None, margin: float = None):
+        self.users = users
+        self.min_score = settings.name_match_min_score if min_score is None else min_score
+        self.margin = settings.name_match_margin if margin is None else margin
+        self._emails = {user["email"].lower(): position for position, user in enumerate(users) if user.get("email")}
+
+        word_ids: Dict[str, int] = {}
+        word_users: List[array] = []
+        user_words: List[Tuple[int, ...]] = []
+        for position, user in enumerate(users):
+            ids = []
+            for word in _words(user):
+                word_id = word_ids.setdefault(word, len(word_ids))
+                if word_id == len(word_users):
+                    word_users.append(array("i"))
+                word_users[word_id].append(position)
+                ids.append(word_id)
+            user_words.append(tuple(ids))
+
+        self._words = list(word_ids)
+        self._word_grams = [trigrams(word) for word in self._words]
+        self._word_users = word_users
+        self._user_words = user_words
+        postings: Dict[str, array] = defaultdict(lambda: array("i"))
+        for word_id, grams in enumerate(self._word_grams):
+            for gram in grams:
+                postings[gram].append(word_id)
+        self._postings = dict(postings)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def _similar_words(self, word: str) -> Dict[int, float]:
+        """Vocabulary words scoring at least min_score against `word`, as {word_id: score}"""
+        grams = trigrams(word)
+        # A word with Dice >= min_score shares at least `needed` trigrams with the query,
+        # so it must contain one of the len(grams) - needed + 1 rarest ones
+        needed = max(1, math.ceil(self.min_score * (len(grams) + 1) / 2))
+        rare = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))[:len(grams) - needed + 1]
+        matches = {}
+        for gram in rare:
+            for word_id in self._postings.get(gram, ()):
+                if word_id in matches:
+                    continue
+                other = self._word_grams[word_id]
+                matches[word_id] = 2 * len(grams & other) / (len(grams) + len(other))
+        return {word_id: score for word_id, score in matches.items() if score >= self.min_score}
+
+    def candidates(self, query: str, limit: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """Best-matching users as (score, user), highest first"""
+        email = (query or "").strip().lower()
+        if email in self._emails:
+            return [(1.0, self.users[self._emails[email]])]
+        words = normalize_name(email.split("@")[0] if "@" in email else email).split()
+        full = [word for word in words if len(word) > 1]
+        if not full:
+            return []
+        matches = [self._similar_words(word) for word in full]
+        initials = [word for word in words if len(word) == 1]
+
+        if len(words) == 1:
+            # Users in word-score order; the first word reaching a user is their best
+            ranked, seen = [], set()
+            for word_id, score in sorted(matches[0].items(), key=lambda item: item[1], reverse=True):
+                for position in self._word_users[word_id]:
+                    if position not in seen:
+                        seen.add(position)
+                        ranked.append((score, position))
+                if len(ranked) >= limit:
+                    break
+            return [(round(score, 3), self.users[position]) for score, position in ranked[:limit]]
+
+        # Candidates come from the word with the fewest matching users; every word must match
+        sizes = [sum(len(self._word_users[word_id]) for word_id in match) for match in matches]
+        seed = matches[sizes.index(min(sizes))]
+        candidates = {position for word_id in seed for position in self._word_users[word_id]}
+
+        scored = []
+        for position in candidates:
+            user_words = self._user_words[position]
+            total = 0.0
+            for match in matches:
+                best = max((match.get(word_id, 0.0) for word_id in user_words), default=0.0)
+                if best == 0.0:
+                    break
+                total += best
+            else:
+                if all(any(self._words[word_id][0] == initial for word_id in user_words) for initial in initials):
+                    scored.append((total / len(matches), position))
+        scored.sort(reverse=True)
+        return [(round(score, 3), self.users[position]) for score, position in scored[:limit]]
+
+    def resolve(self, query: str) -> Dict[str, Any]:
+        """{"status": "resolved" | "ambiguous" | "unknown", "user", "candidates"}.
+
+        The top candidate wins unless the runner-up is within `margin` of it;
+        an exact match only loses to another exact match.
+        """
+        candidates = self.candidates(query)
+        if not candidates:
+            return {"status": "unknown", "user": None, "candidates": []}
+        top = candidates[0][0]
+        close = [(score, user) for score, user in candidates if score >= (1.0 if top == 1.0 else top - self.margin)]
+        if len(close) == 1:
+            return {"status": "resolved", "user": candidates[0][1], "candidates": candidates}
+        return {"status": "ambiguous", "user": None, "candidates": close}
+
+
+def _prefix_keys(user: Dict[str, Any]) -> Set[str]:
+    """Strings autocomplete matches against: full name, each name word, email and aliases"""
+    names = [normalize_name(text) for text in (user.get("name"), *(user.get("aliases") or []))]
+    keys = {name for name in names if name} | {word for name in names for word in name.split()}
+    if user.get("email"):
+        keys.add(user["email"].lower())
+    return keys
+
+
+class PrefixIndex:
+    """Sorted-array prefix index for attendee autocomplete.
+
+    Every (key, user) pair is kept in one sorted list, so a lookup is a
+    binary search to the first key with the prefix followed by a short scan.
+    """
+
+    def __init__(self, users: List[Dict[str, Any]]):
+        self.users = users
+        entries = sorted((key, position) for position, user in enumerate(users) for key in _prefix_keys(user))
+        self._keys = [key for key, _ in entries]
+        self._positions = array("i", (position for _, position in entries))
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def complete(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Users with a name word, full name, email or alias starting with `query`, in key order"""
+        raw = (query or "").strip().lower()
+        prefixes = [prefix for prefix in dict.fromkeys((normalize_name(raw), raw)) if prefix]
+        found: Dict[int, None] = {}
+        for prefix in prefixes:
+            i = bisect_left(self._keys, prefix)
+            while i < len(self._keys) and len(found) < limit and self._keys[i].startswith(prefix):
+                found.setdefault(self._positions[i])
+                i += 1
+        return [self.users[position] for position in found]
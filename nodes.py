@@ -1,30 +1,34 @@
 """Graph nodes for the meeting scheduler workflow - Fixed for interrupts"""
 
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from state import SchedulingState, Attendee, TimeSlot, MeetingRoom
-from knowledge import AvailabilityKnowledge
 from tools import calendar_tool
 from config import settings
 from prompts import get_system_prompt
-from meeting_rooms import MeetingRoomManager
+import copy
 import json
 from json import loads, JSONDecodeError
+from langgraph.runtime import get_runtime
 from langgraph.types import interrupt
 from Backend.calendar_tools import create_calendar_event
-
-# Initialize components
-llm = ChatOpenAI(
-    model=settings.openai_model,
-    temperature=0.1,
-    api_key=settings.openai_api_key
+from components import Components, get_components
+from llm_transport import NOW, TODAY
+from recurrence import check_occurrences, describe_conflicts
+from slot_search import (
+    calendar_days, common_free_utc, find_common_slots, horizon_span, local_to_utc, render_slot, resolve_date, slot_to_utc,
+    to_minutes, unavailable_attendees, user_timezone,
 )
 
-knowledge = AvailabilityKnowledge()
-room_manager = MeetingRoomManager()
+def _components() -> Components:
+    """Components passed as the graph run's context, else the process-wide ones"""
+    try:
+        context = get_runtime(Components).context
+    except RuntimeError:  # called outside a graph run
+        context = None
+    return context or get_components()
 
 async def parse_request_node(state: SchedulingState) -> Dict[str, Any]:
     """Parse the initial meeting request to extract attendees and basic info"""
@@ -35,7 +39,7 @@ async def parse_request_node(state: SchedulingState) -> Dict[str, Any]:
     extraction_prompt = f"""
 Extract meeting details from this request: "{last_message}"
 
-Today's date is {datetime.today().strftime('%Y-%m-%d')} and current time is {datetime.now().strftime('%H:%M')}.
+Today's date is {TODAY} and current time is {NOW}.
 
 Return as JSON:
 {{
@@ -43,13 +47,15 @@ Return as JSON:
     "requested_date": "YYYY-MM-DD or relative date",
     "requested_time": "HH:MM",
     "duration_minutes": 60,
-    "urgency": "urgent/normal"
+    "urgency": "urgent/normal",
+    "meeting_format": "in-person/virtual",
+    "recurrence": "RRULE body for recurring meetings, e.g. FREQ=WEEKLY;BYDAY=MO or FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR;COUNT=10"
 }}
 
-If any field is not mentioned, use null.
+If any field is not mentioned, use null. Use null for recurrence unless the meeting repeats.
 """
     
-    response = await llm.ainvoke([HumanMessage(content=extraction_prompt)])
+    response = await _components().llm.ainvoke([HumanMessage(content=extraction_prompt)])
 
     content = response.content.strip()
     # Remove markdown code block if present
@@ -69,32 +75,39 @@ If any field is not mentioned, use null.
             "urgency": "normal"
         }
     
-    # Look up attendees in knowledge base
+    # Attendees picked in the client (autocomplete) arrive already resolved
+    selected = state.get("meeting_request", {}).get("attendee_emails") or []
     attendees = []
+    if selected:
+        attendees = [_attendee_entry(user) for user in await _components().knowledge.get_available_slots(selected)]
+    chosen = {att["email"].lower() for att in attendees}
+    
+    # Look up the rest in the knowledge base; near-ties are put to the user
     attendee_names = extracted.get("attendee_names", [])
+    resolution = {"users": [], "ambiguous": [], "unknown": []}
     
     if attendee_names:
-        search_results = await knowledge.get_available_slots(attendee_names)
-        
-        # Extract email from search results
-        for user in search_results:
-            attendees.append({
-                "name": user['name'],
-                "email": user['email'],
-                "base_location": user['base_location'],
-                "timezone": "Asia/Kolkata",
-                "is_available": None
-            })
+        resolution = await _components().knowledge.resolve_attendees(attendee_names)
+    attendees += [_attendee_entry(user) for user in resolution["users"] if user["email"].lower() not in chosen]
+    resolution["ambiguous"] = [
+        name for name in resolution["ambiguous"]
+        if not any(candidate["email"].lower() in chosen for candidate in name["candidates"])
+    ]
     
     # Update state
     state["meeting_request"]["raw_request"] = last_message
     state["meeting_request"]["requested_date"] = extracted.get("requested_date")
     state["meeting_request"]["requested_time"] = extracted.get("requested_time")
     state["meeting_request"]["duration_minutes"] = extracted.get("duration_minutes", 60)
+    state["meeting_request"]["meeting_format"] = extracted.get("meeting_format")
+    state["meeting_request"]["recurrence"] = extracted.get("recurrence")
     state["attendees"] = attendees
+    state["pending_attendees"] = resolution["ambiguous"]
     
     # Generate acknowledgment
-    if attendees:
+    if resolution["ambiguous"]:
+        response_text = "Let me confirm who you mean before checking schedules."
+    elif attendees:
         names = [a["name"] for a in attendees]
         names_str = " and ".join(names) if len(names) <= 2 else ", ".join(names[:-1]) + f", and {names[-1]}"
         
@@ -104,76 +117,80 @@ If any field is not mentioned, use null.
             response_text = f"Prioritizing this urgent meeting with {names_str}."
     else:
         response_text = "I couldn't identify the attendees. Could you please specify who should attend?"
+    if resolution["unknown"]:
+        response_text += f" I couldn't find {', '.join(resolution['unknown'])} in the directory."
     
     state["messages"].append(AIMessage(content=response_text))
-    state["current_step"] = "check_availability"
+    state["current_step"] = "disambiguate_attendees" if resolution["ambiguous"] else "check_availability"
     
     return state
 
+def _attendee_entry(user: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": user['name'],
+        "email": user['email'],
+        "base_location": _components().catalog.display_name(user.get('base_location') or user.get('location') or "Unknown"),
+        "timezone": user_timezone(user),
+        "is_available": None
+    }
+
 async def check_availability_node(state: SchedulingState) -> Dict[str, Any]:
-    """Check availability for all attendees using LLM to analyze and find common free slots"""
+    """Find common free slots with the zone-aware search; the LLM only parses the request and words the reply"""
     
     # Get current context
     attendees = state.get("attendees", [])
     meeting_request = state.get("meeting_request", {})
     user_message = state.get("messages", [])[-1].content if state.get("messages") else ""
-    current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    # Get availability data for attendees
-    availability_data = {}
-    if attendees:
-        attendee_names = [att.get("name", att) if isinstance(att, dict) else att for att in attendees]
-        try:
-            user_data_list = await knowledge.get_available_slots(attendee_names)
-            for i, name in enumerate(attendee_names):
-                if i < len(user_data_list) and user_data_list[i]:
-                    availability_data[name] = user_data_list[i]
-                else:
-                    # Default availability data
-                    availability_data[name] = {
-                        "calendar_events": {},
-                        "ooo_dates": [],
-                        "travel_dates": [],
-                        "preferred_hours": {"start": "09:00", "end": "17:00"},
-                        "timezone": "UTC"
-                    }
-        except Exception as e:
-            print(f"Error fetching availability data: {e}")
-            # Use default data for all attendees
-            for name in attendee_names:
-                availability_data[name] = {
-                    "calendar_events": {},
-                    "ooo_dates": [],
-                    "travel_dates": [],
-                    "preferred_hours": {"start": "09:00", "end": "17:00"},
-                    "timezone": "UTC"
-                }
-    
-    # LLM Prompt for availability analysis
-    prompt = f"""You are an intelligent meeting scheduler. Analyze the meeting request and attendee availability to find optimal meeting times.
+    if not attendees:
+        state["messages"].append(AIMessage(content="Please specify who should attend the meeting."))
+        state["current_step"] = "gather_more_info"
+        return state
+    
+    # Groups that meet often: answer from the precomputed snapshot, skipping the LLM
+    if await _answer_from_snapshot(state):
+        return state
+    
+    # Identical searches (e.g. a team all asking at once) share one computation; the reply wording stays per user
+    from_date = resolve_date(meeting_request.get("requested_date"))
+    user_data_list, slots = await _components().availability_flight.do(
+        await _availability_key(attendees, meeting_request, from_date),
+        lambda: _compute_slots(state, attendees, from_date)
+    )
+    # The result may be shared with other sessions; mutate a private copy
+    slots = await _attach_rooms(state, copy.deepcopy(slots))
+    unavailable = unavailable_attendees(user_data_list, from_date.strftime("%Y-%m-%d"))
+    
+    state["available_slots"] = slots
+    state["unavailable_attendees"] = unavailable
+    if slots:
+        state["target_date"] = slots[0]["date"]
+    
+    slots_text = "\n".join(
+        f"    {i}. {slot['date']} {slot['start_time']}-{slot['end_time']} ({slot.get('timezone')})"
+        for i, slot in enumerate(slots, 1)
+    ) or "    (none in the search horizon)"
+    
+    # LLM prompt: parse the request and word the reply around the computed slots
+    prompt = f"""You are an intelligent meeting scheduler. The free time slots below were already computed from every attendee's calendar and timezone; present them to the user.
 
     CONTEXT:
-    - Current date and time: {current_datetime}
-    - Business hours: 8:00 AM - 5:00 PM (Monday-Friday)
-    - Default meeting duration: 30 minutes if not specified
-    - Time slots are in 30-minute increments
+    - Current date and time: {TODAY} {NOW}
 
     INPUT:
     User Message: "{user_message}"
     Meeting Request: {json.dumps(meeting_request, indent=2)}
     Attendees: {json.dumps(attendees, indent=2)}
-    Availability Data: {json.dumps(availability_data, indent=2)}
+    Unavailable on {from_date.strftime("%Y-%m-%d")}: {json.dumps(unavailable)}
+    Available slots (use exactly these, with their timezone):
+{slots_text}
 
     TASK:
     1. Parse the meeting request and extract meeting details
-    2. Check each attendee's availability for conflicts (OOO, travel, existing meetings)
-    3. Find available 30-minute time slots within business hours
-    4. Consolidate consecutive slots and rank by preference
-    5. Generate a natural response with suggestions
+    2. Write a short, natural reply listing the available slots above (or explaining that there are none)
 
     RESPOND ONLY WITH VALID JSON in this exact format:
     {{
-    "status": "success|no_availability|attendee_unavailable|need_clarification",
     "parsed_request": {{
         "title": "extracted meeting title or purpose",
         "requested_date": "YYYY-MM-DD or 'today'|'tomorrow'|'flexible'",
@@ -181,157 +198,227 @@ async def check_availability_node(state: SchedulingState) -> Dict[str, Any]:
         "duration_minutes": 30,
         "priority": "high|medium|low"
     }},
-    "target_date": "YYYY-MM-DD",
-    "unavailable_attendees": [
-        {{
-        "name": "attendee name",
-        "reason": "out_of_office|traveling|busy",
-        "details": "specific conflict description"
-        }}
-    ],
-    "available_slots": [
-        {{
-        "date": "YYYY-MM-DD",
-        "start_time": "HH:MM",
-        "end_time": "HH:MM",
-        "duration_minutes": 30,
-        "confidence": "high|medium|low"
-        }}
-    ],
-    "response_message": "Natural language response to user with specific times and dates",
-    "follow_up_question": "Question if more info needed (null if none)",
-    "next_step": "select_time|reschedule|gather_more_info"
+    "response_message": "Natural language response to user with the specific times, dates and timezone",
+    "follow_up_question": "Question if more info needed (null if none)"
     }}
 
     RULES:
-    - Skip past times if checking today
-    - If attendees unavailable, suggest next available date
-    - Present max 3 best available slots
+    - Never invent, move or drop slots; only the listed ones are free
     - Use specific dates (e.g., "Thursday, August 8th") not relative terms
-    - Be conversational and helpful in response_message
-    - If missing critical info, ask follow-up questions"""
+    - Be conversational and helpful in response_message"""
     
+    llm_result = None
     try:
-        # Call LLM
-        response = await llm.ainvoke(prompt)
-        
-        # Parse LLM response
-        try:
-            llm_result = json.loads(response.content)
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            # Try to clean up the response and parse again
-            cleaned_content = response.content.strip()
-            if cleaned_content.startswith("```"):
-                cleaned_content = cleaned_content.split("```")[-2] if cleaned_content.count("```") >= 2 else cleaned_content
-                cleaned_content = cleaned_content.replace("json", "").strip()
-            try:
-                llm_result = json.loads(cleaned_content)
-            except Exception as e2:
-                print(f"Second JSON parsing error: {e2}")
-                # Fallback response
-                state["messages"].append(AIMessage(content="I need more information to check availability. Could you please specify the attendees and preferred time?"))
-                state["current_step"] = "gather_more_info"
-                return state
-        
-        # Update state with parsed information
-        if llm_result.get("parsed_request"):
-            parsed = llm_result["parsed_request"]
-            state["meeting_request"].update({
-                "title": parsed.get("title"),
-                "requested_date": parsed.get("requested_date"),
-                "requested_time": parsed.get("requested_time"),
-                "duration_minutes": parsed.get("duration_minutes", 30),
-                "priority": parsed.get("priority", "medium")
-            })
-        
-        # Update available slots
-        state["available_slots"] = llm_result.get("available_slots", [])
-        state["unavailable_attendees"] = llm_result.get("unavailable_attendees", [])
-        if llm_result.get("target_date"):
-            state["target_date"] = llm_result["target_date"]
-        
-        # Store follow-up question and suggestions
-        if llm_result.get("follow_up_question"):
-            state["follow_up_question"] = llm_result["follow_up_question"]
-        if llm_result.get("suggested_actions"):
-            state["suggested_actions"] = llm_result["suggested_actions"]
-        
-        # Add response message
-        response_message = llm_result.get("response_message", "I've checked availability for you.")
-        state["messages"].append(AIMessage(content=response_message))
-        
-        # Set next step - this is key for interrupts to work
-        if llm_result.get("available_slots"):
-            state["current_step"] = "select_time"  # This will trigger human_time_selection interrupt
-        else:
-            state["current_step"] = llm_result.get("next_step", "select_time")
-        
-        # Store full LLM analysis for debugging
-        state["llm_analysis"] = llm_result
-        
-        return state
-        
+        llm_result = await _analyze_availability(prompt)
     except Exception as e:
-        print(f"Error in LLM availability check: {e}")
-        
-        # Fallback to original logic if LLM fails
-        if not attendees:
-            state["messages"].append(AIMessage(content="Please specify who should attend the meeting."))
-            state["current_step"] = "gather_more_info"
-            return state
-        
-        # Simple fallback availability check
-        requested_date = state["meeting_request"].get("requested_date", "today")
-        if requested_date == "today":
-            check_date = datetime.today()
-        elif requested_date == "tomorrow":
-            check_date = datetime.today() + timedelta(days=1)
-        else:
-            try:
-                check_date = datetime.strptime(requested_date, "%Y-%m-%d")
-            except:
-                check_date = datetime.today()
-        
-        # Basic availability slots (fallback)
-        current_time = datetime.now()
-        available_slots = []
-        
-        for hour in range(9, 17):  # 9 AM to 5 PM
-            for minute in [0, 30]:
-                slot_start = check_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                slot_end = slot_start + timedelta(minutes=30)
-                
-                # Skip past times
-                if check_date.date() == datetime.today().date() and slot_start <= current_time:
-                    continue
-                
-                available_slots.append({
-                    "date": check_date.strftime("%Y-%m-%d"),
-                    "start_time": slot_start.strftime("%H:%M"),
-                    "end_time": slot_end.strftime("%H:%M"),
-                    "duration_minutes": 30
-                })
-                
-                if len(available_slots) >= 3:  # Limit to 3 slots
-                    break
-            if len(available_slots) >= 3:
-                break
-        
-        state["available_slots"] = available_slots
-        
-        if available_slots:
-            date_str = "today" if check_date.date() == datetime.today().date() else check_date.strftime("%A, %B %d")
-            slots_text = "\n".join([f"• {slot['start_time']} - {slot['end_time']}" for slot in available_slots])
-            response_text = f"Here are some available times {date_str}:\n{slots_text}\n\nWhich time works for you?"
-            state["current_step"] = "select_time"  # This will trigger human_time_selection interrupt
-        else:
-            response_text = f"No availability found on {check_date.strftime('%B %d')}. Should I check the next day?"
-            state["current_step"] = "gather_more_info"
-        
-        state["messages"].append(AIMessage(content=response_text))
-        
-        return state
+        print(f"Error in LLM availability wording: {e}")
+    llm_result = llm_result if isinstance(llm_result, dict) else {}
+    
+    # Update state with parsed information
+    if llm_result.get("parsed_request"):
+        parsed = llm_result["parsed_request"]
+        state["meeting_request"].update({
+            "title": parsed.get("title"),
+            "requested_date": parsed.get("requested_date"),
+            "requested_time": parsed.get("requested_time"),
+            "duration_minutes": parsed.get("duration_minutes", 30),
+            "priority": parsed.get("priority", "medium")
+        })
+    if llm_result.get("follow_up_question"):
+        state["follow_up_question"] = llm_result["follow_up_question"]
+    if llm_result.get("suggested_actions"):
+        state["suggested_actions"] = llm_result["suggested_actions"]
+    
+    # Deterministic wording when the LLM gave none
+    if slots:
+        response_message = llm_result.get("response_message") or _next_available_message(user_data_list, from_date, slots)
+        state["current_step"] = "select_time"  # This will trigger human_time_selection interrupt
+    else:
+        response_message = llm_result.get("response_message") or (
+            f"No common availability in the next {settings.slot_search_horizon_days} business days from "
+            f"{from_date.strftime('%B %d')}. Should I look further out?"
+        )
+        state["current_step"] = "gather_more_info"
+    state["messages"].append(AIMessage(content=response_message))
+    
+    # Store the LLM analysis for debugging
+    state["llm_analysis"] = llm_result
+    
+    return state
+
+async def _requested_slot(state: SchedulingState, users: List[Dict[str, Any]], day) -> Optional[Dict[str, Any]]:
+    """The exact time asked for ("14:00" on `day`, in the first attendee's zone) if every attendee is free then"""
+    requested_time = state["meeting_request"].get("requested_time")
+    if not users or not requested_time:
+        return None
+    try:
+        minute = to_minutes(requested_time)
+    except (AttributeError, ValueError):
+        return None
+    zone = user_timezone(users[0])
+    start = local_to_utc(zone, day, minute)
+    end = start + (state["meeting_request"].get("duration_minutes") or settings.default_meeting_duration)
+    busy = await _components().knowledge.merged_busy(users, (start, end))
+    if any(free_start <= start and end <= free_end for free_start, free_end in common_free_utc(users, (start, end), busy)):
+        return render_slot(start, end, users, zone)
+    return None
+
+async def _compute_slots(state: SchedulingState, attendees: List[Any], from_date) -> tuple:
+    """Attendees' calendars and the best common slots from `from_date`, the requested time first if everyone is free"""
+    user_data_list = []
+    try:
+        user_data_list = await _components().knowledge.get_available_slots(
+            [att.get("email") or att.get("name") if isinstance(att, dict) else att for att in attendees],
+            calendar_days(from_date),
+        )
+    except Exception as e:
+        print(f"Error fetching availability data: {e}")
+    if not user_data_list:
+        return user_data_list, []
+    
+    slots = await _search_slots(state, user_data_list, from_date)
+    requested = await _requested_slot(state, user_data_list, from_date)
+    if requested:
+        slots = [requested] + [slot for slot in slots if slot["start_utc"] != requested["start_utc"]]
+    return user_data_list, slots[:settings.slot_suggestions_k]
+
+async def _availability_key(attendees: List[Any], meeting_request: Dict[str, Any], from_date) -> tuple:
+    """Single-flight key: everything _compute_slots reads besides the calendars, plus their data version"""
+    emails = tuple(sorted(
+        (att.get("email") or att.get("name") or "").lower() if isinstance(att, dict) else str(att).lower()
+        for att in attendees
+    ))
+    window = (
+        datetime.today().strftime("%Y-%m-%d"),
+        from_date.isoformat(),
+        meeting_request.get("requested_time"),
+    )
+    return (
+        emails,
+        window,
+        meeting_request.get("duration_minutes"),
+        meeting_request.get("meeting_format"),
+        await _components().knowledge.data_version(),
+    )
+
+async def _analyze_availability(prompt: str):
+    """Run the LLM availability analysis; None if its JSON cannot be parsed"""
+    response = await _components().llm.ainvoke(prompt)
+    try:
+        return json.loads(response.content)
+    except json.JSONDecodeError as e:
+        print(f"JSON parsing error: {e}")
+        # Try to clean up the response and parse again
+        cleaned_content = response.content.strip()
+        if cleaned_content.startswith("```"):
+            cleaned_content = cleaned_content.split("```")[-2] if cleaned_content.count("```") >= 2 else cleaned_content
+            cleaned_content = cleaned_content.replace("json", "").strip()
+        try:
+            return json.loads(cleaned_content)
+        except Exception as e2:
+            print(f"Second JSON parsing error: {e2}")
+            return None
+
+def _colocated_office(state: SchedulingState):
+    """The office all attendees share, if it has meeting rooms"""
+    locations = {attendee.get("base_location") for attendee in state.get("attendees", [])}
+    if len(locations) == 1:
+        location = locations.pop()
+        if location and _components().room_manager.catalog.has_location(location):
+            return location
+    return None
+
+async def _search_slots(state: SchedulingState, users: List[Dict[str, Any]], from_date) -> List[Dict[str, Any]]:
+    """Deterministic slot search; co-located in-person meetings also need a free cabin"""
+    duration = state["meeting_request"].get("duration_minutes") or settings.default_meeting_duration
+    office = _colocated_office(state)
+    meeting_format = state["meeting_request"].get("meeting_format")
+    
+    # Never set when a cabin search is needed
+    snapshot = await _snapshot_lookup(state, from_date)
+    if snapshot:
+        return snapshot["slots"]
+    
+    # Both searches read the same Postgres busy time (None: the attendees' calendars)
+    busy = await _components().knowledge.merged_busy(users, horizon_span(from_date))
+    if office and meeting_format != "virtual":
+        slots = await _components().room_manager.find_slots_with_rooms(users, office, from_date, duration, busy=busy)
+        if slots or meeting_format == "in-person":
+            return slots
+    
+    return find_common_slots(users, from_date, duration_minutes=duration, busy=busy)
+
+async def _snapshot_lookup(state: SchedulingState, from_date):
+    """Precomputed slots for this attendee group, unless a cabin search is needed"""
+    attendees = state.get("attendees", [])
+    if not attendees or not all(isinstance(att, dict) and att.get("email") for att in attendees):
+        return None
+    if _colocated_office(state) and state["meeting_request"].get("meeting_format") != "virtual":
+        return None
+    duration = state["meeting_request"].get("duration_minutes") or settings.default_meeting_duration
+    return await _components().slot_snapshots.lookup([att["email"] for att in attendees], duration, from_date)
+
+async def _answer_from_snapshot(state: SchedulingState) -> bool:
+    """Fill slots and the reply from a snapshot when no specific time was asked for"""
+    meeting_request = state.get("meeting_request", {})
+    if meeting_request.get("requested_time") not in (None, "", "flexible"):
+        return False
+    from_date = resolve_date(meeting_request.get("requested_date"))
+    snapshot = await _snapshot_lookup(state, from_date)
+    if not snapshot:
+        return False
+
+    slots = snapshot["slots"][:settings.slot_suggestions_k]
+    state["available_slots"] = slots
+    state["unavailable_attendees"] = unavailable_attendees(snapshot["users"], from_date.strftime("%Y-%m-%d"))
+    state["target_date"] = slots[0]["date"]
+    state["messages"].append(AIMessage(content=_next_available_message(snapshot["users"], from_date, slots)))
+    state["current_step"] = "select_time"
+    return True
+
+async def _attach_rooms(state: SchedulingState, slots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Annotate slots with free cabins for co-located attendees; drop roomless slots for in-person requests"""
+    office = _colocated_office(state)
+    if not office:
+        return slots
+    
+    room_manager = _components().room_manager
+    bounds = []
+    for slot in slots:
+        try:
+            bounds.append(slot_to_utc(slot))
+        except (KeyError, ValueError):
+            continue
+    if bounds:
+        await room_manager.refresh_between(min(start for start, _ in bounds), max(end for _, end in bounds))
+    
+    num_attendees = len(state.get("attendees", []))
+    in_person = state["meeting_request"].get("meeting_format") == "in-person"
+    annotated = []
+    for slot in slots:
+        try:
+            slot["rooms"] = room_manager.get_available_rooms(office, num_attendees, slot)
+        except (KeyError, ValueError):
+            continue
+        if slot["rooms"] or not in_person:
+            annotated.append(slot)
+    return annotated
+
+def _next_available_message(users: List[Dict[str, Any]], requested, slots: List[Dict[str, Any]]) -> str:
+    """Summarize the earliest common slots, noting when the requested day was skipped"""
+    requested_str = requested.strftime("%Y-%m-%d")
+    slots_text = "\n".join([f"• {slot['date']} {slot['start_time']} - {slot['end_time']}" for slot in slots])
+    
+    if slots[0]["date"] == requested_str:
+        return f"Here are the best available times:\n{slots_text}\n\nWhich time works for you?"
+    
+    unavailable = unavailable_attendees(users, requested_str)
+    if unavailable:
+        names = ", ".join(u["name"] for u in unavailable)
+        reason = f"{names} isn't available on {requested.strftime('%B %d')}"
+    else:
+        reason = f"There's no common free time on {requested.strftime('%B %d')}"
+    return f"{reason}. Next available times:\n{slots_text}\n\nWhich time works for you?"
 
 async def gather_details_node(state: SchedulingState) -> Dict[str, Any]:
     """Gather meeting details like time selection and agenda - Updated for interrupts"""
@@ -372,7 +459,7 @@ Generate a brief, professional meeting title (max 5 words) for this agenda: "{la
 Return only the title, nothing else.
 """
         
-        title_response = await llm.ainvoke([HumanMessage(content=title_prompt)])
+        title_response = await _components().llm.ainvoke([HumanMessage(content=title_prompt)])
         state["meeting_title"] = title_response.content.strip()
         state["meeting_description"] = f"Meeting scheduled by AI Assistant. Agenda: {last_message}"
         
@@ -406,10 +493,15 @@ async def determine_format_node(state: SchedulingState) -> Dict[str, Any]:
     
     num_attendees = len(state["attendees"])
     
+    # Only offer rooms that are still free for the chosen slot
+    selected_slot = state.get("selected_slot")
+    if selected_slot:
+        await _components().room_manager.refresh_bookings(selected_slot)
+    
     if state["same_location"]:
         # Same location - offer both options
         location = unique_locations[0]
-        room_options = room_manager.get_available_rooms(location, num_attendees)
+        room_options = _components().room_manager.get_available_rooms(location, num_attendees, selected_slot)
         
         response = f"All attendees are in {location}. Do you prefer a virtual or in-person meeting?"
         
@@ -440,7 +532,7 @@ async def determine_format_node(state: SchedulingState) -> Dict[str, Any]:
         room_options_by_location = {}
         for location, names in location_attendees.items():
             if location != "Unknown":
-                rooms = room_manager.get_available_rooms(location, len(names))
+                rooms = _components().room_manager.get_available_rooms(location, len(names), selected_slot)
                 if rooms:
                     room_options_by_location[location] = rooms
         
@@ -475,7 +567,7 @@ async def process_format_selection_node(state: SchedulingState) -> Dict[str, Any
         state["meeting_format"] = "in-person"
         
         # Check if user specified a cabin
-        cabin_pattern = r'([A-Z]\d[A-Z]\d)'  # Matches patterns like M1C5, C2C3
+        cabin_pattern = r'([A-Z]{1,2}\d[A-Z]\d)'  # Matches patterns like M1C5, C2C3, NY1C2
         cabin_match = re.search(cabin_pattern, last_message.upper())
         
         if cabin_match:
@@ -531,6 +623,13 @@ async def confirm_meeting_node(state: SchedulingState) -> Dict[str, Any]:
     
     return state
 
+async def _release_room_booking(state: SchedulingState):
+    """Give back the cabin this session holds, if any"""
+    booking = state.get("room_booking")
+    if booking:
+        await _components().room_manager.release_room(booking["room"], booking["slot"], state.get("session_id", ""))
+        state["room_booking"] = None
+
 async def send_invites_node(state: SchedulingState) -> Dict[str, Any]:
     """Send calendar invitations"""
     
@@ -544,6 +643,10 @@ async def send_invites_node(state: SchedulingState) -> Dict[str, Any]:
     else:
         location = "Online"
 
+    # Slot times are wall-clock times in the slot's zone (the organizer-facing zone)
+    attendees = state.get("attendees", [])
+    slot_timezone = slot.get("timezone") or (attendees[0].get("timezone") if attendees else None) or settings.default_timezone
+
     # Now create the tool call message
     tool_call_message = create_calendar_event(
         title=state.get("meeting_title"),
@@ -552,7 +655,9 @@ async def send_invites_node(state: SchedulingState) -> Dict[str, Any]:
         duration_hours=slot.get("duration_hours", 1),
         attendee_emails=[a["email"] for a in state["attendees"]],
         location=location,
-        description=state.get("meeting_description", "")
+        description=state.get("meeting_description", ""),
+        timezone=slot_timezone,
+        recurrence=state.get("meeting_request", {}).get("recurrence")
     )
 
     
@@ -560,14 +665,27 @@ async def send_invites_node(state: SchedulingState) -> Dict[str, Any]:
         "title": state.get("meeting_title", "Meeting"),
         "date": slot["date"],
         "time": slot["start_time"],
+        "timezone": slot_timezone,
         "duration_minutes": slot["duration_minutes"],
         "attendee_emails": [a["email"] for a in state["attendees"]],
         "location": state["meeting_room"]["cabin_id"] if state.get("meeting_room") else "Online",
         "description": state.get("meeting_description", "Meeting scheduled by AI Assistant")
     }
+    if state.get("meeting_request", {}).get("recurrence"):
+        report = state.get("recurrence_report") or {}
+        state["meeting_details"]["recurrence"] = state["meeting_request"]["recurrence"]
+        if report.get("conflicting"):
+            state["meeting_details"]["conflicting_occurrences"] = [
+                occurrence["date"] for occurrence in report["occurrences"] if occurrence["conflicts"]
+            ]
     
     state["messages"].append(tool_call_message)
     tool_call_message_json  = json.loads(tool_call_message)
+    if tool_call_message_json.get("status") == "success":
+        _components().slot_snapshots.record(state["meeting_details"]["attendee_emails"], slot["duration_minutes"])
+    else:
+        # No event was created, so the cabin held for it must not stay booked
+        await _release_room_booking(state)
     if tool_call_message_json.get("emails_sent", False):
         formatted_details = format_meeting_details(state['meeting_details'])
         state["messages"].append(AIMessage(content=f"✅ Invites sent successfully!<br><br>{formatted_details}"))
@@ -596,6 +714,8 @@ def route_conversation(state: SchedulingState) -> str:
     
     if current_step == "parse_request":
         return "parse_request"
+    elif current_step == "disambiguate_attendees":
+        return "human_attendee_selection"
     elif current_step == "check_availability":
         return "check_availability"
     elif current_step == "select_time":
@@ -632,7 +752,16 @@ async def human_time_selection_node(state: SchedulingState) -> Dict[str, Any]:
     # Format slots for display to user
     slots_display = []
     for i, slot in enumerate(available_slots, 1):
-        slots_display.append(f"{i}. {slot['date']} from {slot['start_time']} to {slot['end_time']}")
+        line = f"{i}. {slot['date']} from {slot['start_time']} to {slot['end_time']}"
+        if slot.get("timezone"):
+            line += f" ({slot['timezone']})"
+        # Show each attendee's local time when they are spread across zones
+        attendee_times = slot.get("attendee_times") or {}
+        if len({time.split("(")[-1] for time in attendee_times.values()}) > 1:
+            line += "".join(f"\n       {name}: {time}" for name, time in attendee_times.items())
+        if slot.get("rooms"):
+            line += f" — cabins free: {', '.join(room['cabin_id'] for room in slot['rooms'][:2])}"
+        slots_display.append(line)
  
     # Create a friendly, natural-language message for the user
     display_message = f"""
@@ -675,7 +804,7 @@ async def human_time_selection_node(state: SchedulingState) -> Dict[str, Any]:
     try:
         
  
-        llm_response = await llm.ainvoke([
+        llm_response = await _components().llm.ainvoke([
             SystemMessage(content=llm_prompt),
             HumanMessage(content=str(user_selection))
         ])
@@ -748,7 +877,10 @@ async def human_format_selection_node(state: SchedulingState) -> Dict[str, Any]:
         "same_location": {same_location},
         "format_options": {format_options},
         "available_rooms": {room_info},
-        "instructions": "Type 'virtual' for online meeting, 'in-person' for office meeting, or specify cabin ID (e.g., 'M1C5')"""
+        "instructions": "Type 'virtual' for online meeting, 'in-person' for office meeting, or specify cabin ID (e.g., 'M1C5')""",
+        "format_options": format_options,
+        "available_rooms": available_rooms,
+        "context": "format_selection"
     }
     
     # Get user's format choice
@@ -793,6 +925,57 @@ async def human_format_selection_node(state: SchedulingState) -> Dict[str, Any]:
     })
     return state
 
+async def human_attendee_selection_node(state: SchedulingState) -> Dict[str, Any]:
+    """Human intervention to pick between closely matching directory entries for an attendee"""
+    
+    pending = list(state.get("pending_attendees") or [])
+    if not pending:
+        state["current_step"] = "check_availability"
+        return state
+    
+    ambiguous = pending[0]
+    candidates = ambiguous["candidates"]
+    options = "\n".join(f"{i}. {c['name']} ({c['email']})" for i, c in enumerate(candidates, 1))
+    interrupt_data = {
+        "message": f"I found several people matching '{ambiguous['name']}':\n{options}\nWhich one did you mean?",
+        "name": ambiguous["name"],
+        "candidates": candidates,
+        "instructions": "Enter the number, name or email of the right person",
+        "context": "attendee_selection"
+    }
+    
+    choice = str(interrupt(interrupt_data) or "").strip().lower()
+    
+    selected = None
+    if choice.isdigit() and 1 <= int(choice) <= len(candidates):
+        selected = candidates[int(choice) - 1]
+    else:
+        matches = [c for c in candidates if choice and (choice == c["email"].lower() or choice in c["name"].lower())]
+        if len(matches) == 1:
+            selected = matches[0]
+    
+    if selected is None:
+        # Unclear answer, ask again
+        state["current_step"] = "disambiguate_attendees"
+        state["messages"].append({
+            "content": f"Please pick one of the listed people for '{ambiguous['name']}'.",
+            "type": "system"
+        })
+        return state
+    
+    users = await _components().knowledge.get_available_slots([selected["email"]])
+    attendees = list(state.get("attendees") or [])
+    if users and all(att.get("email") != users[0]["email"] for att in attendees):
+        attendees.append(_attendee_entry(users[0]))
+    state["attendees"] = attendees
+    state["pending_attendees"] = pending[1:]
+    state["current_step"] = "disambiguate_attendees" if pending[1:] else "check_availability"
+    state["messages"].append({
+        "content": f"Added {selected['name']} ({selected['email']}).",
+        "type": "system"
+    })
+    return state
+
 async def human_agenda_input_node(state: SchedulingState) -> Dict[str, Any]:
     """Human intervention for meeting agenda input"""
     
@@ -804,7 +987,8 @@ async def human_agenda_input_node(state: SchedulingState) -> Dict[str, Any]:
         "message": "Please provide the meeting topic/agenda:",
         "selected_slot": selected_slot,
         "attendees": [att.get("name", att) for att in attendees],
-        "instructions": "Enter the meeting purpose, topic, or agenda"
+        "instructions": "Enter the meeting purpose, topic, or agenda",
+        "context": "agenda_input"
     }
     
     # Get meeting agenda from user
@@ -856,6 +1040,28 @@ async def human_confirmation_node(state: SchedulingState) -> Dict[str, Any]:
     time_str = f"{selected_slot.get('start_time', 'TBD')} - {selected_slot.get('end_time', 'TBD')}"
     location_str = meeting_room.get("cabin_id", "Online") if meeting_format == "in-person" else "Virtual"
     
+    # For a series, report which occurrences clash instead of refusing the whole series
+    recurrence = state.get("meeting_request", {}).get("recurrence")
+    recurrence_str = ""
+    if recurrence and selected_slot:
+        try:
+            first_day = datetime.strptime(selected_slot["date"], "%Y-%m-%d").date()
+            days = (first_day - timedelta(days=1), first_day + timedelta(days=settings.recurrence_horizon_days + 1))
+            users = await _components().knowledge.get_available_slots(
+                [att.get("email") or att.get("name") for att in attendees], days
+            )
+            report = check_occurrences(users, recurrence, selected_slot)
+            state["recurrence_report"] = report
+            recurrence_str = f"\n            - Repeats: {report['rule']}\n\n            {describe_conflicts(report)}\n"
+        except (ValueError, TypeError) as e:
+            print(f"Invalid recurrence rule {recurrence!r}: {e}")
+            # Tell the user before falling back to a single meeting, so they can edit or cancel instead
+            state["meeting_request"]["recurrence"] = None
+            state["recurrence_report"] = {"rule": recurrence, "error": str(e)}
+            notice = f"I could not understand the recurrence '{recurrence}' ({e}), so only a single meeting would be scheduled."
+            state["messages"].append(AIMessage(content=notice))
+            recurrence_str = f"\n            - Repeats: NO. {notice} Type 'cancel' and ask again with a clearer rule if you need a series.\n"
+    
     # Prepare interrupt data
     interrupt_data = {
         "message":  f"""Please review and confirm this meeting:
@@ -866,11 +1072,12 @@ async def human_confirmation_node(state: SchedulingState) -> Dict[str, Any]:
             - Time: {time_str}
             - Attendees: {attendee_names}
             - Location: {location_str}
-            - Agenda: {meeting_agenda}
+            - Agenda: {meeting_agenda}{recurrence_str}
 
             Instructions:
             Type 'confirm' to proceed, 'cancel' to abort, or 'edit' to make changes.
-            """
+            """,
+        "context": "confirmation"
     }
     
     # Get user confirmation
@@ -879,6 +1086,20 @@ async def human_confirmation_node(state: SchedulingState) -> Dict[str, Any]:
     confirmation_lower = str(user_confirmation).lower()
     
     if "confirm" in confirmation_lower:
+        # Hold the cabin before sending invites; another session may have taken it meanwhile
+        await _release_room_booking(state)
+        if meeting_format == "in-person" and meeting_room and selected_slot:
+            booked = await _components().room_manager.book_room(meeting_room, selected_slot, state.get("session_id", ""))
+            if booked:
+                state["room_booking"] = {"room": meeting_room, "slot": selected_slot}
+            else:
+                state["meeting_room"] = None
+                state["current_step"] = "determine_format"
+                state["messages"].append({
+                    "content": f"Cabin {meeting_room['cabin_id']} was just booked by someone else for this time. Let's pick another option.", 
+                    "type": "system"
+                })
+                return state
         state["confirmation_status"] = True
         state["current_step"] = "send_invites"
         state["messages"].append({
@@ -887,6 +1108,7 @@ async def human_confirmation_node(state: SchedulingState) -> Dict[str, Any]:
         })
         return state
     elif "cancel" in confirmation_lower:
+        await _release_room_booking(state)
         state["confirmation_status"] = False
         state["current_step"] = "complete"
         state["messages"].append({
@@ -895,6 +1117,7 @@ async def human_confirmation_node(state: SchedulingState) -> Dict[str, Any]:
         })
         return state
     elif "edit" in confirmation_lower:
+        await _release_room_booking(state)
         state["current_step"] = "get_agenda"
         state["messages"].append({
             "content": "Let's edit the meeting details. What's the meeting topic?", 
@@ -917,6 +1140,8 @@ def route_with_interrupts(state: SchedulingState) -> str:
     
     if current_step == "parse_request":
         return "parse_request"
+    elif current_step == "disambiguate_attendees":
+        return "human_attendee_selection"
     elif current_step == "check_availability":
         return "check_availability"
     elif current_step == "select_time":
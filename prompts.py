@@ -1,7 +1,9 @@
 from datetime import datetime
+from typing import Optional
+from room_catalog import RoomCatalog, get_room_catalog
 
-def get_system_prompt():
-    """Get the system prompt with current date/time"""
+def get_system_prompt(catalog: Optional[RoomCatalog] = None):
+    """Get the system prompt with current date/time and the rooms of `catalog` (the process-wide one by default)"""
     return f"""You are an intelligent Calendar Assistant Agent that helps users schedule meetings through brief, clear conversations.
 
 Today's date is {datetime.today().strftime('%Y-%m-%d')} and current time is {datetime.now().strftime('%H:%M')}.
@@ -122,18 +124,7 @@ CRITICAL RULES:
 
 Office Locations and Meeting Rooms:
 select the below office location cabins based on the number of people attending the meeting and their base location.
-- New York office:
-   • floor 1 Cabin M1C5 (5-person capacity)
-   • floor 2 Cabin M2C3 (3-person capacity)
-   • floor 2 Cabin M2C2 (2-person capacity)
-- Chicago office:
-   • floor 1 Cabin C1C5 (5-person capacity)
-   • floor 2 Cabin C2C3 (3-person capacity)
-   • floor 2 Cabin C2C2 (2-person capacity)
-- San Francisco office:
-   • floor 1 Cabin S1C5 (5-person capacity)
-   • floor 2 Cabin S2C3 (3-person capacity)
-   • floor 2 Cabin S2C2 (2-person capacity)
+{(catalog or get_room_catalog()).describe()}
 
 **REMINDER: Before suggesting ANY time, ask yourself: "Is this time AFTER {datetime.now().strftime('%H:%M')}?" If no, don't suggest it.**
 
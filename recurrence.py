@@ -0,0 +1,192 @@
+"""Recurring meetings: lazy RRULE expansion and per-occurrence conflict checks"""
+
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from dateutil.rrule import rrulestr
+
+from config import settings
+from slot_search import (
+    MINUTES_PER_DAY,
+    busy_intervals,
+    local_to_utc,
+    merge_intervals,
+    to_hhmm,
+    user_timezone,
+    utc_minutes_to_iso,
+)
+
+
+def normalize_rrule(rule: str) -> str:
+    """'RRULE:FREQ=WEEKLY;BYDAY=MO' or 'freq=weekly;byday=mo' -> 'FREQ=WEEKLY;BYDAY=MO'"""
+    rule = rule.strip()
+    if rule.upper().startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+    return rule.upper()
+
+
+_UNTIL = re.compile(r"UNTIL=(\d{8})(?:T(\d{6}))?(Z?)")
+_COUNT = re.compile(r"COUNT=(\d+)")
+
+
+def _utc_until(rule: str, zone: ZoneInfo) -> str:
+    """Rewrite a floating UNTIL (local date or time) as UTC, as dateutil requires for a zoned DTSTART"""
+    def to_utc(match: re.Match) -> str:
+        if match.group(3):
+            return match.group(0)
+        # A date-only UNTIL includes that whole local day
+        local = datetime.strptime(match.group(1) + (match.group(2) or "235959"), "%Y%m%d%H%M%S").replace(tzinfo=zone)
+        return f"UNTIL={local.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+    return _UNTIL.sub(to_utc, rule)
+
+
+def iter_occurrences(
+    rule: str,
+    first_day: date,
+    start_minute: int,
+    horizon_days: Optional[int] = None,
+    max_count: Optional[int] = None,
+    zone: Optional[str] = None,
+) -> Iterator[datetime]:
+    """Lazily yield local wall-clock starts of a series, bounded by horizon and count.
+
+    DTSTART is placed in the organizer's zone, so UTC (...Z) and floating
+    UNTIL values both work, and it is always the first occurrence, as in
+    RFC 5545, even when BYDAY/BYMONTHDAY would skip its day. dateutil's
+    rrule is itself a lazy iterator, so open-ended rules ("every weekday")
+    only expand as far as they are consumed.
+    """
+    horizon_days = horizon_days or settings.recurrence_horizon_days
+    max_count = max_count or settings.recurrence_max_occurrences
+    tz = ZoneInfo(zone or settings.default_timezone)
+    dtstart = datetime.combine(first_day, datetime.min.time(), tz) + timedelta(minutes=start_minute)
+    until = dtstart + timedelta(days=horizon_days)
+
+    rule = normalize_rrule(rule)
+    series = rrulestr(_utc_until(rule, tz), dtstart=dtstart, forceset=True)
+    series.rdate(dtstart)
+    # COUNT includes DTSTART, whether or not the rule itself produces it
+    count_limit = _COUNT.search(rule)
+    if count_limit:
+        max_count = min(max_count, int(count_limit.group(1)))
+    for count, occurrence in enumerate(series):
+        if count >= max_count or occurrence > until:
+            return
+        yield occurrence
+
+
+def _day_intervals(zone: str, days: List[str], span: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Whole local days (YYYY-MM-DD) inside a UTC span, as UTC minute intervals"""
+    intervals = []
+    for day_str in days:
+        day = datetime.strptime(day_str, "%Y-%m-%d").date()
+        start = local_to_utc(zone, day, 0)
+        end = start + MINUTES_PER_DAY
+        if start < span[1] and end > span[0]:
+            intervals.append((start, end))
+    return merge_intervals(intervals)
+
+
+def _event_intervals(user: Dict[str, Any], zone: str, span: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """A user's calendar events inside a UTC span, merged"""
+    intervals = []
+    for day_str in user.get("calendar_events", {}):
+        day = datetime.strptime(day_str, "%Y-%m-%d").date()
+        for start, end in busy_intervals(user, day_str):
+            start_utc, end_utc = local_to_utc(zone, day, start), local_to_utc(zone, day, end)
+            if start_utc < span[1] and end_utc > span[0]:
+                intervals.append((start_utc, end_utc))
+    return merge_intervals(intervals)
+
+
+def _overlapping(starts: np.ndarray, ends: np.ndarray, intervals: List[Tuple[int, int]]) -> np.ndarray:
+    """Boolean mask of occurrences overlapping any of the sorted, disjoint intervals.
+
+    Only the last interval starting before an occurrence ends can overlap
+    it, so one searchsorted finds every candidate at once.
+    """
+    if not intervals:
+        return np.zeros(len(starts), dtype=bool)
+    busy = np.asarray(intervals, dtype=np.int64)
+    idx = np.searchsorted(busy[:, 0], ends, side="left") - 1
+    return (idx >= 0) & (busy[np.maximum(idx, 0), 1] > starts)
+
+
+def check_occurrences(
+    users: List[Dict[str, Any]],
+    rule: str,
+    first_slot: Dict[str, Any],
+    horizon_days: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Expand a series from its first slot and report which occurrences conflict.
+
+    Every occurrence is checked against each attendee's OOO days, travel days
+    and calendar events in one vectorized pass per attendee and reason.
+    """
+    zone = first_slot.get("timezone") or settings.default_timezone
+    first_day = datetime.strptime(first_slot["date"], "%Y-%m-%d").date()
+    hours, minutes = first_slot["start_time"].split(":")
+    duration = int(first_slot.get("duration_minutes") or settings.default_meeting_duration)
+
+    local_starts = list(iter_occurrences(rule, first_day, int(hours) * 60 + int(minutes), horizon_days, zone=zone))
+    if not local_starts:
+        return {"rule": normalize_rrule(rule), "occurrences": [], "total": 0, "conflicting": 0}
+
+    starts = np.fromiter(
+        (local_to_utc(zone, moment.date(), moment.hour * 60 + moment.minute) for moment in local_starts),
+        dtype=np.int64,
+        count=len(local_starts),
+    )
+    ends = starts + duration
+    span = (int(starts.min()), int(ends.max()))
+
+    conflicts: List[List[Dict[str, str]]] = [[] for _ in local_starts]
+    for user in users:
+        user_zone = user_timezone(user)
+        checks = (
+            ("out_of_office", _day_intervals(user_zone, user.get("ooo_dates", []), span)),
+            ("traveling", _day_intervals(user_zone, user.get("travel_dates", []), span)),
+            ("busy", _event_intervals(user, user_zone, span)),
+        )
+        for reason, intervals in checks:
+            for i in np.flatnonzero(_overlapping(starts, ends, intervals)):
+                conflicts[i].append({"name": user["name"], "reason": reason})
+
+    occurrences = []
+    for moment, start, end, occurrence_conflicts in zip(local_starts, starts.tolist(), ends.tolist(), conflicts):
+        occurrences.append({
+            "date": moment.strftime("%Y-%m-%d"),
+            "start_time": moment.strftime("%H:%M"),
+            "end_time": to_hhmm((moment.hour * 60 + moment.minute + duration) % MINUTES_PER_DAY),
+            "start_utc": utc_minutes_to_iso(start),
+            "end_utc": utc_minutes_to_iso(end),
+            "conflicts": occurrence_conflicts,
+        })
+
+    return {
+        "rule": normalize_rrule(rule),
+        "occurrences": occurrences,
+        "total": len(occurrences),
+        "conflicting": sum(1 for occurrence in occurrences if occurrence["conflicts"]),
+    }
+
+
+def describe_conflicts(report: Dict[str, Any], limit: int = 5) -> str:
+    """Short human-readable summary of a check_occurrences report"""
+    if not report["total"]:
+        return "The recurrence rule produces no occurrences in the planning horizon."
+    if not report["conflicting"]:
+        return f"All {report['total']} occurrences are clear for every attendee."
+
+    lines = [f"{report['conflicting']} of {report['total']} occurrences have conflicts:"]
+    shown = [occurrence for occurrence in report["occurrences"] if occurrence["conflicts"]][:limit]
+    for occurrence in shown:
+        who = ", ".join(f"{c['name']} ({c['reason'].replace('_', ' ')})" for c in occurrence["conflicts"])
+        lines.append(f"- {occurrence['date']} {occurrence['start_time']}: {who}")
+    if report["conflicting"] > len(shown):
+        lines.append(f"- ...and {report['conflicting'] - len(shown)} more")
+    return "\n".join(lines)
@@ -0,0 +1,180 @@
+"""Replay recorded conversations through the current graph and report cost and latency.
+
+Record production traffic with LLM_TRANSPORT_MODE=record, then run:
+
+    LLM_TRANSPORT_MODE=replay python replay_conversations.py [cassette.jsonl]
+
+Each recorded session is fed through MeetingSchedulerAgent.stream_conversation,
+the WebSocket streaming loop, by a scripted client that sends the initial
+message and then one recorded answer per question. Wall-clock time, LLM call
+count and token usage are printed per session, together with the graph steps
+and checkpoint reads/writes of every turn. Every checkpoint written is also measured with
+both LangGraph's default serializer and the compact one (state bytes and
+serialize/deserialize time per step).
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+from fastapi import WebSocketDisconnect
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from agents import scheduler_agent
+from checkpoint_serde import CompactSerializer, create_serializer, measure
+from config import settings
+from graph import create_graph
+from llm_transport import load_recorded_conversations
+from components import get_components
+
+
+SERIALIZERS = {"default": JsonPlusSerializer(), "compact": CompactSerializer()}
+
+
+class CountingSaver(MemorySaver):
+    """MemorySaver that counts checkpoint reads and writes and measures both serializers"""
+
+    def __init__(self):
+        super().__init__(serde=create_serializer())
+        self.reset()
+
+    def reset(self):
+        self.read_ops = 0
+        self.write_ops = 0
+        self.put_ops = 0
+        self.serde_stats = {name: {"bytes": 0, "serialize_ms": 0.0, "deserialize_ms": 0.0} for name in SERIALIZERS}
+
+    def _measure(self, checkpoint):
+        for name, serializer in SERIALIZERS.items():
+            for field, amount in measure(serializer, checkpoint["channel_values"]).items():
+                self.serde_stats[name][field] += amount
+
+    # The async methods of MemorySaver delegate to these, so each operation is counted once
+    def get_tuple(self, config):
+        self.read_ops += 1
+        return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        self.write_ops += 1
+        self.put_ops += 1
+        self._measure(checkpoint)
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        self.write_ops += 1
+        return super().put_writes(config, writes, task_id, task_path)
+
+
+checkpoints = CountingSaver()
+
+
+def _per_step(serde_stats: dict, steps: int) -> dict:
+    steps = max(steps, 1)
+    return {
+        name: {field: round(total / steps, 3) for field, total in totals.items()}
+        for name, totals in serde_stats.items()
+    }
+
+
+class ScriptedWebSocket:
+    """Stands in for the client of MeetingSchedulerAgent.stream_conversation.
+
+    Each question is answered with the next recorded turn. Every time the
+    client is asked for input (and when the conversation ends), the graph
+    steps streamed since the previous answer and the checkpoint operations
+    they caused are closed off as one turn.
+    """
+
+    def __init__(self, answers: list, saver: "CountingSaver"):
+        self.answers = list(answers)
+        self.saver = saver
+        self.sent = []
+        self.turns = []
+        self.status = "complete"
+        self._steps = 0
+        saver.reset()
+
+    async def send_json(self, data: dict):
+        self.sent.append(data)
+        if data.get("type") in ("progress", "update"):
+            self._steps += 1
+
+    def end_turn(self):
+        self.turns.append({
+            "steps": self._steps,
+            "checkpoint_reads": self.saver.read_ops,
+            "checkpoint_writes": self.saver.write_ops,
+            "checkpoint_puts": self.saver.put_ops,
+            "serde": _per_step(self.saver.serde_stats, self._steps),
+        })
+        self._steps = 0
+        self.saver.reset()
+
+    async def receive_json(self) -> dict:
+        self.end_turn()
+        if not self.answers:
+            self.status = "ran_out_of_turns"
+            raise WebSocketDisconnect()
+        return {"message": self.answers.pop(0)}
+
+
+async def replay_session(session_id: str, turns: list) -> dict:
+    """Feed one recorded conversation through the agent's WebSocket streaming loop"""
+    llm_transport = scheduler_agent.components.llm
+    websocket = ScriptedWebSocket(turns[1:], checkpoints)
+
+    llm_transport.reset_stats()
+    started = time.perf_counter()
+
+    initial_state = scheduler_agent.build_initial_state(turns[0], f"replay-{session_id}", "replay_user", "Replay")
+    try:
+        await scheduler_agent.stream_conversation(websocket, f"replay-{session_id}", initial_state)
+        websocket.end_turn()
+    except WebSocketDisconnect:
+        pass
+
+    return {
+        "session_id": session_id,
+        "status": websocket.status,
+        "wall_clock_ms": round((time.perf_counter() - started) * 1000, 1),
+        **llm_transport.stats,
+        "turns": websocket.turns,
+    }
+
+
+async def main(cassette_path: str):
+    if get_components().llm.mode != "replay":
+        print("Set LLM_TRANSPORT_MODE=replay to replay without calling the LLM provider")
+        return
+
+    await scheduler_agent.initialize()
+    scheduler_agent.graph = await create_graph(checkpointer=checkpoints)
+    conversations = load_recorded_conversations(cassette_path)
+
+    results = []
+    for session_id, turns in conversations.items():
+        try:
+            results.append(await replay_session(session_id, turns))
+        except LookupError as e:
+            # The prompt changed in this graph version, so no recording exists for it
+            results.append({"session_id": session_id, "status": "diverged", "error": str(e)})
+
+    for result in results:
+        print(json.dumps(result))
+
+    completed = [r for r in results if "calls" in r]
+    if completed:
+        print(json.dumps({
+            "sessions": len(results),
+            "wall_clock_ms": round(sum(r["wall_clock_ms"] for r in completed), 1),
+            "llm_calls": sum(r["calls"] for r in completed),
+            "total_tokens": sum(r["total_tokens"] for r in completed),
+            "graph_steps": sum(turn["steps"] for r in completed for turn in r["turns"]),
+            "checkpoint_ops": sum(turn["checkpoint_reads"] + turn["checkpoint_writes"] for r in completed for turn in r["turns"]),
+        }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else settings.llm_cassette_path))
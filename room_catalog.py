@@ -0,0 +1,110 @@
+"""Single indexed catalog of office meeting rooms"""
+
+import json
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import settings
+
+
+def normalize_location(name: Optional[str]) -> str:
+    """'New York', 'new_york' and ' NEW  YORK ' all map to 'new york'"""
+    return " ".join((name or "").replace("_", " ").lower().split())
+
+
+class RoomCatalog:
+    """Meeting rooms indexed by normalized location, sorted by capacity.
+
+    Each location keeps a parallel list of capacities so best-fit lookup for
+    N attendees is a single bisect.
+    """
+
+    def __init__(self, locations: Dict[str, Any]):
+        self._rooms: Dict[str, List[Dict[str, Any]]] = {}
+        self._capacities: Dict[str, List[int]] = {}
+        self._display_names: Dict[str, str] = {}
+        self._by_cabin: Dict[str, Dict[str, Any]] = {}
+
+        for location_name, location_data in locations.items():
+            key = normalize_location(location_name)
+            display_name = self._display_names.setdefault(key, key.title())
+            rooms = self._rooms.setdefault(key, [])
+            for floor_name, floor_data in location_data.get("floors", {}).items():
+                floor = floor_name.replace("floor_", "")
+                for cabin in floor_data.get("cabins", []):
+                    if cabin["cabin_id"] in self._by_cabin:
+                        continue
+                    room = {
+                        "location": display_name,
+                        "floor": floor,
+                        "cabin_id": cabin["cabin_id"],
+                        "capacity": cabin["capacity"],
+                    }
+                    rooms.append(room)
+                    self._by_cabin[room["cabin_id"]] = room
+
+        for key, rooms in self._rooms.items():
+            rooms.sort(key=lambda room: (room["capacity"], room["cabin_id"]))
+            self._capacities[key] = [room["capacity"] for room in rooms]
+
+    @classmethod
+    def from_file(cls, path: str) -> "RoomCatalog":
+        try:
+            with open(path, "r") as file:
+                return cls(json.load(file).get("locations", {}))
+        except FileNotFoundError:
+            print(f"Availability file {path} not found")
+            return cls({})
+
+    def locations(self) -> List[str]:
+        """Display names of all office locations"""
+        return [self._display_names[key] for key in self._rooms]
+
+    def display_name(self, location: str) -> str:
+        key = normalize_location(location)
+        return self._display_names.get(key, location)
+
+    def has_location(self, location: str) -> bool:
+        return normalize_location(location) in self._rooms
+
+    def rooms_for(self, location: str, min_capacity: int = 1) -> List[Dict[str, Any]]:
+        """Rooms at a location that seat at least `min_capacity`, smallest first"""
+        key = normalize_location(location)
+        rooms = self._rooms.get(key)
+        if not rooms:
+            return []
+        start = bisect_left(self._capacities[key], min_capacity)
+        return rooms[start:]
+
+    def iter_rooms(self) -> Iterator[Dict[str, Any]]:
+        for rooms in self._rooms.values():
+            yield from rooms
+
+    def get(self, cabin_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_cabin.get(cabin_id.upper())
+
+    def describe(self) -> str:
+        """Human-readable room list (used by prompts and the knowledge base)"""
+        lines = []
+        for key, rooms in self._rooms.items():
+            lines.append(f"- {self._display_names[key]} office:")
+            for room in sorted(rooms, key=lambda room: (room["floor"], -room["capacity"])):
+                lines.append(f"   • floor {room['floor']} Cabin {room['cabin_id']} ({room['capacity']}-person capacity)")
+        return "\n".join(lines)
+
+
+_catalog: Optional[RoomCatalog] = None
+
+
+def get_room_catalog() -> RoomCatalog:
+    """Process-wide catalog; loaded once from the availability file unless set_room_catalog() replaced it"""
+    global _catalog
+    if _catalog is None:
+        _catalog = RoomCatalog.from_file(settings.availability_file)
+    return _catalog
+
+
+def set_room_catalog(catalog: RoomCatalog):
+    """Replace the process-wide catalog (e.g. with one loaded from Postgres)"""
+    global _catalog
+    _catalog = catalog
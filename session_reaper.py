@@ -0,0 +1,146 @@
+"""Background eviction of idle sessions and their checkpoint threads"""
+
+import asyncio
+import inspect
+import logging
+import os
+import resource
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from starlette.websockets import WebSocketState
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Evictor = Callable[[str], Union[None, Awaitable[None]]]
+
+
+def _rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def is_disconnected(websocket: Any) -> bool:
+    return WebSocketState.DISCONNECTED in (
+        getattr(websocket, "client_state", None),
+        getattr(websocket, "application_state", None),
+    )
+
+
+class SessionReaper:
+    """Evicts sessions idle for longer than the TTL.
+
+    Sessions are kept alive with touch(). Eviction deletes the session's
+    checkpoint thread and runs every registered evictor, which drops
+    per-session entries such as connections and queue listeners.
+    Checkpoint threads nobody touched are picked up on the first sweep
+    and expire one TTL later. Connection maps registered with
+    track_connections() also lose closed sockets on every sweep.
+    """
+
+    def __init__(self, ttl_seconds: float, interval_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self.checkpointer = None
+        self._last_seen: Dict[str, float] = {}
+        self._evictors: List[Evictor] = []
+        self._connection_maps: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"sweeps": 0, "evicted_sessions": 0, "dropped_connections": 0}
+
+    def touch(self, session_id: str):
+        self._last_seen[session_id] = time.monotonic()
+
+    def on_evict(self, evictor: Evictor):
+        self._evictors.append(evictor)
+
+    def track_connections(self, connections: Dict[str, Any]):
+        self._connection_maps.append(connections)
+
+    def _thread_ids(self) -> List[str]:
+        storage = getattr(self.checkpointer, "storage", None)
+        return list(storage.keys()) if storage is not None else []
+
+    async def evict(self, session_id: str):
+        """Forget a session now: its checkpoint thread and every per-session entry"""
+        self._last_seen.pop(session_id, None)
+        if self.checkpointer is not None:
+            await self.checkpointer.adelete_thread(session_id)
+        for evictor in self._evictors:
+            result = evictor(session_id)
+            if inspect.isawaitable(result):
+                await result
+
+    async def sweep(self):
+        """Drop closed connections and evict sessions idle past the TTL"""
+        now = time.monotonic()
+        self.stats["sweeps"] += 1
+
+        for connections in self._connection_maps:
+            for session_id, websocket in list(connections.items()):
+                if is_disconnected(websocket):
+                    connections.pop(session_id, None)
+                    self.stats["dropped_connections"] += 1
+
+        for thread_id in self._thread_ids():
+            self._last_seen.setdefault(thread_id, now)
+
+        expired = [sid for sid, seen in self._last_seen.items() if now - seen > self.ttl_seconds]
+        for session_id in expired:
+            try:
+                await self.evict(session_id)
+                self.stats["evicted_sessions"] += 1
+            except Exception:
+                logger.exception(f"Failed to evict session {session_id}")
+
+        if expired:
+            logger.info(f"Evicted {len(expired)} idle session(s)")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    def start(self, checkpointer):
+        """Start sweeping in the background (called from the app lifespan)"""
+        self.checkpointer = checkpointer
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> Dict[str, Any]:
+        storage = getattr(self.checkpointer, "storage", None) or {}
+        return {
+            **self.stats,
+            "tracked_sessions": len(self._last_seen),
+            "checkpoint_threads": len(storage),
+            "checkpoints": sum(len(checkpoints) for namespaces in storage.values() for checkpoints in namespaces.values()),
+            "connections": sum(len(connections) for connections in self._connection_maps),
+            "rss_bytes": _rss_bytes(),
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+def create_session_reaper() -> SessionReaper:
+    """Reaper configured from settings (one per Components container)"""
+    return SessionReaper(
+        ttl_seconds=settings.session_idle_ttl_seconds,
+        interval_seconds=settings.session_reap_interval_seconds,
+    )
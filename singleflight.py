@@ -0,0 +1,56 @@
+"""Single-flight coalescing of identical async computations with a short result cache"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Runs one computation per key at a time and shares its result.
+
+    Concurrent callers with the same key await the same task instead of
+    starting their own. Non-None results are kept for `ttl` seconds. The
+    shared task is shielded, so a caller that goes away does not cancel
+    the work for the others. Exceptions reach every waiter and are not cached.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._cache: Dict[Hashable, Tuple[float, Any]] = {}
+        self.stats = {"computed": 0, "coalesced": 0, "cache_hits": 0}
+
+    def _store(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            return
+
+        now = time.monotonic()
+        for stale in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[stale]
+        self._cache[key] = (now + self.ttl, task.result())
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self.stats["cache_hits"] += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["computed"] += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+        else:
+            self.stats["coalesced"] += 1
+
+        return await asyncio.shield(task)
+
+    def invalidate(self):
+        """Drop cached results (e.g. after the underlying data changed)"""
+        self._cache.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "in_flight": len(self._inflight), "cached": len(self._cache)}
@@ -0,0 +1,521 @@
+"""Deterministic common free-slot search across attendees and days.
+
+All interval arithmetic happens on UTC minutes (minutes since 0001-01-01 UTC).
+Each attendee's business hours and calendar events are projected from their
+own timezone, and slots are rendered back per attendee.
+"""
+
+import heapq
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from config import settings
+
+# Ranking weight per day searched forward; larger than any within-day cost so
+# an earlier day always ranks ahead of a later one.
+DAY_WEIGHT = 1000.0
+
+MINUTES_PER_DAY = 24 * 60
+
+# Granularity of the attendee/room bitmaps used by the joint room search
+QUANTUM_MINUTES = 15
+
+# Fallback zones for attendees whose directory entry has no timezone
+OFFICE_TIMEZONES = {
+    "new york": "America/New_York",
+    "chicago": "America/Chicago",
+    "san francisco": "America/Los_Angeles",
+    "bangalore": "Asia/Kolkata",
+}
+
+
+def to_minutes(hhmm: str) -> int:
+    """'14:30' -> 870"""
+    hours, minutes = hhmm.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def to_hhmm(minutes: int) -> str:
+    """870 -> '14:30'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def resolve_date(value: Optional[str], today: Optional[date] = None) -> date:
+    """Resolve 'today', 'tomorrow' or 'YYYY-MM-DD' to a date, defaulting to today"""
+    today = today or date.today()
+    if not value:
+        return today
+    value = str(value).strip().lower()
+    if value == "tomorrow":
+        return today + timedelta(days=1)
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return today
+
+
+def user_timezone(user: Dict[str, Any]) -> str:
+    """IANA zone for a directory entry: its own timezone, then its office, then the default"""
+    if user.get("timezone"):
+        return user["timezone"]
+    location = (user.get("base_location") or "").strip().lower().replace("_", " ")
+    return OFFICE_TIMEZONES.get(location, settings.default_timezone)
+
+
+def preferred_window(user: Dict[str, Any]) -> Tuple[int, int]:
+    """Local minutes a user prefers to meet in: their preferred_hours ({"start": "09:00", ...}), else the default"""
+    hours = user.get("preferred_hours") or {}
+    start = to_minutes(hours["start"]) if hours.get("start") else settings.preferred_hours_start * 60
+    end = to_minutes(hours["end"]) if hours.get("end") else settings.preferred_hours_end * 60
+    return start, end
+
+
+@lru_cache(maxsize=8192)
+def utc_offset_minutes(zone: str, day: date) -> int:
+    """UTC offset of a zone on a local date, measured at local noon (clear of DST switches)"""
+    local_noon = datetime(day.year, day.month, day.day, 12, tzinfo=ZoneInfo(zone))
+    return int(local_noon.utcoffset().total_seconds() // 60)
+
+
+def local_to_utc(zone: str, day: date, minute: int) -> int:
+    """Local wall-clock minute on a date -> UTC minutes"""
+    return day.toordinal() * MINUTES_PER_DAY + minute - utc_offset_minutes(zone, day)
+
+
+def utc_to_local(zone: str, utc_minute: int) -> Tuple[date, int]:
+    """UTC minutes -> (local date, local minute of day)"""
+    offset = utc_offset_minutes(zone, date.fromordinal(utc_minute // MINUTES_PER_DAY))
+    local = utc_minute + offset
+    local_day = date.fromordinal(local // MINUTES_PER_DAY)
+    corrected = utc_offset_minutes(zone, local_day)
+    if corrected != offset:
+        local = utc_minute + corrected
+        local_day = date.fromordinal(local // MINUTES_PER_DAY)
+    return local_day, local % MINUTES_PER_DAY
+
+
+def datetime_to_utc_minutes(moment: datetime) -> int:
+    """Aware (or naive server-local) datetime -> UTC minutes"""
+    moment = moment.astimezone(timezone.utc)
+    return moment.date().toordinal() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def utc_minutes_to_datetime(utc_minute: int) -> datetime:
+    """UTC minutes -> aware UTC datetime"""
+    moment = datetime.fromordinal(utc_minute // MINUTES_PER_DAY) + timedelta(minutes=utc_minute % MINUTES_PER_DAY)
+    return moment.replace(tzinfo=timezone.utc)
+
+
+def utc_minutes_to_iso(utc_minute: int) -> str:
+    return utc_minutes_to_datetime(utc_minute).isoformat()
+
+
+def slot_to_utc(slot: Dict[str, Any]) -> Tuple[int, int]:
+    """(start, end) UTC minutes of a TimeSlot dict, from its UTC bounds or its local date/time"""
+    if slot.get("start_utc") and slot.get("end_utc"):
+        return (
+            datetime_to_utc_minutes(datetime.fromisoformat(slot["start_utc"])),
+            datetime_to_utc_minutes(datetime.fromisoformat(slot["end_utc"])),
+        )
+
+    zone = slot.get("timezone") or settings.default_timezone
+    day = datetime.strptime(slot["date"], "%Y-%m-%d").date()
+    start = local_to_utc(zone, day, to_minutes(slot["start_time"]))
+    if slot.get("end_time"):
+        end = local_to_utc(zone, day, to_minutes(slot["end_time"]))
+    else:
+        end = start + int(slot.get("duration_minutes") or settings.default_meeting_duration)
+    return start, end
+
+
+def busy_intervals(user: Dict[str, Any], day: str) -> List[Tuple[int, int]]:
+    """Busy (start, end) local minute intervals for a user on a YYYY-MM-DD date"""
+    intervals = []
+    for event in user.get("calendar_events", {}).get(day, []):
+        start, end = event["slot"].split("-")
+        intervals.append((to_minutes(start), to_minutes(end)))
+    return intervals
+
+
+def blocked_reason(user: Dict[str, Any], day: str) -> Optional[str]:
+    """Why a user cannot meet at all on a date, or None"""
+    if day in user.get("ooo_dates", []):
+        return "out_of_office"
+    if day in user.get("travel_dates", []):
+        return "traveling"
+    return None
+
+
+def unavailable_attendees(users: List[Dict[str, Any]], day: str) -> List[Dict[str, str]]:
+    """Attendees who are OOO or traveling on a date"""
+    unavailable = []
+    for user in users:
+        reason = blocked_reason(user, day)
+        if reason:
+            unavailable.append({"name": user["name"], "reason": reason})
+    return unavailable
+
+
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or touching intervals"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(
+    windows: List[Tuple[int, int]], busy: List[Tuple[int, int]]
+) -> List[Tuple[int, int]]:
+    """Remove merged busy intervals from sorted, disjoint windows"""
+    free = []
+    busy = merge_intervals(busy)
+    for window_start, window_end in windows:
+        cursor = window_start
+        for start, end in busy:
+            if end <= cursor:
+                continue
+            if start >= window_end:
+                break
+            if start > cursor:
+                free.append((cursor, start))
+            cursor = max(cursor, end)
+        if cursor < window_end:
+            free.append((cursor, window_end))
+    return free
+
+
+def intersect_intervals(
+    first: List[Tuple[int, int]], second: List[Tuple[int, int]]
+) -> List[Tuple[int, int]]:
+    """Intersection of two sorted, disjoint interval lists"""
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        end = min(first[i][1], second[j][1])
+        if start < end:
+            result.append((start, end))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def business_windows_utc(user: Dict[str, Any], span: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """A user's business-hour windows (UTC minutes) inside a UTC span, skipping weekends and OOO/travel days"""
+    zone = user_timezone(user)
+    first_day, _ = utc_to_local(zone, span[0])
+    last_day, _ = utc_to_local(zone, span[1] - 1)
+
+    windows = []
+    day = first_day
+    while day <= last_day:
+        if day.weekday() < 5 and not blocked_reason(user, day.strftime("%Y-%m-%d")):
+            windows.append((
+                local_to_utc(zone, day, settings.business_hours_start * 60),
+                local_to_utc(zone, day, settings.business_hours_end * 60),
+            ))
+        day += timedelta(days=1)
+
+    return intersect_intervals(merge_intervals(windows), [span])
+
+
+def user_free_utc(user: Dict[str, Any], span: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """A user's free business-hour intervals (UTC minutes) inside a UTC span"""
+    zone = user_timezone(user)
+    first_day, _ = utc_to_local(zone, span[0])
+    last_day, _ = utc_to_local(zone, span[1] - 1)
+
+    busy = []
+    day = first_day
+    while day <= last_day:
+        for start, end in busy_intervals(user, day.strftime("%Y-%m-%d")):
+            busy.append((local_to_utc(zone, day, start), local_to_utc(zone, day, end)))
+        day += timedelta(days=1)
+
+    return subtract_intervals(business_windows_utc(user, span), busy)
+
+
+def common_free_utc(
+    users: List[Dict[str, Any]], span: Tuple[int, int], busy: Optional[List[Tuple[int, int]]] = None
+) -> List[Tuple[int, int]]:
+    """Intervals inside a UTC span where every user is free.
+
+    `busy` is the attendees' merged busy time (UTC minutes, sorted) when it
+    was computed elsewhere, e.g. by the database; the users' own calendar
+    events are then ignored and only their business hours are intersected.
+    """
+    common = [span]
+    for user in users:
+        windows = business_windows_utc(user, span) if busy is not None else user_free_utc(user, span)
+        common = intersect_intervals(common, windows)
+        if not common:
+            break
+    if busy is not None and common:
+        common = subtract_intervals(common, busy)
+    return common
+
+
+def business_days(start: date, horizon: int) -> Iterator[date]:
+    """Yield up to `horizon` weekdays starting at `start`"""
+    day = start
+    yielded = 0
+    while yielded < horizon:
+        if day.weekday() < 5:
+            yield day
+            yielded += 1
+        day += timedelta(days=1)
+
+
+def calendar_days(start_date: date, horizon_days: Optional[int] = None) -> Tuple[date, date]:
+    """First and last local date a search horizon can touch, with a day of slack for timezones"""
+    days = list(business_days(start_date, horizon_days or settings.slot_search_horizon_days))
+    return days[0] - timedelta(days=1), days[-1] + timedelta(days=1)
+
+
+def horizon_span(start_date: date, horizon_days: Optional[int] = None) -> Tuple[int, int]:
+    """UTC minutes covering every business day of a search horizon, with a day of slack for timezones"""
+    days = list(business_days(start_date, horizon_days or settings.slot_search_horizon_days))
+    return (
+        (days[0] - timedelta(days=1)).toordinal() * MINUTES_PER_DAY,
+        (days[-1] + timedelta(days=2)).toordinal() * MINUTES_PER_DAY,
+    )
+
+
+def render_slot(
+    start: int, end: int, users: List[Dict[str, Any]], display_zone: str
+) -> Dict[str, Any]:
+    """Render a UTC slot in the display zone, with each attendee's local time"""
+    day, start_local = utc_to_local(display_zone, start)
+    _, end_local = utc_to_local(display_zone, end)
+
+    attendee_times = {}
+    for user in users:
+        zone = user_timezone(user)
+        user_day, user_start = utc_to_local(zone, start)
+        _, user_end = utc_to_local(zone, end)
+        attendee_times[user["name"]] = f"{user_day.strftime('%Y-%m-%d')} {to_hhmm(user_start)}-{to_hhmm(user_end)} ({zone})"
+
+    return {
+        "date": day.strftime("%Y-%m-%d"),
+        "start_time": to_hhmm(start_local),
+        "end_time": to_hhmm(end_local),
+        "duration_minutes": end - start,
+        "timezone": display_zone,
+        "start_utc": utc_minutes_to_iso(start),
+        "end_utc": utc_minutes_to_iso(end),
+        "attendee_times": attendee_times,
+    }
+
+
+def _slot_cost(
+    start: int, end: int, window: Tuple[int, int], duration: int,
+    users: List[Dict[str, Any]], day_start: int
+) -> float:
+    """Within-day cost: later start, outside any attendee's local preferred hours and leftover fragments cost more"""
+    cost = (start - day_start) / 60.0
+
+    for user in users:
+        preferred_start, preferred_end = preferred_window(user)
+        _, local_start = utc_to_local(user_timezone(user), start)
+        if local_start < preferred_start or local_start + duration > preferred_end:
+            cost += 4.0
+            break
+
+    # Free time left on either side that is too short to hold another meeting
+    for leftover in (start - window[0], window[1] - end):
+        if 0 < leftover < duration:
+            cost += 2.0 * (1 - leftover / duration)
+
+    return cost
+
+
+def _day_spans(
+    start_date: date, horizon_days: int, display_zone: str, not_before: int
+) -> Iterator[Tuple[int, Tuple[int, int], int]]:
+    """Yield (day offset, UTC span of the remaining day, UTC business-day start) per business day"""
+    for offset, day in enumerate(business_days(start_date, horizon_days)):
+        span = (local_to_utc(display_zone, day, 0), local_to_utc(display_zone, day + timedelta(days=1), 0))
+        if span[1] <= not_before:
+            continue
+        span = (max(span[0], not_before), span[1])
+        yield offset, span, local_to_utc(display_zone, day, settings.business_hours_start * 60)
+
+
+def _offer(best: List[Tuple[float, int, Any]], k: int, cost: float, counter: int, item: Any):
+    """Keep the k cheapest candidates in a bounded max-heap of (-cost, -counter, item)"""
+    if len(best) < k:
+        heapq.heappush(best, (-cost, -counter, item))
+    elif -cost > best[0][0]:
+        heapq.heapreplace(best, (-cost, -counter, item))
+
+
+def _ranked(best: List[Tuple[float, int, Any]]) -> List[Any]:
+    return [item for _, _, item in sorted(best, key=lambda entry: (-entry[0], -entry[1]))]
+
+
+def find_common_slots(
+    users: List[Dict[str, Any]],
+    start_date: date,
+    duration_minutes: int = 60,
+    k: Optional[int] = None,
+    horizon_days: Optional[int] = None,
+    now: Optional[datetime] = None,
+    display_timezone: Optional[str] = None,
+    busy: Optional[List[Tuple[int, int]]] = None,
+) -> List[Dict[str, Any]]:
+    """Return the k best common slots, searching forward from start_date.
+
+    Days are calendar days in the display zone (the first attendee's zone by
+    default). Weekends and any local date on which an attendee is OOO or
+    traveling contribute no free time for that attendee. The search stops after
+    the first day that brings the candidate count to k, since no later day can
+    outrank an earlier one.
+    """
+    k = k or settings.slot_suggestions_k
+    horizon_days = horizon_days or settings.slot_search_horizon_days
+    step = settings.slot_step_minutes
+    display_zone = display_timezone or (user_timezone(users[0]) if users else settings.default_timezone)
+    not_before = datetime_to_utc_minutes(now or datetime.now(timezone.utc))
+
+    best: List[Tuple[float, int, Tuple[int, int]]] = []
+    counter = 0
+
+    for offset, span, day_start in _day_spans(start_date, horizon_days, display_zone, not_before):
+        for window in common_free_utc(users, span, busy):
+            start = -(-window[0] // step) * step
+            while start + duration_minutes <= window[1]:
+                end = start + duration_minutes
+                cost = offset * DAY_WEIGHT + _slot_cost(start, end, window, duration_minutes, users, day_start)
+                counter += 1
+                _offer(best, k, cost, counter, (start, end))
+                start += step
+
+        if len(best) >= k:
+            break
+
+    return [render_slot(start, end, users, display_zone) for start, end in _ranked(best)]
+
+
+def intervals_to_bitmap(
+    intervals: List[Tuple[int, int]], origin: int, nbits: int, quantum: int, outward: bool = False
+) -> int:
+    """Bitmap with bit i set when quantum i (from `origin`) is covered by an interval.
+
+    By default only fully covered quanta are set (use for free time); with
+    outward=True any partially covered quantum is set (use for occupancy).
+    """
+    mask = 0
+    for start, end in intervals:
+        if outward:
+            first = (start - origin) // quantum
+            last = -(-(end - origin) // quantum)
+        else:
+            first = -(-(start - origin) // quantum)
+            last = (end - origin) // quantum
+        first, last = max(first, 0), min(last, nbits)
+        if last > first:
+            mask |= ((1 << (last - first)) - 1) << first
+    return mask
+
+
+def run_starts(mask: int, length: int) -> int:
+    """Bits i of `mask` where bits i .. i+length-1 are all set (log-step shift-AND)"""
+    covered = 1
+    while covered < length:
+        shift = min(covered, length - covered)
+        mask &= mask >> shift
+        covered += shift
+    return mask
+
+
+def find_slots_with_rooms(
+    users: List[Dict[str, Any]],
+    rooms: List[Dict[str, Any]],
+    ledger: Any,
+    start_date: date,
+    duration_minutes: int = 60,
+    k: Optional[int] = None,
+    horizon_days: Optional[int] = None,
+    now: Optional[datetime] = None,
+    display_timezone: Optional[str] = None,
+    busy: Optional[List[Tuple[int, int]]] = None,
+) -> List[Dict[str, Any]]:
+    """Return the k best slots where every attendee is free and at least one room is unbooked.
+
+    Per day, attendee free time and each room's free time become bitmaps of
+    QUANTUM_MINUTES quanta. Room bitmaps are packed side by side into one
+    integer (with a zero guard bit between rooms), ANDed with the attendee
+    bitmap and run through a single shift-AND pass, so every (slot, room) pair
+    falls out of one vectorized operation. Rendered slots carry a "rooms" list,
+    in the order the rooms were given (best fit first for catalog lookups).
+    """
+    if not rooms:
+        return []
+
+    k = k or settings.slot_suggestions_k
+    horizon_days = horizon_days or settings.slot_search_horizon_days
+    step = settings.slot_step_minutes
+    quantum = QUANTUM_MINUTES
+    length = -(-duration_minutes // quantum)
+    display_zone = display_timezone or (user_timezone(users[0]) if users else settings.default_timezone)
+    not_before = datetime_to_utc_minutes(now or datetime.now(timezone.utc))
+
+    best: List[Tuple[float, int, Tuple[int, int, List[Dict[str, Any]]]]] = []
+    counter = 0
+
+    for offset, span, day_start in _day_spans(start_date, horizon_days, display_zone, not_before):
+        windows = common_free_utc(users, span, busy)
+        if not windows:
+            continue
+
+        origin = span[0] // quantum * quantum
+        nbits = -(-(span[1] - origin) // quantum)
+        width = nbits + 1  # guard bit keeps runs from spilling into the next room
+        full = (1 << nbits) - 1
+
+        attendee_free = intervals_to_bitmap(windows, origin, nbits, quantum)
+        aligned = sum(1 << i for i in range(nbits) if (origin + i * quantum) % step == 0)
+
+        packed = 0
+        aligned_packed = 0
+        for r, room in enumerate(rooms):
+            occupied = ledger.occupancy_bitmap(room["cabin_id"], origin, nbits, quantum)
+            packed |= (attendee_free & full & ~occupied) << (r * width)
+            aligned_packed |= aligned << (r * width)
+
+        starts = run_starts(packed, length) & aligned_packed
+
+        rooms_by_start: Dict[int, List[Dict[str, Any]]] = {}
+        while starts:
+            low = starts & -starts
+            r, i = divmod(low.bit_length() - 1, width)
+            rooms_by_start.setdefault(i, []).append(rooms[r])
+            starts ^= low
+
+        window_starts = [window[0] for window in windows]
+        for i in sorted(rooms_by_start):
+            start = origin + i * quantum
+            end = start + duration_minutes
+            window = windows[bisect_right(window_starts, start) - 1]
+            cost = offset * DAY_WEIGHT + _slot_cost(start, end, window, duration_minutes, users, day_start)
+            counter += 1
+            _offer(best, k, cost, counter, (start, end, rooms_by_start[i]))
+
+        if len(best) >= k:
+            break
+
+    slots = []
+    for start, end, slot_rooms in _ranked(best):
+        slot = render_slot(start, end, users, display_zone)
+        slot["rooms"] = [dict(room) for room in slot_rooms]
+        slots.append(slot)
+    return slots
@@ -0,0 +1,170 @@
+"""Precomputed common free slots for attendee groups that meet repeatedly"""
+
+import asyncio
+import copy
+import logging
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import settings
+from slot_search import business_days, calendar_days, find_common_slots
+
+logger = logging.getLogger(__name__)
+
+# (sorted attendee emails, duration in minutes)
+GroupKey = Tuple[Tuple[str, ...], int]
+
+
+class SlotSnapshots:
+    """Daily snapshots of common free slots for frequently co-scheduled groups.
+
+    Completed sessions are recorded per (attendee set, duration). Groups that
+    have met at least `min_meetings` times get a snapshot holding, for each of
+    the next `horizon_days` business days, the slots a search starting on that
+    day would return. Snapshots are rebuilt every morning (after
+    `refresh_hour`) and whenever the availability data version changes;
+    newly frequent groups are computed on the next check. A lookup is only
+    served while the snapshot's data version is current.
+    """
+
+    def __init__(self, min_meetings: int, max_groups: int, horizon_days: int, refresh_hour: int, interval_seconds: float):
+        self.min_meetings = min_meetings
+        self.max_groups = max_groups
+        self.horizon_days = horizon_days
+        self.refresh_hour = refresh_hour
+        self.interval_seconds = interval_seconds
+        self.knowledge = None
+        self._counts: Dict[GroupKey, int] = {}
+        self._snapshots: Dict[GroupKey, Dict[str, Any]] = {}
+        self._pending: Set[GroupKey] = set()
+        self._version = None
+        self._current_version = None
+        self._day: Optional[date] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "refreshes": 0, "groups_computed": 0}
+
+    @staticmethod
+    def key(emails: Iterable[str], duration: int) -> GroupKey:
+        return tuple(sorted({email.lower() for email in emails if email})), int(duration)
+
+    def record(self, emails: Iterable[str], duration: int):
+        """Count a completed meeting; a group becoming frequent is snapshotted on the next check"""
+        key = self.key(emails, duration)
+        if len(key[0]) < 2:
+            return
+        self._counts[key] = self._counts.get(key, 0) + 1
+        if key not in self._snapshots and key in self.frequent_groups():
+            self._pending.add(key)
+
+    def frequent_groups(self) -> List[GroupKey]:
+        frequent = [key for key, count in self._counts.items() if count >= self.min_meetings]
+        frequent.sort(key=lambda key: self._counts[key], reverse=True)
+        return frequent[:self.max_groups]
+
+    async def lookup(self, emails: Iterable[str], duration: int, from_date: date) -> Optional[Dict[str, Any]]:
+        """Snapshot slots for a search starting on `from_date` ({"slots", "users"}), or None"""
+        if self.knowledge is None:
+            return None
+        snapshot = self._snapshots.get(self.key(emails, duration))
+        if snapshot is None:
+            self.stats["misses"] += 1
+            return None
+        if snapshot["version"] != await self.knowledge.data_version():
+            self.stats["stale"] += 1
+            return None
+
+        now = datetime.now(timezone.utc).isoformat()
+        slots = [slot for slot in snapshot["by_start"].get(from_date.isoformat(), []) if slot["start_utc"] > now]
+        if not slots:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return {"slots": copy.deepcopy(slots), "users": snapshot["users"]}
+
+    async def _compute(self, key: GroupKey, version: Any) -> Optional[Dict[str, Any]]:
+        emails, duration = key
+        # Searches start on each of the next horizon_days business days and run a full search horizon
+        days = calendar_days(date.today(), self.horizon_days + settings.slot_search_horizon_days)
+        directory = await self.knowledge.find_users(list(emails), days)
+        if any(email not in directory for email in emails):
+            return None
+        users = [directory[email] for email in emails]
+
+        by_start = {
+            day.isoformat(): find_common_slots(users, day, duration_minutes=duration)
+            for day in business_days(date.today(), self.horizon_days)
+        }
+        self.stats["groups_computed"] += 1
+        return {"by_start": by_start, "users": users, "version": version, "computed_at": time.time()}
+
+    async def refresh(self):
+        """Rebuild every snapshot after a data change or each morning; otherwise only newly frequent groups"""
+        version = await self.knowledge.data_version()
+        self._current_version = version
+        today = date.today()
+        new_day = self._day != today and datetime.now().hour >= self.refresh_hour
+
+        if version != self._version or new_day:
+            groups = self.frequent_groups()
+            self._snapshots = {key: s for key, s in self._snapshots.items() if key in groups}
+            self._version, self._day = version, today
+            self.stats["refreshes"] += 1
+        else:
+            groups = [key for key in self._pending if key not in self._snapshots]
+        self._pending.clear()
+
+        for key in groups:
+            snapshot = await self._compute(key, version)
+            if snapshot is None:
+                self._snapshots.pop(key, None)
+            else:
+                self._snapshots[key] = snapshot
+            await asyncio.sleep(0)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Slot snapshot refresh failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self, knowledge):
+        """Start refreshing in the background (called from the app lifespan)"""
+        self.knowledge = knowledge
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["stale"]
+        ages = [time.time() - snapshot["computed_at"] for snapshot in self._snapshots.values()]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else None,
+            "tracked_groups": len(self._counts),
+            "frequent_groups": len(self.frequent_groups()),
+            "snapshots": len(self._snapshots),
+            "snapshots_behind_data": sum(1 for s in self._snapshots.values() if s["version"] != self._current_version),
+            "oldest_snapshot_age_seconds": max(ages) if ages else None,
+        }
+
+
+def create_slot_snapshots() -> SlotSnapshots:
+    """Snapshots configured from settings (one per Components container)"""
+    return SlotSnapshots(
+        min_meetings=settings.slot_snapshot_min_meetings,
+        max_groups=settings.slot_snapshot_max_groups,
+        horizon_days=settings.slot_snapshot_horizon_days,
+        refresh_hour=settings.slot_snapshot_refresh_hour,
+        interval_seconds=settings.slot_snapshot_check_interval_seconds,
+    )
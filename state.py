@@ -1,7 +1,8 @@
 """State definitions for the LangGraph meeting scheduler"""
 
+from dataclasses import dataclass
 from typing import TypedDict, List, Optional, Dict, Any, Annotated
-from datetime import datetime
+from datetime import date, datetime
 from langgraph.graph.message import add_messages
 
 class MeetingRequest(TypedDict):
@@ -11,6 +12,9 @@ class MeetingRequest(TypedDict):
     requested_time: Optional[str]
     duration_minutes: Optional[int]
     meeting_type: Optional[str]
+    meeting_format: Optional[str]  # "in-person", "virtual" or None if not stated
+    recurrence: Optional[str]  # RRULE body, e.g. "FREQ=WEEKLY;BYDAY=MO", or None for one-off
+    attendee_emails: Optional[List[str]]  # attendees picked by the client before parsing
 
 class Attendee(TypedDict):
     """Attendee information"""
@@ -26,6 +30,40 @@ class TimeSlot(TypedDict):
     start_time: str
     end_time: str
     duration_minutes: int
+    timezone: Optional[str]
+    start_utc: Optional[str]
+    end_utc: Optional[str]
+    attendee_times: Optional[Dict[str, str]]  # attendee name -> local rendering
+    rooms: Optional[List["MeetingRoom"]]  # free cabins for co-located attendees
+
+@dataclass(frozen=True, slots=True)
+class CompactSlot:
+    """A TimeSlot's date and times as integers (day ordinal, minutes since local midnight)"""
+    day: int
+    start: int
+    end: int
+
+    @classmethod
+    def from_slot(cls, slot: Dict[str, Any]) -> Optional["CompactSlot"]:
+        """None unless date/start_time/end_time are canonical 'YYYY-MM-DD' and 'HH:MM' strings"""
+        try:
+            day = date.fromisoformat(slot["date"])
+            start_hours, start_minutes = slot["start_time"].split(":")
+            end_hours, end_minutes = slot["end_time"].split(":")
+            compact = cls(day.toordinal(), int(start_hours) * 60 + int(start_minutes), int(end_hours) * 60 + int(end_minutes))
+        except (KeyError, AttributeError, TypeError, ValueError):
+            return None
+        if compact.fields() != (slot["date"], slot["start_time"], slot["end_time"]):
+            return None
+        return compact
+
+    def fields(self) -> tuple:
+        """(date, start_time, end_time) as the strings TimeSlot uses"""
+        return (
+            date.fromordinal(self.day).isoformat(),
+            f"{self.start // 60:02d}:{self.start % 60:02d}",
+            f"{self.end // 60:02d}:{self.end % 60:02d}",
+        )
 
 class MeetingRoom(TypedDict):
     """Meeting room details"""
@@ -52,6 +90,7 @@ class SchedulingState(TypedDict):
     
     # Extracted information
     attendees: List[Attendee]
+    pending_attendees: Optional[List[Dict[str, Any]]]  # names with several close directory matches
     available_slots: List[TimeSlot]
     selected_slot: Optional[TimeSlot]
     
@@ -61,6 +100,8 @@ class SchedulingState(TypedDict):
     meeting_agenda: Optional[str]
     meeting_format: Optional[str]  # "in-person" or "virtual"
     meeting_room: Optional[MeetingRoom]
+    room_booking: Optional[Dict[str, Any]]  # {"room", "slot"} held in the room ledger for this session
+    recurrence_report: Optional[Dict[str, Any]]  # per-occurrence conflicts of a recurring series
     available_rooms: Optional[List[MeetingRoom]]  # For user selection
     
     # Location analysis